@@ -0,0 +1,210 @@
+# ai_export.py – Context-budgeted export profile for handing a journal to the AI
+# Long campaigns do not fit in an AI context window, so this profile estimates
+# the token cost of every record and fills a target budget greedily:
+# - always: _meta, character, mental state and active quests
+# - then: inventory, recent and relevant history (entries, completed quests,
+#   rumors, NPCs), ranked by recency and by mentions of active quests
+# - older history that does not fit is reduced to one-line summaries, and
+#   anything that still does not fit is dropped and reported
+# The payload is meant to be written as minified JSON. The report lists the
+# records left out, so an import of the AI's reply can tell them apart from
+# records the AI removed (restore_omitted); strip_export_keys drops the
+# summaries again.
+
+import json
+from utils import clean_journal_data
+from journal_diff import RECORD_SECTIONS, get_path, index_records
+from metrics import timed
+
+# Rough characters-per-token ratio for English text and JSON punctuation
+CHARS_PER_TOKEN = 4
+
+DEFAULT_TOKEN_BUDGET = 8000
+
+# Top-level keys only the export payload has; dropped again on import
+EXPORT_ONLY_KEYS = ("_summaries",)
+
+# Base priority of each optional section; recency and relevance add to it
+SECTION_WEIGHTS = {
+    "inventory": 1.0,
+    "journal_log": 0.5,
+    "quests.completed": 0.5,
+    "npcs": 0.5,
+    "quests.rumors": 0.25,
+}
+
+# Sections whose leftover records are worth a one-line summary
+SUMMARIZED_SECTIONS = ("journal_log", "quests.completed")
+
+RELEVANCE_WEIGHT = 0.5
+
+# Share of the budget held back for one-line summaries of older history
+SUMMARY_SHARE = 0.15
+
+def to_compact_json(data):
+    """Serialize data as minified JSON."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+def estimate_tokens(data):
+    """
+    Estimate how many tokens a value costs once serialized as minified JSON.
+
+    Args:
+        data: Any JSON-serializable value
+
+    Returns:
+        int: Estimated token count
+    """
+    return len(to_compact_json(data)) // CHARS_PER_TOKEN + 1
+
+def _relevance_terms(data):
+    """Collect lowercase names that make a record relevant to the current story."""
+    terms = set()
+    for quest in get_path(data, "quests.active") or []:
+        if isinstance(quest, dict):
+            for field in ("title", "giver"):
+                if isinstance(quest.get(field), str) and len(quest[field]) > 2:
+                    terms.add(quest[field].lower())
+    return terms
+
+def _summarize(section, record):
+    """One-line summary of a record that did not fit in full."""
+    if not isinstance(record, dict):
+        return str(record)[:80]
+    if section == "journal_log":
+        return f"[{record.get('date', record.get('day', '?'))}] {record.get('title', 'Untitled entry')}"
+    return f"{record.get('title', 'Untitled quest')} (completed {record.get('completed_date', '?')})"
+
+@timed("build_budgeted_export")
+def build_budgeted_export(data, budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Select what to send to the AI within a token budget.
+
+    Args:
+        data: Journal data as a dictionary
+        budget: Target token budget for the whole payload
+
+    Returns:
+        tuple: (payload dict, report dict with budget, estimated_tokens,
+                included counts per section, summarized/dropped record ids and
+                omitted: {section: [keys]} of every record not sent in full)
+    """
+    cleaned = clean_journal_data(data)
+
+    # Required core: everything except the optional record sections
+    payload = {k: v for k, v in cleaned.items() if k not in ("inventory", "npcs", "journal_log")}
+    quests = cleaned.get("quests", {})
+    payload["quests"] = {k: v for k, v in quests.items() if k not in ("completed", "rumors")}
+    used = estimate_tokens(payload)
+
+    # Score every optional record by section priority, recency and relevance
+    terms = _relevance_terms(cleaned)
+    candidates = []
+    for section, weight in SECTION_WEIGHTS.items():
+        records = index_records(get_path(cleaned, section), RECORD_SECTIONS[section])
+        total = len(records)
+        for position, (key, record) in enumerate(records.items()):
+            text = to_compact_json(record)
+            lowered = text.lower()
+            hits = sum(1 for term in terms if term in lowered)
+            score = weight + (position + 1) / total + RELEVANCE_WEIGHT * min(hits, 3)
+            candidates.append((score, section, position, key, record, len(text) // CHARS_PER_TOKEN + 1))
+    candidates.sort(key=lambda c: c[0], reverse=True)
+
+    included = {section: set() for section in SECTION_WEIGHTS}
+    leftovers = []
+    full_budget = budget - int(budget * SUMMARY_SHARE)
+    for candidate in candidates:
+        score, section, position, key, record, cost = candidate
+        if used + cost <= full_budget:
+            included[section].add(position)
+            used += cost
+        else:
+            leftovers.append(candidate)
+
+    # Summaries for leftover history, newest and most relevant first
+    summaries = {}
+    summarized = []
+    dropped = []
+    omitted = {}
+    for score, section, position, key, record, cost in leftovers:
+        omitted.setdefault(section, []).append(key)
+        if section in SUMMARIZED_SECTIONS:
+            line = _summarize(section, record)
+            line_cost = len(line) // CHARS_PER_TOKEN + 2
+            if used + line_cost <= budget:
+                summaries.setdefault(section, []).append((position, line))
+                summarized.append(f"{section}: {key}")
+                used += line_cost
+                continue
+        dropped.append(f"{section}: {key}")
+
+    # Reassemble sections in their original order
+    for section in SECTION_WEIGHTS:
+        records = get_path(cleaned, section) or []
+        kept = [r for i, r in enumerate(records) if i in included[section]]
+        parent, _, child = section.partition(".")
+        if child:
+            payload[parent][child] = kept
+        elif kept:
+            payload[parent] = kept
+    if summaries:
+        payload["_summaries"] = {section: [line for _, line in sorted(lines)]
+                                 for section, lines in summaries.items()}
+
+    report = {
+        "budget": budget,
+        "estimated_tokens": estimate_tokens(payload),
+        "included": {section: len(positions) for section, positions in included.items()},
+        "summarized": summarized,
+        "dropped": dropped,
+        "omitted": omitted,
+    }
+    return payload, report
+
+def strip_export_keys(incoming):
+    """
+    Remove the keys a budgeted export adds (EXPORT_ONLY_KEYS) from the AI's
+    reply, so they are not merged into the journal.
+
+    Args:
+        incoming: Journal returned by the AI; modified in place
+    """
+    for key in EXPORT_ONLY_KEYS:
+        incoming.pop(key, None)
+
+def restore_omitted(incoming, base, omitted):
+    """
+    Put the records a budgeted export left out back into the AI's reply, so
+    a three-way merge does not read their absence as the AI removing them.
+
+    Args:
+        incoming: Journal returned by the AI; modified in place
+        base: Sync base (the full journal as it was exported)
+        omitted: {section: [record keys]} from the export report
+
+    Returns:
+        int: Number of records restored
+    """
+    restored = 0
+    for section, keys in omitted.items():
+        key_func = RECORD_SECTIONS.get(section)
+        base_records = index_records(get_path(base, section), key_func) if key_func else {}
+        if not base_records:
+            continue
+        records = get_path(incoming, section)
+        if not isinstance(records, list):
+            records = []
+            parent, _, child = section.partition(".")
+            if child:
+                if not isinstance(incoming.get(parent), dict):
+                    incoming[parent] = {}
+                incoming[parent][child] = records
+            else:
+                incoming[parent] = records
+        present = index_records(records, key_func)
+        for key in keys:
+            if key in base_records and key not in present:
+                records.append(base_records[key])
+                restored += 1
+    return restored
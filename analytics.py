@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# analytics.py – Campaign statistics kept up to date as the journal changes
+# CampaignStats holds the aggregates behind the statistics dashboard:
+# - entries and words per session (journal entries grouped by date)
+# - quest start, completion and rumor dates, for time-to-complete and
+#   rumor-to-quest conversion
+# - level and currency history, sampled whenever they change
+# The store lives in logs/stats/<journal>.json. sync() is called after every
+# load and save: it checks each journal entry's id and content digest against
+# what it already counted, so only new or edited entries are re-counted, and
+# the dashboard reads the stored totals instead of walking journal_log. Given
+# the GUI's utils.JournalHashTree, sync() skips sections whose digest did not
+# change and only looks at entries whose record digest did.
+# Level and currency history only exist here (plus level_up milestones),
+# which is why the store is kept on disk. Entries moved to the archive stay
+# counted (see sync_journal).
+#   python3 analytics.py logs/my_character.json    # print the dashboard
+
+import os
+import sys
+import json
+import hashlib
+import datetime
+import statistics
+from metrics import timed
+from archive import has_archive, archived_ids, with_archived
+
+STATS_VERSION = 1
+
+# Copper pieces per coin, for currency totals in gold
+COIN_VALUES = {"pp": 1000, "gp": 100, "ep": 50, "sp": 10, "cp": 1}
+
+def entry_digest(entry):
+    """
+    Short digest of the text of a journal entry (title and content), to tell
+    whether it changed since it was counted.
+
+    Args:
+        entry: Journal entry dict
+
+    Returns:
+        str: Hex digest
+    """
+    text = f"{entry.get('title') or ''}\0{entry.get('content') or ''}"
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+def get_stats_path(journal_path):
+    """
+    Get the path of the statistics store for a journal. Stores live in a
+    stats/ folder next to the journal so they never show up in list_json_files().
+
+    Args:
+        journal_path: Path to the journal file
+
+    Returns:
+        str: Path to logs/stats/<journal name>
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(journal_path)), "stats",
+                        os.path.basename(journal_path))
+
+def _today():
+    return datetime.datetime.now().strftime("%Y-%m-%d")
+
+def _parse_date(value):
+    """Parse the date at the start of a date/timestamp string, or return None."""
+    try:
+        return datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+def _gold(currency):
+    if not isinstance(currency, dict):
+        return 0.0
+    copper = sum(COIN_VALUES.get(coin, 0) * amount for coin, amount in currency.items()
+                 if isinstance(amount, (int, float)))
+    return copper / COIN_VALUES["gp"]
+
+class CampaignStats:
+    """Aggregated campaign statistics for one journal, updated incrementally."""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: Store file (see get_stats_path), or None to keep it in memory only
+        """
+        self.path = path
+        # Session date -> [entries, words]
+        self.sessions = {}
+        # Entry id -> [session date, words, entry_digest()]; stores written
+        # before digests hold content lengths, which never match, so those
+        # entries are simply counted again once
+        self.entries = {}
+        # Quest id -> {"status", "title", "started", "completed", "heard"}
+        self.quests = {}
+        # [date, level] and [date, gold, currency] samples, oldest first
+        self.levels = []
+        self.currency = []
+        self.dirty = False
+        # JournalHashTree section digests and journal_log record digests as of
+        # the last sync(tree=...); not stored, so each session checks once
+        self._synced_sections = {}
+        self._synced_entries = {}
+
+    @classmethod
+    def load(cls, journal_path):
+        """
+        Load the statistics store of a journal; an empty store is returned if
+        there is none yet (the first sync() then counts the whole journal).
+
+        Args:
+            journal_path: Path to the journal file
+
+        Returns:
+            CampaignStats
+        """
+        stats = cls(get_stats_path(journal_path))
+        try:
+            with open(stats.path) as file:
+                stored = json.load(file)
+        except (OSError, ValueError):
+            return stats
+        if stored.get("version") != STATS_VERSION:
+            return stats
+        stats.sessions = stored.get("sessions", {})
+        stats.entries = stored.get("entries", {})
+        stats.quests = stored.get("quests", {})
+        stats.levels = stored.get("levels", [])
+        stats.currency = stored.get("currency", [])
+        return stats
+
+    def save(self):
+        """
+        Write the store if anything changed since it was loaded or saved.
+
+        Returns:
+            bool: True if the store on disk is up to date
+        """
+        if not self.dirty or not self.path:
+            return True
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + ".tmp"
+            text = json.dumps({"version": STATS_VERSION, "sessions": self.sessions, "entries": self.entries,
+                               "quests": self.quests, "levels": self.levels, "currency": self.currency},
+                              separators=(",", ":"))
+            with open(temp_path, "w") as file:
+                file.write(text)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not save statistics: {e}")
+            return False
+        self.dirty = False
+        return True
+
+    # --- Updates ---
+
+    def _count(self, date, entries, words):
+        session = self.sessions.setdefault(date, [0, 0])
+        session[0] += entries
+        session[1] += words
+        if session[0] <= 0:
+            del self.sessions[date]
+
+    def add_entry(self, entry):
+        """Count a new or changed journal entry."""
+        entry_id = entry.get("id")
+        if not entry_id:
+            return
+        content = str(entry.get("content") or "")
+        date = str(entry.get("date") or "undated")[:10]
+        digest = entry_digest(entry)
+        old = self.entries.get(entry_id)
+        if old is not None:
+            if old[0] == date and old[2] == digest:
+                return
+            self._count(old[0], -1, -old[1])
+        words = len(content.split()) + len(str(entry.get("title") or "").split())
+        self.entries[entry_id] = [date, words, digest]
+        self._count(date, 1, words)
+        self.dirty = True
+
+    def remove_entry(self, entry_id):
+        """Stop counting a journal entry that was deleted."""
+        old = self.entries.pop(entry_id, None)
+        if old is not None:
+            self._count(old[0], -1, -old[1])
+            self.dirty = True
+
+    def update_quest(self, quest, status):
+        """Record a quest's status and dates."""
+        if not quest.get("id"):
+            return
+        record = {"status": status, "title": quest.get("title", "Unnamed quest"),
+                  "started": quest.get("started") or None, "completed": quest.get("completed_date") or None,
+                  "heard": quest.get("heard_date") or None}
+        if self.quests.get(quest["id"]) != record:
+            self.quests[quest["id"]] = record
+            self.dirty = True
+
+    def update_character(self, character, date=None):
+        """Add level and currency samples if they changed since the last ones."""
+        date = date or _today()
+        level = character.get("level")
+        if isinstance(level, int) and (not self.levels or self.levels[-1][1] != level):
+            self.levels.append([date, level])
+            self.dirty = True
+        currency = character.get("currency")
+        if isinstance(currency, dict):
+            coins = {coin: amount for coin, amount in currency.items() if coin in COIN_VALUES}
+            if not self.currency or self.currency[-1][2] != coins:
+                sample = [date, round(_gold(coins), 2), coins]
+                if self.currency and self.currency[-1][0] == date:
+                    self.currency[-1] = sample  # One sample per day
+                else:
+                    self.currency.append(sample)
+                self.dirty = True
+
+    @timed("analytics.sync")
+    def sync(self, data, archived_ids=frozenset(), tree=None):
+        """
+        Bring the aggregates up to date with the journal. Entries are matched
+        by id and content digest, so only new, edited and deleted entries change
+        the totals; quests and the character are compared field by field.
+
+        Args:
+            data: Journal data as a dictionary
+            archived_ids: Ids of entries moved to the archive (see
+                          archive.archived_ids); they are still counted
+            tree: utils.JournalHashTree refreshed to data, if the caller keeps
+                  one; unchanged sections and entries are then skipped
+
+        Returns:
+            bool: True if any aggregate changed
+        """
+        was_dirty, self.dirty = self.dirty, False
+        if not self.levels:
+            # Seed the level history from the level_up milestones
+            for milestone in data.get("_meta", {}).get("milestones") or []:
+                if milestone.get("type") == "level_up" and isinstance(milestone.get("level"), int):
+                    self.levels.append([str(milestone.get("timestamp", ""))[:10] or _today(), milestone["level"]])
+
+        sections = tree.sections if tree is not None else {}
+        unchanged = {section for section, digest in sections.items()
+                     if self._synced_sections.get(section) == digest}
+
+        if "journal_log" not in unchanged:
+            # Entries whose record digest is the one last synced were counted then
+            digests = dict(tree.records.get("journal_log", [])) if tree is not None else {}
+            known = self._synced_entries
+            seen = set()
+            for entry in data.get("journal_log", []):
+                if isinstance(entry, dict) and entry.get("id"):
+                    entry_id = entry["id"]
+                    seen.add(entry_id)
+                    if entry_id in known and known[entry_id] == digests.get(entry_id) \
+                            and entry_id in self.entries:
+                        continue
+                    old = self.entries.get(entry_id)
+                    if old is None or old[0] != str(entry.get("date") or "undated")[:10] or \
+                            old[2] != entry_digest(entry):
+                        self.add_entry(entry)
+            if len(seen) != len(self.entries):
+                for entry_id in [entry_id for entry_id in self.entries
+                                 if entry_id not in seen and entry_id not in archived_ids]:
+                    self.remove_entry(entry_id)
+            self._synced_entries = digests
+
+        if not {"quests.active", "quests.completed", "quests.rumors"} <= unchanged:
+            quests = data.get("quests", {})
+            seen = set()
+            for status in ("active", "completed", "rumors"):
+                for quest in quests.get(status, []) if isinstance(quests, dict) else []:
+                    if isinstance(quest, dict) and quest.get("id"):
+                        seen.add(quest["id"])
+                        self.update_quest(quest, status)
+            for quest_id in [quest_id for quest_id in self.quests if quest_id not in seen]:
+                del self.quests[quest_id]
+                self.dirty = True
+
+        if "character" not in unchanged:
+            self.update_character(data.get("character", {}))
+        self._synced_sections = dict(sections)
+        changed = self.dirty
+        self.dirty = was_dirty or changed
+        return changed
+
+    def sync_journal(self, journal_path, data, tree=None):
+        """
+        sync() a journal whose old entries may be in the archive. Archived
+        entries stay counted; they are only read if this store has not
+        counted them yet (e.g. it was created after they were archived).
+
+        Args:
+            journal_path: Path to the journal file
+            data: Journal data as a dictionary
+            tree: utils.JournalHashTree refreshed to data, see sync()
+
+        Returns:
+            bool: True if any aggregate changed
+        """
+        if not has_archive(data):
+            return self.sync(data, tree=tree)
+        archived = archived_ids(journal_path)
+        if not archived.issubset(self.entries):
+            # The tree does not cover the archived entries read back in
+            return self.sync(with_archived(journal_path, data), archived)
+        return self.sync(data, archived, tree)
+
+    # --- Reports ---
+
+    def dashboard(self):
+        """
+        Summarize the aggregates for display.
+
+        Returns:
+            dict: "totals", "sessions" (date, entries, words; newest first),
+                  "quest_times" (title, days; newest first), "quest_days"
+                  (average/median/shortest/longest or None), "conversion",
+                  "levels" and "currency"
+        """
+        entries = sum(count for count, _ in self.sessions.values())
+        words = sum(words for _, words in self.sessions.values())
+        dated = [date for date in self.sessions if date != "undated"]
+
+        quest_times = []
+        for quest in self.quests.values():
+            started, completed = _parse_date(quest["started"]), _parse_date(quest["completed"])
+            if quest["status"] == "completed" and started and completed and completed >= started:
+                quest_times.append((quest["completed"][:10], quest["title"], (completed - started).days))
+        quest_times.sort(reverse=True)
+        days = [d for _, _, d in quest_times]
+
+        counts = {"active": 0, "completed": 0, "rumors": 0}
+        converted = 0
+        for quest in self.quests.values():
+            counts[quest["status"]] = counts.get(quest["status"], 0) + 1
+            if quest["status"] != "rumors" and quest["heard"]:
+                converted += 1
+        heard = converted + counts["rumors"]
+
+        return {
+            "totals": {"sessions": len(self.sessions), "entries": entries, "words": words,
+                       "words_per_session": words / len(self.sessions) if self.sessions else 0,
+                       "first_session": min(dated) if dated else None,
+                       "last_session": max(dated) if dated else None, **counts},
+            "sessions": sorted(((date, count, words) for date, (count, words) in self.sessions.items()),
+                               reverse=True),
+            "quest_times": [(title, d) for _, title, d in quest_times],
+            "quest_days": {"average": statistics.mean(days), "median": statistics.median(days),
+                           "shortest": min(days), "longest": max(days)} if days else None,
+            "conversion": {"rumors_heard": heard, "followed": converted,
+                           "rate": converted / heard if heard else None},
+            "levels": [tuple(sample) for sample in self.levels],
+            "currency": [(date, gold) for date, gold, _ in self.currency],
+        }
+
+def format_dashboard(report, sessions=10):
+    """
+    Render a dashboard() report as text.
+
+    Args:
+        report: Result of CampaignStats.dashboard()
+        sessions: Number of most recent sessions to list
+
+    Returns:
+        str: Multi-line report
+    """
+    totals = report["totals"]
+    lines = [f"Sessions: {totals['sessions']}  Entries: {totals['entries']}  Words: {totals['words']:,}"
+             f"  (avg {totals['words_per_session']:.0f} words/session)"]
+    if totals["first_session"]:
+        lines.append(f"Played from {totals['first_session']} to {totals['last_session']}")
+    lines.append(f"Quests: {totals['active']} active, {totals['completed']} completed, {totals['rumors']} rumors")
+    conversion = report["conversion"]
+    if conversion["rate"] is not None:
+        lines.append(f"Rumors followed up: {conversion['followed']} of {conversion['rumors_heard']} "
+                     f"({conversion['rate']:.0%})")
+    if report["quest_days"]:
+        q = report["quest_days"]
+        lines.append(f"Days to complete a quest: avg {q['average']:.1f}, median {q['median']:g}, "
+                     f"{q['shortest']}-{q['longest']}")
+    if report["levels"]:
+        lines.append("Levels: " + ", ".join(f"{level} ({date})" for date, level in report["levels"]))
+    if report["currency"]:
+        first, last = report["currency"][0], report["currency"][-1]
+        lines.append(f"Wealth: {last[1]:,.2f} gp ({last[1] - first[1]:+,.2f} gp since {first[0]})")
+    if report["sessions"]:
+        lines.append("")
+        lines.append("Recent sessions:")
+        for date, count, words in report["sessions"][:sessions]:
+            lines.append(f"  {date}  {count} entries  {words:,} words")
+    return "\n".join(lines)
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python3 analytics.py <journal file>")
+        return 1
+    from utils import load_journal
+    try:
+        data = load_journal(sys.argv[1])
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    stats = CampaignStats.load(sys.argv[1])
+    stats.sync_journal(sys.argv[1], data)
+    stats.save()
+    print(format_dashboard(stats.dashboard()))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
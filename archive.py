@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+# archive.py – Cold storage for old journal entries
+# Old journal entries are rarely read, but every load, clean and save of a
+# journal goes through all of them. archive_entries() moves the oldest entries
+# out of journal_log into gzipped chunk files under logs/archive/<journal>/
+# once the log holds more than the policy keeps in the journal:
+# - keep_last: the newest entries always stay
+# - keep_days: so do entries from the last keep_days days (0: by count only)
+# Entries are moved in batches of at least ARCHIVE_BATCH and at most
+# CHUNK_SIZE per chunk. Chunks are never changed once written and are named by
+# their content hash; index.json lists them in order with their entry count and
+# date range, and _meta.archive in the journal says how many entries it has.
+# Whatever needs the whole history (entry search, the campaign book, the
+# statistics) reads through with iter_entries()/with_archived(); chunks are
+# only opened when a reader gets to them and are cached once read. Exports for
+# the AI only send the journal itself, and deltas compare it with a sync base
+# stripped of archived entries (without_archived()).
+#   python3 archive.py logs/my_character.json          # archive what the policy allows
+#   python3 archive.py logs/my_character.json --list   # show the archive index
+
+import os
+import sys
+import gzip
+import json
+import hashlib
+import argparse
+import datetime
+from functools import lru_cache
+from locking import file_lock, JournalHandle, JournalChangedError
+from metrics import timed
+
+INDEX_VERSION = 1
+
+DEFAULT_ARCHIVE_POLICY = {
+    "keep_last": 1000,
+    "keep_days": 90,
+}
+
+# Entries per chunk file, and the fewest worth writing a new chunk for
+CHUNK_SIZE = 500
+ARCHIVE_BATCH = 250
+
+def get_archive_dir(journal_path):
+    """
+    Get the archive folder of a journal.
+
+    Args:
+        journal_path: Path to the journal file
+
+    Returns:
+        str: Path to logs/archive/<journal name>
+    """
+    name = os.path.splitext(os.path.basename(journal_path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(journal_path)), "archive", name)
+
+def _entry_date(entry):
+    try:
+        return datetime.date.fromisoformat(str(entry.get("date"))[:10])
+    except ValueError:
+        return None
+
+# --- Index ---
+
+def load_index(journal_path):
+    """
+    Load the archive index of a journal.
+
+    Args:
+        journal_path: Path to the journal file
+
+    Returns:
+        dict: {"version", "policy", "chunks": [{"file", "count", "first_date", "last_date"}]},
+              with no chunks if nothing was archived yet
+    """
+    index = {"version": INDEX_VERSION, "policy": dict(DEFAULT_ARCHIVE_POLICY), "chunks": []}
+    try:
+        with open(os.path.join(get_archive_dir(journal_path), "index.json")) as file:
+            stored = json.load(file)
+    except (OSError, ValueError):
+        return index
+    if isinstance(stored, dict) and stored.get("version") == INDEX_VERSION:
+        index["policy"].update(stored.get("policy") or {})
+        index["chunks"] = stored.get("chunks") or []
+    return index
+
+def _write_index(archive_dir, index):
+    path = os.path.join(archive_dir, "index.json")
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as file:
+        json.dump(index, file, indent=2)
+    os.replace(temp_path, path)
+
+def save_policy(journal_path, policy):
+    """
+    Store the archive policy of a journal.
+
+    Args:
+        journal_path: Path to the journal file
+        policy: Settings to store (keys of DEFAULT_ARCHIVE_POLICY)
+
+    Returns:
+        bool: True if saved successfully, False otherwise
+    """
+    archive_dir = get_archive_dir(journal_path)
+    try:
+        os.makedirs(archive_dir, exist_ok=True)
+        with file_lock(os.path.join(archive_dir, "index")):
+            index = load_index(journal_path)
+            index["policy"] = {key: int(policy.get(key, default)) for key, default in DEFAULT_ARCHIVE_POLICY.items()}
+            _write_index(archive_dir, index)
+        return True
+    except (OSError, TimeoutError, ValueError) as e:
+        print(f"Warning: Could not save the archive policy: {e}")
+        return False
+
+# --- Archiving ---
+
+def plan_archival(entries, policy, today=None):
+    """
+    Count the entries at the start of journal_log the policy lets go: they
+    are not among the newest keep_last and (if keep_days is set) not dated
+    within the last keep_days days. Undated entries only count by position.
+
+    Args:
+        entries: journal_log, oldest first
+        policy: Archive policy (see DEFAULT_ARCHIVE_POLICY)
+        today: Date to count keep_days from (default: today)
+
+    Returns:
+        int: Number of leading entries that can be archived
+    """
+    count = max(len(entries) - max(policy["keep_last"], 0), 0)
+    if policy["keep_days"] and count:
+        cutoff = (today or datetime.date.today()) - datetime.timedelta(days=policy["keep_days"])
+        for i in range(count):
+            date = _entry_date(entries[i]) if isinstance(entries[i], dict) else None
+            if date is not None and date >= cutoff:
+                return i
+    return count
+
+def _write_chunk(archive_dir, number, entries):
+    """Write one immutable chunk and return its index entry."""
+    content = json.dumps({"entries": entries}, separators=(",", ":")).encode("utf-8")
+    name = f"chunk-{number:05d}-{hashlib.blake2b(content, digest_size=6).hexdigest()}.json.gz"
+    path = os.path.join(archive_dir, name)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as file:
+        file.write(content)
+    os.replace(temp_path, path)
+    dates = sorted(str(entry.get("date"))[:10] for entry in entries
+                   if isinstance(entry, dict) and _entry_date(entry) is not None)
+    return {"file": name, "count": len(entries),
+            "first_date": dates[0] if dates else None, "last_date": dates[-1] if dates else None}
+
+@timed("archive.archive_entries")
+def archive_entries(journal_path, data, policy=None, force=False):
+    """
+    Move old entries from journal_log into the archive. The chunks and index
+    are written right away; the caller saves the journal. If that save never
+    happens the entries are in both places: readers yield the journal's copy,
+    and the next run only drops them from the journal instead of archiving
+    them again.
+
+    Args:
+        journal_path: Path to the journal file
+        data: Journal data; journal_log is replaced and _meta.archive updated
+        policy: Archive policy (default: the journal's stored policy)
+        force: Archive whatever the policy allows, even less than ARCHIVE_BATCH
+
+    Returns:
+        int: Number of entries archived
+    """
+    entries = data.get("journal_log")
+    if not isinstance(entries, list):
+        return 0
+    policy = policy or load_index(journal_path)["policy"]
+    count = plan_archival(entries, policy)
+    if count == 0 or (count < ARCHIVE_BATCH and not force):
+        return 0
+
+    archive_dir = get_archive_dir(journal_path)
+    os.makedirs(archive_dir, exist_ok=True)
+    with file_lock(os.path.join(archive_dir, "index")):
+        index = load_index(journal_path)
+        # Entries archived before but still in the journal (its save failed)
+        done = archived_ids(journal_path)
+        moving = [entry for entry in entries[:count]
+                  if not (isinstance(entry, dict) and entry.get("id") in done)]
+        for start in range(0, len(moving), CHUNK_SIZE):
+            index["chunks"].append(_write_chunk(archive_dir, len(index["chunks"]),
+                                                moving[start:start + CHUNK_SIZE]))
+        if moving:
+            _write_index(archive_dir, index)
+
+    data["journal_log"] = entries[count:]
+    data.setdefault("_meta", {})["archive"] = {
+        "entries": sum(chunk["count"] for chunk in index["chunks"]),
+        "chunks": len(index["chunks"]),
+        "archived_at": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    return count
+
+# --- Reading through ---
+
+@lru_cache(maxsize=64)
+def _load_chunk(path):
+    """Entries of a chunk; chunks never change, so they are cached by path."""
+    with gzip.open(path, "rb") as file:
+        return tuple(json.loads(file.read())["entries"])
+
+def iter_archived(journal_path, newest_first=False, since=None):
+    """
+    Yield archived entries, opening each chunk only when it is reached. An id
+    found in more than one chunk is only yielded the first time.
+
+    Args:
+        journal_path: Path to the journal file
+        newest_first: Start with the most recently archived chunk (entries
+                      within a chunk are then newest first as well)
+        since: Skip chunks whose entries are all dated before this "YYYY-MM-DD"
+
+    Yields:
+        dict: Archived entries (shared with the cache; do not modify)
+    """
+    archive_dir = get_archive_dir(journal_path)
+    chunks = load_index(journal_path)["chunks"]
+    seen = set()
+    for chunk in reversed(chunks) if newest_first else chunks:
+        if since and chunk.get("last_date") and chunk["last_date"] < since:
+            continue
+        try:
+            entries = _load_chunk(os.path.join(archive_dir, chunk["file"]))
+        except (OSError, ValueError, KeyError, EOFError) as e:
+            print(f"Warning: Could not read archived entries from {chunk['file']}: {e}")
+            continue
+        for entry in reversed(entries) if newest_first else entries:
+            entry_id = entry.get("id")
+            if entry_id:
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+            yield entry
+
+def has_archive(data):
+    """Check whether a journal has entries in the archive."""
+    return bool((data.get("_meta") or {}).get("archive", {}).get("entries"))
+
+def iter_entries(journal_path, data, newest_first=False):
+    """
+    Yield every journal entry, archived ones included. An entry that is both
+    archived and in the journal (e.g. after restoring an older backup) is
+    yielded once, from the journal.
+
+    Args:
+        journal_path: Path to the journal file, or None for the journal only
+        data: Journal data
+        newest_first: Yield the newest entries first
+
+    Yields:
+        dict: Journal entries
+    """
+    entries = [entry for entry in data.get("journal_log", []) if isinstance(entry, dict)]
+    if not journal_path or not has_archive(data):
+        yield from reversed(entries) if newest_first else entries
+        return
+    hot_ids = {entry.get("id") for entry in entries}
+    archived = (entry for entry in iter_archived(journal_path, newest_first)
+                if not entry.get("id") or entry.get("id") not in hot_ids)
+    if newest_first:
+        yield from reversed(entries)
+        yield from archived
+    else:
+        yield from archived
+        yield from entries
+
+def with_archived(journal_path, data):
+    """
+    Get the journal with its complete journal_log, for readers that need the
+    whole history (e.g. the campaign book).
+
+    Args:
+        journal_path: Path to the journal file
+        data: Journal data
+
+    Returns:
+        dict: data itself if nothing is archived, otherwise a shallow copy
+              with the archived entries put back in front
+    """
+    if not journal_path or not has_archive(data):
+        return data
+    return {**data, "journal_log": list(iter_entries(journal_path, data))}
+
+def without_archived(journal_path, data):
+    """
+    Get a journal without the entries that are archived, e.g. a sync base
+    exported before they were moved, so comparing it with the journal does
+    not read the archiving as deletions.
+
+    Args:
+        journal_path: Path to the journal file
+        data: Journal data
+
+    Returns:
+        dict: data itself if none of its entries are archived, otherwise a
+              shallow copy without them
+    """
+    entries = data.get("journal_log")
+    if not journal_path or not isinstance(entries, list):
+        return data
+    done = archived_ids(journal_path)
+    kept = [entry for entry in entries if not (isinstance(entry, dict) and entry.get("id") in done)]
+    return data if len(kept) == len(entries) else {**data, "journal_log": kept}
+
+def archived_ids(journal_path):
+    """
+    Get the ids of all archived entries (cached until the archive changes).
+
+    Args:
+        journal_path: Path to the journal file
+
+    Returns:
+        frozenset: Entry ids
+    """
+    index = load_index(journal_path)
+    return _archived_ids(get_archive_dir(journal_path), tuple(chunk["file"] for chunk in index["chunks"]))
+
+@lru_cache(maxsize=8)
+def _archived_ids(archive_dir, files):
+    ids = set()
+    for name in files:
+        try:
+            ids.update(entry.get("id") for entry in _load_chunk(os.path.join(archive_dir, name)))
+        except (OSError, ValueError, KeyError, EOFError):
+            continue
+    ids.discard(None)
+    return frozenset(ids)
+
+@timed("archive.search_entries")
+def search_entries(journal_path, data, text, include_archived=True, limit=200):
+    """
+    Find entries whose title, date or content contain a text, newest first.
+    The journal is searched first; archived chunks are only read if the
+    limit is not reached yet.
+
+    Args:
+        journal_path: Path to the journal file
+        data: Journal data
+        text: Text to look for (case-insensitive); empty matches every entry
+        include_archived: Also search the archive
+        limit: Most results to return, or None for all
+
+    Returns:
+        list: (entry, archived) pairs
+    """
+    needle = text.strip().lower()
+    hot_ids = {entry.get("id") for entry in data.get("journal_log", []) if isinstance(entry, dict)}
+    results = []
+    sources = [(iter_entries(None, data, newest_first=True), False)]
+    if include_archived and journal_path and has_archive(data):
+        sources.append((iter_archived(journal_path, newest_first=True), True))
+    for entries, archived in sources:
+        for entry in entries:
+            if archived and entry.get("id") in hot_ids:
+                continue
+            if not needle or needle in " ".join(str(entry.get(field) or "")
+                                                 for field in ("date", "title", "content")).lower():
+                results.append((entry, archived))
+                if limit and len(results) >= limit:
+                    return results
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old journal entries into the archive")
+    parser.add_argument("journal", help="journal file")
+    parser.add_argument("--list", action="store_true", help="show the archive index instead of archiving")
+    parser.add_argument("--keep-last", type=int, help="newest entries to keep in the journal (stored as the policy)")
+    parser.add_argument("--keep-days", type=int, help="keep entries from this many days (0: by count only)")
+    args = parser.parse_args()
+
+    index = load_index(args.journal)
+    if args.list:
+        for chunk in index["chunks"]:
+            print(f"{chunk['file']}  {chunk['count']:>5} entries  {chunk['first_date']} to {chunk['last_date']}")
+        print(f"{sum(chunk['count'] for chunk in index['chunks'])} archived entries in {len(index['chunks'])} chunk(s); "
+              f"policy: keep the last {index['policy']['keep_last']} entries and {index['policy']['keep_days']} days")
+        return 0
+
+    policy = dict(index["policy"])
+    if args.keep_last is not None:
+        policy["keep_last"] = args.keep_last
+    if args.keep_days is not None:
+        policy["keep_days"] = args.keep_days
+    if policy != index["policy"]:
+        save_policy(args.journal, policy)
+
+    handle = JournalHandle(args.journal, "archive")
+    try:
+        data = handle.load()
+        moved = archive_entries(args.journal, data, policy, force=True)
+        if moved and not handle.save(data):
+            print("Error: Could not save the journal")
+            return 1
+    except (OSError, ValueError, TimeoutError, JournalChangedError) as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        handle.close()
+    print(f"Archived {moved} entries; {len(data.get('journal_log', []))} remain in the journal")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,638 @@
+#!/usr/bin/env python3
+# backups.py – Journal backups and their retention
+# Backups are full copies of a journal in logs/backups/, named
+# backup_<YYYYmmdd_HHMMSS>_<journal>.json (with a -N suffix on the time when
+# several are taken in the same second). They are taken on request, before a
+# migration rewrites a journal, and automatically before imports and restores.
+# prune_backups() keeps the folder bounded. Per journal it keeps:
+# - the last keep_last backups
+# - the newest backup of each of the last `hourly` hours, `daily` days and
+#   `weekly` weeks that have backups (grandfather-father-son)
+# A backup identical to the next newer one of the same journal is dropped
+# first. Kept backups older than compress_after_days are gzipped
+# (backup_..._<journal>.json.gz), and if all kept backups together still exceed
+# max_bytes the oldest are removed (a journal's newest backup never is).
+# The policy is stored in logs/backups/retention.json. prune_in_background()
+# runs the job on a daemon thread so the GUI never waits for it, and a lock
+# file stops the GUI and CLI from pruning the same folder at the same time.
+# logs/backups/index.json catalogs every backup (journal, time, size, content
+# hash, character, level, entry and quest counts, a short summary and the
+# section digests of utils.JournalHashTree). A backup is parsed once, when it
+# is first cataloged (by the pruning job); listing, filtering and previewing
+# backups only read the catalog, and pruning finds duplicates by its hashes.
+#   python3 backups.py                 # prune logs/backups/ now
+#   python3 backups.py --dry-run       # list what would be removed or compressed
+#   python3 backups.py --list          # list the cataloged backups
+
+import os
+import re
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+import datetime
+import threading
+from metrics import timed
+from locking import file_lock
+from utils import build_summary, JournalHashTree
+
+DEFAULT_RETENTION = {
+    "keep_last": 10,
+    "hourly": 24,
+    "daily": 14,
+    "weekly": 8,
+    "max_bytes": 200 * 1024 * 1024,
+    "compress_after_days": 7,
+}
+
+CATALOG_VERSION = 1
+
+# Summary kept in the catalog for the restore preview
+CATALOG_SUMMARY_LIMITS = {"inventory": 5, "entries": 1, "notes": 1, "content": 120}
+
+BACKUP_NAME = re.compile(r"^backup_(\d{8}_\d{6})(?:-(\d+))?_(.+\.json)(\.gz)?$")
+TIME_FORMAT = "%Y%m%d_%H%M%S"
+
+# Temp files older than this are left over from an interrupted job
+STALE_TEMP_SECONDS = 3600
+
+def get_backup_dir(journal_path):
+    """
+    Get the backup folder of a journal.
+
+    Args:
+        journal_path: Path to the journal file
+
+    Returns:
+        str: Path to logs/backups/ next to the journal
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(journal_path)), "backups")
+
+def parse_backup_name(filename):
+    """
+    Split a backup file name into the time it was taken and the journal it is of.
+
+    Args:
+        filename: Backup file name or path
+
+    Returns:
+        tuple: (datetime, journal file name, compressed), or None if the name
+               is not a backup name
+    """
+    match = BACKUP_NAME.match(os.path.basename(filename))
+    if not match:
+        return None
+    try:
+        taken = datetime.datetime.strptime(match.group(1), TIME_FORMAT)
+    except ValueError:
+        return None
+    if match.group(2):
+        taken += datetime.timedelta(microseconds=int(match.group(2)))  # Same-second order
+    return taken, match.group(3), bool(match.group(4))
+
+def list_backups(backup_dir, journal_name=None):
+    """
+    List the backups in a folder, newest first.
+
+    Args:
+        backup_dir: Backup folder
+        journal_name: Only list backups of this journal file name
+
+    Returns:
+        list: {"path", "journal", "taken", "size", "compressed"} dicts
+    """
+    backups = []
+    try:
+        entries = list(os.scandir(backup_dir))
+    except OSError:
+        return backups
+    for entry in entries:
+        parsed = parse_backup_name(entry.name)
+        if parsed is None or (journal_name and parsed[1] != journal_name):
+            continue
+        try:
+            size = entry.stat().st_size
+        except OSError:
+            continue  # Removed meanwhile
+        backups.append({"path": entry.path, "journal": parsed[1], "taken": parsed[0],
+                        "size": size, "compressed": parsed[2]})
+    backups.sort(key=lambda backup: backup["taken"], reverse=True)
+    return backups
+
+def create_backup(journal_path, backup_dir=None, prune=True):
+    """
+    Copy a journal into its backup folder.
+
+    Args:
+        journal_path: Path to the journal file
+        backup_dir: Backup folder (default: logs/backups/ next to the journal)
+        prune: Apply the retention policy in the background afterwards
+
+    Returns:
+        str: Path to the backup
+
+    Raises:
+        OSError: If the journal could not be copied
+    """
+    backup_dir = backup_dir or get_backup_dir(journal_path)
+    os.makedirs(backup_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime(TIME_FORMAT)
+    name = os.path.basename(journal_path)
+    backup_path = os.path.join(backup_dir, f"backup_{timestamp}_{name}")
+    counter = 1
+    while os.path.exists(backup_path) or os.path.exists(backup_path + ".gz"):
+        backup_path = os.path.join(backup_dir, f"backup_{timestamp}-{counter}_{name}")
+        counter += 1
+    # Copy under a temp name so a concurrent prune never sees a partial backup
+    temp_path = backup_path + ".tmp"
+    shutil.copy2(journal_path, temp_path)
+    os.replace(temp_path, backup_path)
+    if prune:
+        prune_in_background(backup_dir)
+    return backup_path
+
+def read_backup_bytes(backup_path):
+    """Return the journal text of a backup, decompressing .json.gz backups."""
+    opener = gzip.open if backup_path.endswith(".gz") else open
+    with opener(backup_path, "rb") as file:
+        return file.read()
+
+def read_backup(backup_path):
+    """
+    Load the journal stored in a backup.
+
+    Args:
+        backup_path: Path to a .json or .json.gz backup
+
+    Returns:
+        dict: Journal data
+
+    Raises:
+        OSError: If the backup cannot be read
+        json.JSONDecodeError: If it does not contain valid JSON
+    """
+    return json.loads(read_backup_bytes(backup_path))
+
+def restore_backup(backup_path, journal_path):
+    """
+    Overwrite a journal with a backup, after backing up the journal itself.
+
+    Args:
+        backup_path: Path to the backup to restore
+        journal_path: Path to the journal to overwrite
+
+    Returns:
+        str: Path to the backup taken of the overwritten journal, or None if
+             the journal did not exist
+
+    Raises:
+        OSError: If the backup cannot be read or the journal written
+        TimeoutError: If the journal is locked by another program
+    """
+    content = read_backup_bytes(backup_path)
+    previous = None
+    if os.path.exists(journal_path):
+        previous = create_backup(journal_path, get_backup_dir(journal_path))
+    temp_path = journal_path + ".tmp"
+    with file_lock(journal_path):
+        with open(temp_path, "wb") as file:
+            file.write(content)
+        os.replace(temp_path, journal_path)
+    return previous
+
+# --- Retention ---
+
+def get_policy_path(backup_dir):
+    return os.path.join(backup_dir, "retention.json")
+
+def load_policy(backup_dir):
+    """
+    Load the retention policy of a backup folder.
+
+    Args:
+        backup_dir: Backup folder
+
+    Returns:
+        dict: DEFAULT_RETENTION updated with the stored settings
+    """
+    policy = dict(DEFAULT_RETENTION)
+    try:
+        with open(get_policy_path(backup_dir)) as file:
+            stored = json.load(file)
+    except (OSError, ValueError):
+        return policy
+    if isinstance(stored, dict):
+        policy.update({key: value for key, value in stored.items()
+                       if key in DEFAULT_RETENTION and isinstance(value, int) and value >= 0})
+    return policy
+
+def save_policy(policy, backup_dir):
+    """
+    Store the retention policy of a backup folder.
+
+    Args:
+        policy: Settings to store (keys of DEFAULT_RETENTION)
+        backup_dir: Backup folder
+
+    Returns:
+        bool: True if saved successfully, False otherwise
+    """
+    try:
+        os.makedirs(backup_dir, exist_ok=True)
+        with open(get_policy_path(backup_dir), "w") as file:
+            json.dump({key: policy.get(key, default) for key, default in DEFAULT_RETENTION.items()},
+                      file, indent=2)
+        return True
+    except OSError as e:
+        print(f"Warning: Could not save the retention policy: {e}")
+        return False
+
+def _content_hash(content):
+    """Hash of a backup's journal text, the same for its plain and gzipped forms."""
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+def _digest(backup, hashes):
+    digest = hashes.get(os.path.basename(backup["path"]))
+    return digest or _content_hash(read_backup_bytes(backup["path"]))
+
+def _duplicates(backups, hashes=None):
+    """
+    Backups of one journal (newest first) identical to the next newer one.
+    Hashes come from the catalog where it has them; otherwise only pairs
+    that can be equal (same size in the same form) are read and hashed.
+    """
+    hashes = hashes or {}
+    duplicates = []
+    newer, newer_digest = None, None
+    for backup in backups:
+        digest = None
+        if newer is not None and (backup["size"] == newer["size"] or backup["compressed"] != newer["compressed"]
+                                  or os.path.basename(backup["path"]) in hashes):
+            try:
+                newer_digest = newer_digest or _digest(newer, hashes)
+                digest = _digest(backup, hashes)
+            except OSError:
+                pass
+            if digest is not None and digest == newer_digest:
+                duplicates.append(backup)
+                continue
+        newer, newer_digest = backup, digest
+    return duplicates
+
+def plan_retention(backups, policy):
+    """
+    Pick the backups of one journal the keep_last and hourly/daily/weekly
+    rules keep. For each period, the newest backup of each of the last N
+    periods that have backups is kept.
+
+    Args:
+        backups: Backups of one journal, newest first (see list_backups)
+        policy: Retention policy (see DEFAULT_RETENTION)
+
+    Returns:
+        list: The backups to keep, newest first
+    """
+    keep = set(range(min(max(policy["keep_last"], 1), len(backups))))
+    periods = (
+        (policy["hourly"], lambda taken: (taken.date(), taken.hour)),
+        (policy["daily"], lambda taken: taken.date()),
+        (policy["weekly"], lambda taken: taken.isocalendar()[:2]),
+    )
+    for count, period in periods:
+        seen = set()
+        for i, backup in enumerate(backups):
+            if len(seen) >= count:
+                break
+            bucket = period(backup["taken"])
+            if bucket not in seen:
+                seen.add(bucket)
+                keep.add(i)
+    return [backup for i, backup in enumerate(backups) if i in keep]
+
+def _compress(backup):
+    """Gzip a backup in place and return its new entry."""
+    path = backup["path"] + ".gz"
+    temp_path = path + ".tmp"
+    with open(backup["path"], "rb") as source, gzip.open(temp_path, "wb") as target:
+        shutil.copyfileobj(source, target)
+    shutil.copystat(backup["path"], temp_path)
+    os.replace(temp_path, path)
+    os.remove(backup["path"])
+    return {**backup, "path": path, "size": os.path.getsize(path), "compressed": True}
+
+def _remove_stale_temp_files(backup_dir, now):
+    for entry in os.scandir(backup_dir):
+        if entry.name.endswith(".tmp") and entry.name.startswith("backup_"):
+            try:
+                if now - entry.stat().st_mtime > STALE_TEMP_SECONDS:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+@timed("backups.prune")
+def prune_backups(backup_dir, policy=None, dry_run=False):
+    """
+    Apply the retention policy to a backup folder: drop duplicate and expired
+    backups, gzip old ones and enforce the size limit.
+
+    Args:
+        backup_dir: Backup folder
+        policy: Retention policy (default: the folder's stored policy)
+        dry_run: Only report what would be done
+
+    Returns:
+        dict: "removed" and "compressed" backup paths, "kept" count, "bytes"
+              kept and "freed" bytes
+
+    Raises:
+        TimeoutError: If another program is pruning the folder
+    """
+    policy = policy or load_policy(backup_dir)
+    report = {"removed": [], "compressed": [], "kept": 0, "bytes": 0, "freed": 0}
+    if not os.path.isdir(backup_dir):
+        return report
+
+    with file_lock(os.path.join(backup_dir, "prune"), timeout=0):
+        # Index new backups first; the catalog's hashes make duplicates cheap to find
+        catalog = refresh_catalog(backup_dir, save=not dry_run)
+        hashes = {name: entry["hash"] for name, entry in catalog.items() if entry.get("hash")}
+        by_journal = {}
+        for backup in list_backups(backup_dir):
+            by_journal.setdefault(backup["journal"], []).append(backup)
+
+        removed, kept, renamed = [], [], {}
+        for backups in by_journal.values():
+            duplicates = {backup["path"] for backup in _duplicates(backups, hashes)}
+            unique = [backup for backup in backups if backup["path"] not in duplicates]
+            keep = plan_retention(unique, policy)
+            keep_paths = {backup["path"] for backup in keep}
+            removed.extend(backup for backup in backups if backup["path"] not in keep_paths)
+            kept.append(keep)
+
+        compress_before = datetime.datetime.now() - datetime.timedelta(days=policy["compress_after_days"])
+        for keep in kept:
+            for i, backup in enumerate(keep):
+                if backup["compressed"] or backup["taken"] >= compress_before:
+                    continue
+                report["compressed"].append(backup["path"])
+                if not dry_run:
+                    try:
+                        keep[i] = _compress(backup)
+                        renamed[os.path.basename(backup["path"])] = os.path.basename(keep[i]["path"])
+                    except OSError as e:
+                        print(f"Warning: Could not compress {os.path.basename(backup['path'])}: {e}")
+
+        # Size limit: drop the oldest backups, but never a journal's newest
+        total = sum(backup["size"] for keep in kept for backup in keep)
+        candidates = sorted((backup for keep in kept for backup in keep[1:]), key=lambda backup: backup["taken"])
+        report["kept"] = sum(len(keep) for keep in kept)
+        for backup in candidates:
+            if not policy["max_bytes"] or total <= policy["max_bytes"]:
+                break
+            removed.append(backup)
+            report["kept"] -= 1
+            total -= backup["size"]
+        report["bytes"] = total
+
+        for backup in removed:
+            report["removed"].append(backup["path"])
+            report["freed"] += backup["size"]
+            if not dry_run:
+                try:
+                    os.remove(backup["path"])
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Warning: Could not remove {os.path.basename(backup['path'])}: {e}")
+        if not dry_run:
+            _remove_stale_temp_files(backup_dir, datetime.datetime.now().timestamp())
+            refresh_catalog(backup_dir, renamed)
+    return report
+
+# --- Catalog ---
+
+def get_catalog_path(backup_dir):
+    return os.path.join(backup_dir, "index.json")
+
+def _catalog_entry(path, stat):
+    """Describe one backup for the catalog; the only time its file is parsed."""
+    parsed = parse_backup_name(path)
+    entry = {"journal": parsed[1], "taken": parsed[0].strftime("%Y-%m-%dT%H:%M:%S"),
+             "compressed": parsed[2], "size": stat.st_size, "mtime": stat.st_mtime}
+    try:
+        content = read_backup_bytes(path)
+        data = json.loads(content)
+        if not isinstance(data, dict):
+            raise ValueError("not a journal")
+    except (OSError, ValueError, EOFError) as e:
+        entry["error"] = str(e)
+        return entry
+    character = data.get("character") if isinstance(data.get("character"), dict) else {}
+    quests = data.get("quests") if isinstance(data.get("quests"), dict) else {}
+    entries = data.get("journal_log") if isinstance(data.get("journal_log"), list) else []
+    last = entries[-1] if entries and isinstance(entries[-1], dict) else {}
+    entry.update({
+        "hash": _content_hash(content),
+        "character": str(character.get("name") or ""),
+        "class": str(character.get("class") or ""),
+        "level": character.get("level") if isinstance(character.get("level"), int) else None,
+        "entries": len(entries),
+        "archived": ((data.get("_meta") or {}).get("archive") or {}).get("entries", 0),
+        "last_entry": str(last.get("date") or ""),
+        "quests": [len(quests.get(status) or []) for status in ("active", "completed", "rumors")],
+        "summary": build_summary(data, limits=CATALOG_SUMMARY_LIMITS)["text"],
+        "sections": JournalHashTree(data).summary()["sections"],
+    })
+    return entry
+
+def _read_catalog(backup_dir):
+    try:
+        with open(get_catalog_path(backup_dir)) as file:
+            stored = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(stored, dict) or stored.get("version") != CATALOG_VERSION:
+        return {}
+    return stored.get("backups", {})
+
+def refresh_catalog(backup_dir, renamed=None, save=True):
+    """
+    Bring the catalog of a backup folder up to date: index backups it does not
+    know yet (or whose file changed) and forget removed ones. Known backups
+    are not read again, so this costs one directory listing plus the parsing
+    of new backups.
+
+    Args:
+        backup_dir: Backup folder
+        renamed: {old file name: new file name} for backups that were moved
+                 (e.g. compressed), so they are not parsed again
+        save: Write the updated catalog to disk
+
+    Returns:
+        dict: File name -> catalog entry (see _catalog_entry)
+    """
+    catalog = _read_catalog(backup_dir)
+    renamed = renamed or {}
+    for old, new in renamed.items():
+        if old in catalog:
+            catalog[new] = {**catalog.pop(old), "compressed": new.endswith(".gz"), "size": None}
+
+    present, new_entries = {}, {}
+    try:
+        entries = list(os.scandir(backup_dir))
+    except OSError:
+        return {}
+    for file in entries:
+        if parse_backup_name(file.name) is None:
+            continue
+        try:
+            stat = file.stat()
+        except OSError:
+            continue
+        present[file.name] = stat
+        known = catalog.get(file.name)
+        if known is not None and known["size"] is None:
+            known.update(size=stat.st_size, mtime=stat.st_mtime)  # Moved, content unchanged
+        elif known is None or known["size"] != stat.st_size or known["mtime"] != stat.st_mtime:
+            new_entries[file.name] = _catalog_entry(file.path, stat)
+
+    changed = bool(new_entries or renamed) or any(name not in present for name in catalog)
+    catalog = {name: new_entries.get(name) or catalog[name] for name in present}
+    if changed and save:
+        path = get_catalog_path(backup_dir)
+        try:
+            with file_lock(path):
+                temp_path = path + ".tmp"
+                with open(temp_path, "w") as file:
+                    json.dump({"version": CATALOG_VERSION, "backups": catalog}, file, separators=(",", ":"))
+                os.replace(temp_path, path)
+        except (OSError, TimeoutError) as e:
+            print(f"Warning: Could not save the backup catalog: {e}")
+    return catalog
+
+def load_catalog(backup_dir, journal_name=None):
+    """
+    List the backups of a folder with their catalog details, newest first.
+
+    Args:
+        backup_dir: Backup folder
+        journal_name: Only list backups of this journal file name
+
+    Returns:
+        list: Catalog entries with their "path" and "name" added
+    """
+    catalog = refresh_catalog(backup_dir)
+    backups = [{**entry, "name": name, "path": os.path.join(backup_dir, name)}
+               for name, entry in catalog.items() if not journal_name or entry["journal"] == journal_name]
+    backups.sort(key=lambda entry: (entry["taken"], entry["name"]), reverse=True)
+    return backups
+
+def describe_backup(entry):
+    """
+    Describe a catalog entry for the restore preview.
+
+    Args:
+        entry: Entry from load_catalog()
+
+    Returns:
+        str: Multi-line description
+    """
+    lines = [f"{entry['journal']}, backed up {entry['taken'].replace('T', ' ')}",
+             f"{format_size(entry['size'])}{' (compressed)' if entry['compressed'] else ''}"]
+    if entry.get("error"):
+        lines.append(f"\nThis backup cannot be read: {entry['error']}")
+        return "\n".join(lines)
+    active, completed, rumors = entry["quests"]
+    archived = f" (+{entry['archived']} archived)" if entry.get("archived") else ""
+    lines.append(f"{entry['entries']} journal entries{archived}" +
+                 (f", the last from {entry['last_entry']}" if entry["last_entry"] else "") +
+                 f"; {active} active, {completed} completed quests, {rumors} rumors")
+    lines.append(f"Content hash: {entry['hash']}")
+    lines.append("")
+    lines.append(entry["summary"])
+    return "\n".join(lines)
+
+# One pruning thread per process; requests made while it runs are queued as one rerun
+_pruner = {"thread": None, "pending": None}
+_pruner_lock = threading.Lock()
+
+def _prune_worker(backup_dir, policy):
+    while True:
+        try:
+            prune_backups(backup_dir, policy)
+        except TimeoutError:
+            pass  # Another program is pruning the folder
+        except OSError as e:
+            print(f"Warning: Could not prune backups: {e}")
+        with _pruner_lock:
+            if _pruner["pending"] is None:
+                _pruner["thread"] = None
+                return
+            (backup_dir, policy), _pruner["pending"] = _pruner["pending"], None
+
+def prune_in_background(backup_dir, policy=None):
+    """
+    Run prune_backups() on a daemon thread. If a prune is already running, it
+    runs once more when done instead of starting a second thread.
+
+    Args:
+        backup_dir: Backup folder
+        policy: Retention policy (default: the folder's stored policy)
+
+    Returns:
+        threading.Thread: The pruning thread
+    """
+    with _pruner_lock:
+        if _pruner["thread"] is not None:
+            _pruner["pending"] = (backup_dir, policy)
+            return _pruner["thread"]
+        thread = threading.Thread(target=_prune_worker, args=(backup_dir, policy),
+                                  name="backup-prune", daemon=True)
+        _pruner["thread"] = thread
+    thread.start()
+    return thread
+
+def format_size(size):
+    """Format a byte count for display."""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the backup retention policy")
+    parser.add_argument("--backups", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "backups"),
+                        help="backup folder (default: logs/backups/)")
+    parser.add_argument("--dry-run", action="store_true", help="report without removing or compressing anything")
+    parser.add_argument("--list", nargs="?", const="", metavar="JOURNAL",
+                        help="list the cataloged backups (of one journal file name) instead of pruning")
+    args = parser.parse_args()
+
+    if args.list is not None:
+        for entry in load_catalog(args.backups, args.list or None):
+            details = f"level {entry['level']}, {entry['entries']} entries" if not entry.get("error") else "unreadable"
+            print(f"{entry['taken'].replace('T', ' ')}  {entry['journal']:<24} {format_size(entry['size']):>9}  "
+                  f"{entry.get('character', '')} ({details})")
+        return 0
+
+    try:
+        report = prune_backups(args.backups, dry_run=args.dry_run)
+    except TimeoutError:
+        print("Backups are being pruned by another program")
+        return 1
+    prefix = "Would remove" if args.dry_run else "Removed"
+    for path in report["removed"]:
+        print(f"{prefix} {os.path.basename(path)}")
+    prefix = "Would compress" if args.dry_run else "Compressed"
+    for path in report["compressed"]:
+        print(f"{prefix} {os.path.basename(path)}")
+    print(f"\n{report['kept']} backup(s) kept ({format_size(report['bytes'])}), "
+          f"{len(report['removed'])} removed ({format_size(report['freed'])} freed), "
+          f"{len(report['compressed'])} compressed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
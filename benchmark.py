@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# benchmark.py – Synthetic large-journal generator and benchmark suite
+# Builds reproducible journals shaped like journal_template.json at any scale
+# and times the hot paths in utils.py and the GUI refresh methods.
+# Results are written as JSON so runs can be compared over time:
+#   python3 benchmark.py                         # default scale, saves to logs/benchmarks/
+#   python3 benchmark.py --entries 1000 --repeat 3
+#   python3 benchmark.py --compare logs/benchmarks/benchmark_20250101_120000.json
+
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import datetime
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from utils import load_journal, save_journal, clean_journal_data, print_summary, build_summary, list_json_files
+from journal_diff import diff_journals
+from models import JournalModel
+
+WORDS = ("ghoul mine tavern sword shadow ancient ruin merchant oath blood river keep "
+         "dragon whisper lantern crypt bandit road forest hunter relic storm coin").split()
+TAGS = ("combat", "social", "exploration", "loot", "lore", "travel", "rest", "mystery")
+LOCATIONS = ("Millbrook", "Greywater", "The Old Mine", "Ravenhold", "Duskwood", "Saltmarsh")
+
+def _sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def _date(rng):
+    day = datetime.date(2025, 1, 1) + datetime.timedelta(days=rng.randrange(730))
+    return day.strftime("%Y-%m-%d")
+
+def generate_journal(entries=10000, items=5000, quests=1000, npcs=500, seed=0):
+    """
+    Generate a synthetic journal shaped like journal_template.json.
+
+    Args:
+        entries: Number of journal_log entries
+        items: Number of inventory items
+        quests: Number of completed quests (each with a detailed_log); a tenth
+                as many active quests and a fifth as many rumors are added
+        npcs: Number of NPCs
+        seed: Random seed, so the same arguments always give the same journal
+
+    Returns:
+        dict: Journal data
+    """
+    rng = random.Random(seed)
+
+    def quest(i):
+        return {
+            "title": f"Quest {i}: The {rng.choice(WORDS).title()} of {rng.choice(LOCATIONS)}",
+            "description": _sentence(rng, 25),
+            "giver": f"NPC {rng.randrange(max(npcs, 1))}",
+            "started": _date(rng),
+        }
+
+    completed = []
+    for i in range(quests):
+        record = quest(i)
+        record["completed_date"] = _date(rng)
+        record["detailed_log"] = {
+            "setting": _sentence(rng, 20),
+            "trigger": _sentence(rng, 15),
+            "player_choices": [_sentence(rng) for _ in range(rng.randint(2, 8))],
+            "enemy": rng.choice(WORDS).title(),
+            "combat_notes": [_sentence(rng) for _ in range(rng.randint(0, 12))],
+            "aftermath": _sentence(rng, 20),
+            "character_notes": [_sentence(rng) for _ in range(rng.randint(0, 5))],
+            "why_it_matters": _sentence(rng, 15),
+            "tags": rng.sample(TAGS, 2),
+        }
+        completed.append(record)
+
+    active = []
+    for i in range(quests, quests + quests // 10):
+        record = quest(i)
+        record["milestones"] = [_sentence(rng, 6) for _ in range(rng.randint(0, 3))]
+        active.append(record)
+
+    rumors = [{
+        "title": f"Rumor {i}: {_sentence(rng, 4)}",
+        "description": _sentence(rng, 20),
+        "source": f"NPC {rng.randrange(max(npcs, 1))}",
+        "heard_date": _date(rng),
+        "credibility": rng.randint(0, 5),
+        "tags": rng.sample(TAGS, 2),
+    } for i in range(quests // 5)]
+
+    return {
+        "_meta": {"version": 1, "last_ai_sync": None, "milestones": []},
+        "character": {
+            "name": "Benchmark Hero",
+            "level": 12,
+            "class": "Fighter",
+            "hp": 104,
+            "hit_dice": "12d10",
+            "fighting_style": "Defense",
+            "features": [_sentence(rng, 5) for _ in range(20)],
+            "skills": ["Athletics", "Perception", "Survival"],
+            "saving_throws": ["Strength", "Constitution"],
+            "currency": {"gp": rng.randrange(10000), "sp": rng.randrange(1000), "cp": rng.randrange(1000)},
+        },
+        "inventory": [{
+            "name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} #{i}",
+            "quantity": rng.randint(1, 20),
+            "description": _sentence(rng, 10),
+            "tags": rng.sample(TAGS, 2),
+        } for i in range(items)],
+        "quests": {"completed": completed, "active": active, "rumors": rumors},
+        "npcs": [{
+            "name": f"NPC {i}",
+            "role": rng.choice(WORDS),
+            "location": rng.choice(LOCATIONS),
+            "relationship": rng.randint(-5, 5),
+            "notes": [_sentence(rng) for _ in range(rng.randint(0, 4))],
+            "quests_involved": [f"Quest {rng.randrange(max(quests, 1))}" for _ in range(rng.randint(0, 3))],
+        } for i in range(npcs)],
+        "mental_state": {
+            "notes": [_sentence(rng) for _ in range(10)],
+            "conditions": [], "bonds": [_sentence(rng, 6)], "flaws": [_sentence(rng, 6)],
+        },
+        "journal_log": [{
+            "date": _date(rng),
+            "title": f"Session {i}: {_sentence(rng, 4)}",
+            "content": " ".join(_sentence(rng, 15) for _ in range(rng.randint(1, 6))),
+            "tags": rng.sample(TAGS, 2),
+        } for i in range(entries)],
+    }
+
+# Registered benchmarks: name -> function(context) run once per repeat
+BENCHMARKS = {}
+
+def benchmark(name):
+    """Register a benchmark function under a name."""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+@benchmark("load_journal")
+def bench_load(ctx):
+    load_journal(ctx["journal_path"])
+
+@benchmark("save_journal")
+def bench_save(ctx):
+    save_journal(ctx["journal"], os.path.join(ctx["workdir"], "save_target.json"))
+
+@benchmark("clean_journal_data")
+def bench_clean(ctx):
+    clean_journal_data(ctx["journal"])
+
+@benchmark("print_summary")
+def bench_summary(ctx):
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        print_summary(ctx["journal"])
+
+@benchmark("build_summary_cached")
+def bench_summary_cached(ctx):
+    build_summary(ctx["journal"])
+
+@benchmark("list_json_files")
+def bench_list(ctx):
+    list_json_files(ctx["many_files_dir"])
+
+@benchmark("diff_journals")
+def bench_diff(ctx):
+    diff_journals(ctx["journal"], ctx["journal_copy"])
+
+@benchmark("models.from_dict")
+def bench_model_build(ctx):
+    JournalModel.from_dict(ctx["journal"])
+
+@benchmark("models.to_dict")
+def bench_model_dump(ctx):
+    ctx["model"].to_dict()
+
+def measure_memory(journal_path):
+    """
+    Compare the memory held by a loaded journal as plain dicts and as the
+    typed model from models.py.
+
+    Returns:
+        dict: Bytes allocated for each representation
+    """
+    tracemalloc.start()
+    try:
+        data = load_journal(journal_path)
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        model = JournalModel.from_dict(data)
+        del data
+        model_bytes = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del model
+    return {"dict_bytes": dict_bytes, "model_bytes": model_bytes}
+
+def _gui_benchmarks(ctx):
+    """Time GUI refresh paths on a hidden Tk root; skipped without a display."""
+    try:
+        import tkinter as tk
+        from gui import DnDJournalGUI
+        root = tk.Tk()
+    except Exception as e:
+        return {name: {"skipped": str(e)} for name in
+                ("gui.update_all_tabs", "gui.update_journal_entries",
+                 "gui.update_inventory_list", "gui.update_quests_lists")}
+
+    root.withdraw()
+    try:
+        app = DnDJournalGUI(root)
+        app.journal_data = ctx["journal"]
+        results = {}
+        for name in ("update_all_tabs", "update_journal_entries", "update_inventory_list", "update_quests_lists"):
+            method = getattr(app, name)
+
+            def run(_ctx, method=method):
+                with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                    method()
+                    root.update_idletasks()
+            results[f"gui.{name}"] = _time(run, ctx, ctx["repeat"])
+        return results
+    finally:
+        root.destroy()
+
+def _time(func, ctx, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(ctx)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "repeat": repeat,
+    }
+
+def run_benchmarks(scale, repeat=5, files=200, only=None, include_gui=True):
+    """
+    Generate a journal at the given scale and run the benchmark suite.
+
+    Args:
+        scale: Keyword arguments for generate_journal()
+        repeat: Number of timed runs per benchmark
+        files: Number of journal files for the list_json_files benchmark
+        only: Optional set of benchmark names to run
+        include_gui: Whether to attempt the headless GUI benchmarks
+
+    Returns:
+        dict: Run metadata and per-benchmark timings
+    """
+    workdir = tempfile.mkdtemp(prefix="dnd_journal_bench_")
+    try:
+        journal = generate_journal(**scale)
+        journal_path = os.path.join(workdir, "journal.json")
+        save_journal(journal, journal_path)
+
+        many_files_dir = os.path.join(workdir, "many")
+        os.makedirs(many_files_dir)
+        for i in range(files):
+            with open(os.path.join(many_files_dir, f"journal_{i}.json"), "w") as file:
+                file.write("{}")
+
+        journal_copy = load_journal(journal_path)
+        if journal_copy["journal_log"]:
+            journal_copy["journal_log"][-1]["content"] += " Edited."
+
+        ctx = {"journal": journal, "journal_copy": journal_copy, "journal_path": journal_path,
+               "workdir": workdir, "many_files_dir": many_files_dir, "repeat": repeat,
+               "model": JournalModel.from_dict(journal)}
+
+        results = {}
+        for name, func in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            results[name] = _time(func, ctx, repeat)
+            print(f"{name:32s} {results[name]['median_ms']:10.2f} ms (median of {repeat})")
+
+        if include_gui and (not only or any(name.startswith("gui.") for name in only)):
+            for name, result in _gui_benchmarks(ctx).items():
+                results[name] = result
+                if "skipped" in result:
+                    print(f"{name:32s} skipped ({result['skipped']})")
+                else:
+                    print(f"{name:32s} {result['median_ms']:10.2f} ms (median of {repeat})")
+
+        memory = measure_memory(journal_path)
+        print(f"{'memory (dicts / model)':32s} {memory['dict_bytes'] / 1e6:10.1f} MB / {memory['model_bytes'] / 1e6:.1f} MB")
+
+        return {
+            "timestamp": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale,
+            "journal_bytes": os.path.getsize(journal_path),
+            "memory": memory,
+            "results": results,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def compare_runs(previous, current):
+    """Print the median time ratio of each benchmark against a previous run."""
+    print("\n===== COMPARISON =====")
+    if previous.get("scale") != current.get("scale"):
+        print(f"Warning: scales differ ({previous.get('scale')} vs {current.get('scale')})")
+    for name, result in current["results"].items():
+        before = previous.get("results", {}).get(name, {})
+        if "median_ms" not in result or "median_ms" not in before:
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        print(f"{name:32s} {before['median_ms']:10.2f} -> {result['median_ms']:10.2f} ms  (x{ratio:.2f})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the D&D Solo Journal hot paths")
+    parser.add_argument("--entries", type=int, default=10000, help="journal_log entries")
+    parser.add_argument("--items", type=int, default=5000, help="inventory items")
+    parser.add_argument("--quests", type=int, default=1000, help="completed quests with detailed_log")
+    parser.add_argument("--npcs", type=int, default=500, help="NPCs")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the generator")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--files", type=int, default=200, help="files for the list_json_files benchmark")
+    parser.add_argument("--only", nargs="*", help="run only these benchmarks")
+    parser.add_argument("--no-gui", action="store_true", help="skip headless GUI benchmarks")
+    parser.add_argument("--output", help="results file (default: logs/benchmarks/benchmark_<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    scale = {"entries": args.entries, "items": args.items, "quests": args.quests,
+             "npcs": args.npcs, "seed": args.seed}
+    run = run_benchmarks(scale, args.repeat, args.files, set(args.only) if args.only else None,
+                         not args.no_gui)
+
+    output = args.output
+    if not output:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(script_dir, "logs", "benchmarks", f"benchmark_{stamp}.json")
+    if save_journal(run, output):
+        print(f"\nResults saved to {output}")
+
+    if args.compare:
+        try:
+            compare_runs(load_journal(args.compare), run)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# book.py – Campaign book export to Markdown or self-contained HTML
+# Renders the whole campaign in readable form: character and mental state,
+# every quest with its full detailed_log, rumors, NPCs, inventory and the
+# journal in date order (archived entries included), one chapter per month.
+# - chapters are rendered by generators and written piece by piece, so no
+#   chapter or book is ever held in memory as one string
+# - every chapter is hashed; rendered chapters are cached under
+#   logs/book/<journal>/<format>/ and only chapters whose content changed
+#   are rendered again, in parallel on a thread pool
+# - the book is assembled by streaming the cached chapter files in order
+#   python3 book.py logs/my_character.json my_campaign.html
+#   python3 book.py logs/my_character.json my_campaign.md
+
+import os
+import re
+import sys
+import json
+import html
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from metrics import timed
+from archive import with_archived
+
+# Bump when the rendering changes so cached chapters are rendered again
+RENDER_VERSION = 1
+
+DEFAULT_WORKERS = 4
+
+# detailed_log fields in reading order; other fields follow under their own name
+DETAILED_LOG_FIELDS = (
+    ("setting", "Setting"),
+    ("trigger", "Trigger"),
+    ("player_choices", "Player Choices"),
+    ("enemy", "Enemy"),
+    ("combat_notes", "Combat Notes"),
+    ("aftermath", "Aftermath"),
+    ("character_notes", "Character Notes"),
+    ("why_it_matters", "Why It Matters"),
+    ("simulations", "Encounter Simulations"),
+    ("tags", "Tags"),
+)
+
+HTML_STYLE = """body{font-family:Georgia,serif;max-width:46em;margin:2em auto;padding:0 1em;line-height:1.5;color:#222}
+h1,h2,h3,h4{font-family:Helvetica,Arial,sans-serif;color:#5a1e0e}h2{border-bottom:1px solid #c9b89a;margin-top:2.5em}
+dt{font-weight:bold}dd{margin:0 0 .5em 1.5em}nav li{list-style:none}.meta{color:#666;font-size:.9em}"""
+
+def get_book_cache_dir(journal_path):
+    """
+    Get the chapter cache directory for a journal.
+
+    Args:
+        journal_path: Path to the journal file
+
+    Returns:
+        str: Path to logs/book/<journal name>
+    """
+    name = os.path.splitext(os.path.basename(journal_path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(journal_path)), "book", name)
+
+def _label(key):
+    return str(key).replace("_", " ").title()
+
+class Markdown:
+    """Markdown building blocks; each returns a piece of text."""
+
+    extension = "md"
+
+    @staticmethod
+    def heading(text, level):
+        return f"{'#' * level} {text}\n\n"
+
+    @staticmethod
+    def paragraph(text):
+        return f"{text}\n\n" if str(text).strip() else ""
+
+    @staticmethod
+    def meta(text):
+        return f"*{text}*\n\n"
+
+    @staticmethod
+    def items(values):
+        return Markdown.list_start() + "".join(map(Markdown.item, values)) + Markdown.list_end() if values else ""
+
+    @staticmethod
+    def list_start():
+        return ""
+
+    @staticmethod
+    def item(value):
+        return f"- {value}\n"
+
+    @staticmethod
+    def list_end():
+        return "\n"
+
+    @staticmethod
+    def fields(pairs):
+        return "".join(f"- **{name}:** {value}\n" for name, value in pairs) + "\n" if pairs else ""
+
+    @staticmethod
+    def begin(title, chapters):
+        toc = "".join(f"- [{chapter_title}](#{key})\n" for key, chapter_title in chapters)
+        return f"# {title}\n\n{toc}\n"
+
+    @staticmethod
+    def chapter(key, title):
+        return f'<a id="{key}"></a>\n\n## {title}\n\n'
+
+    @staticmethod
+    def end():
+        return ""
+
+class Html:
+    """HTML building blocks; text is escaped and the page needs no other files."""
+
+    extension = "html"
+
+    @staticmethod
+    def heading(text, level):
+        return f"<h{level}>{html.escape(str(text))}</h{level}>\n"
+
+    @staticmethod
+    def paragraph(text):
+        blocks = [block.strip() for block in str(text).split("\n\n") if block.strip()]
+        return "".join(f"<p>{html.escape(block).replace(chr(10), '<br>')}</p>\n" for block in blocks)
+
+    @staticmethod
+    def meta(text):
+        return f'<p class="meta">{html.escape(str(text))}</p>\n'
+
+    @staticmethod
+    def items(values):
+        return Html.list_start() + "".join(map(Html.item, values)) + Html.list_end() if values else ""
+
+    @staticmethod
+    def list_start():
+        return "<ul>\n"
+
+    @staticmethod
+    def item(value):
+        return f"<li>{html.escape(str(value))}</li>\n"
+
+    @staticmethod
+    def list_end():
+        return "</ul>\n"
+
+    @staticmethod
+    def fields(pairs):
+        if not pairs:
+            return ""
+        return "<dl>\n" + "".join(f"<dt>{html.escape(str(name))}</dt><dd>{html.escape(str(value))}</dd>\n"
+                                  for name, value in pairs) + "</dl>\n"
+
+    @staticmethod
+    def begin(title, chapters):
+        toc = "".join(f'<li><a href="#{key}">{html.escape(chapter_title)}</a></li>\n'
+                      for key, chapter_title in chapters)
+        return (f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+                f"<title>{html.escape(title)}</title>\n<style>{HTML_STYLE}</style>\n</head>\n<body>\n"
+                f"<h1>{html.escape(title)}</h1>\n<nav><ul>\n{toc}</ul></nav>\n")
+
+    @staticmethod
+    def chapter(key, title):
+        return f'<h2 id="{key}">{html.escape(title)}</h2>\n'
+
+    @staticmethod
+    def end():
+        return "</body>\n</html>\n"
+
+FORMATS = {"md": Markdown, "html": Html}
+
+def _text(value):
+    """Render a field value as a line of text."""
+    if isinstance(value, dict):
+        return ", ".join(f"{_label(k)}: {_text(v)}" for k, v in value.items() if v not in (None, "", [], {}))
+    if isinstance(value, list):
+        return ", ".join(_text(v) for v in value)
+    return str(value)
+
+def _simulation_text(run):
+    if not isinstance(run, dict):
+        return str(run)
+    text = f"{run.get('date', '')}: vs {run.get('enemies', '?')} – won {run.get('win_rate', 0):.0%} of {run.get('trials', 0):,}"
+    if run.get("avg_hp_left") is not None:
+        text += f", avg {run['avg_hp_left']} HP left"
+    return text
+
+# --- Chapter renderers: generators of text pieces ---
+
+def render_character(fmt, content):
+    character, mental_state = content["character"], content["mental_state"]
+    basics = [(name, character[key]) for key, name in (("class", "Class"), ("level", "Level"), ("hp", "HP"),
+                                                       ("hit_dice", "Hit Dice"), ("fighting_style", "Fighting Style"))
+              if character.get(key) not in (None, "")]
+    currency = character.get("currency")
+    if isinstance(currency, dict):
+        basics.append(("Currency", " ".join(f"{amount} {coin}" for coin, amount in currency.items())))
+    yield fmt.fields(basics)
+    for key in ("features", "skills", "saving_throws"):
+        if character.get(key):
+            yield fmt.heading(_label(key), 3)
+            yield fmt.items([_text(value) for value in character[key]])
+    rest = [(_label(k), _text(v)) for k, v in character.items()
+            if k not in ("name", "class", "level", "hp", "hit_dice", "fighting_style", "currency",
+                         "features", "skills", "saving_throws") and v not in (None, "", [], {})]
+    yield fmt.fields(rest)
+    if isinstance(mental_state, dict):
+        for key, values in mental_state.items():
+            if values:
+                yield fmt.heading(_label(key), 3)
+                yield fmt.items([_text(v) for v in values]) if isinstance(values, list) else fmt.paragraph(values)
+
+def render_quests(fmt, content):
+    for quest in content:
+        if not isinstance(quest, dict):
+            yield fmt.paragraph(quest)
+            continue
+        yield fmt.heading(quest.get("title") or "Unnamed quest", 3)
+        dates = [f"{_label(key)}: {quest[key]}" for key in ("giver", "source", "started", "heard_date", "completed_date")
+                 if quest.get(key)]
+        if quest.get("credibility"):
+            dates.append(f"Credibility: {quest['credibility']}")
+        if dates:
+            yield fmt.meta(" · ".join(dates))
+        yield fmt.paragraph(quest.get("description", ""))
+        if quest.get("milestones"):
+            yield fmt.items([_text(m) for m in quest["milestones"]])
+        log = quest.get("detailed_log")
+        if isinstance(log, dict):
+            known = {key for key, _ in DETAILED_LOG_FIELDS}
+            for key, heading in DETAILED_LOG_FIELDS + tuple((k, _label(k)) for k in log if k not in known):
+                value = log.get(key)
+                if value in (None, "", [], {}):
+                    continue
+                yield fmt.heading(heading, 4)
+                if key == "simulations":
+                    yield fmt.items([_simulation_text(run) for run in value])
+                elif isinstance(value, list):
+                    yield fmt.items([_text(v) for v in value])
+                else:
+                    yield fmt.paragraph(_text(value))
+
+def render_npcs(fmt, content):
+    for npc in content:
+        if not isinstance(npc, dict):
+            yield fmt.paragraph(npc)
+            continue
+        yield fmt.heading(npc.get("name") or "Unnamed", 3)
+        yield fmt.fields([(_label(k), _text(v)) for k, v in npc.items()
+                          if k not in ("id", "name", "notes") and v not in (None, "", [], {})])
+        if npc.get("notes"):
+            yield fmt.items([_text(note) for note in npc["notes"]])
+
+def render_inventory(fmt, content):
+    # One piece per item, so a large inventory is never held as one string
+    if not content:
+        return
+    yield fmt.list_start()
+    for item in content:
+        if not isinstance(item, dict):
+            yield fmt.item(item)
+            continue
+        text = f"{item.get('name', 'Unnamed')} ×{item.get('quantity', 1)}"
+        if item.get("description"):
+            text += f" – {item['description']}"
+        if item.get("tags"):
+            text += f" [{', '.join(map(str, item['tags']))}]"
+        yield fmt.item(text)
+    yield fmt.list_end()
+
+def render_entries(fmt, content):
+    for entry in content:
+        if not isinstance(entry, dict):
+            yield fmt.paragraph(entry)
+            continue
+        yield fmt.heading(entry.get("title") or "Untitled entry", 3)
+        meta = entry.get("date") or ""
+        if entry.get("tags"):
+            meta += f"{' · ' if meta else ''}{', '.join(map(str, entry['tags']))}"
+        if meta:
+            yield fmt.meta(meta)
+        yield fmt.paragraph(entry.get("content", ""))
+
+def plan_chapters(data):
+    """
+    Split a journal into book chapters.
+
+    Returns:
+        list: (key, title, renderer, content) in book order; journal entries
+              are sorted by date and grouped into one chapter per month
+    """
+    quests = data.get("quests", {}) if isinstance(data.get("quests"), dict) else {}
+    chapters = [
+        ("character", data.get("character", {}).get("name") or "Character", render_character,
+         {"character": data.get("character", {}), "mental_state": data.get("mental_state", {})}),
+        ("quests-active", "Active Quests", render_quests, quests.get("active", [])),
+        ("quests-completed", "Completed Quests", render_quests, quests.get("completed", [])),
+        ("quests-rumors", "Rumors", render_quests, quests.get("rumors", [])),
+        ("npcs", "People Met", render_npcs, data.get("npcs", [])),
+        ("inventory", "Inventory", render_inventory, data.get("inventory", [])),
+    ]
+    chapters = [chapter for chapter in chapters if chapter[3]]
+
+    months = {}
+    entries = [e for e in data.get("journal_log", []) if isinstance(e, dict)]
+    for entry in sorted(entries, key=lambda e: str(e.get("date") or "")):
+        month = str(entry.get("date") or "")[:7] or "undated"
+        months.setdefault(month, []).append(entry)
+    used = set()
+    for month, month_entries in months.items():
+        title = "Journal – undated" if month == "undated" else f"Journal – {month}"
+        # Keys become file names and anchors, so they must stay distinct after
+        # cleaning (e.g. "2026/01" and "2026-01") and ignoring case
+        slug = re.sub(r'[^A-Za-z0-9-]+', '-', month)
+        if slug != month or slug.lower() in used:
+            slug += "-" + hashlib.sha1(month.encode("utf-8")).hexdigest()[:8]
+        used.add(slug.lower())
+        chapters.append((f"journal-{slug}", title, render_entries, month_entries))
+    return chapters
+
+def chapter_digest(key, title, content):
+    """Hash of everything a chapter is rendered from."""
+    text = json.dumps([RENDER_VERSION, key, title, content], sort_keys=True, default=str)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def _write_chapter(path, fmt, key, title, renderer, content):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(fmt.chapter(key, title))
+        file.writelines(renderer(fmt, content))
+    os.replace(temp_path, path)
+
+@timed("export_book")
+def export_book(data, output_path, journal_path=None, fmt=None, workers=DEFAULT_WORKERS):
+    """
+    Write the campaign book, rendering only the chapters that changed since
+    the last export of the same journal.
+
+    Args:
+        data: Journal data as a dictionary
+        output_path: Book file to write (.md or .html)
+        journal_path: Journal the data came from, for the chapter cache and
+                      its archived entries (default: a cache next to the output file)
+        fmt: "md" or "html" (default: from the output file's extension)
+        workers: Threads rendering chapters
+
+    Returns:
+        dict: {"chapters", "rendered", "reused", "bytes"}
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    fmt = fmt or os.path.splitext(output_path)[1].lstrip(".").lower()
+    if fmt == "markdown":
+        fmt = "md"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported book format '{fmt}' (use .md or .html)")
+    writer = FORMATS[fmt]
+    data = with_archived(journal_path, data)
+
+    cache_dir = os.path.join(get_book_cache_dir(journal_path or output_path), fmt)
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, "index.json")
+    try:
+        with open(index_path) as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        index = {}
+
+    chapters = plan_chapters(data)
+    digests = {key: chapter_digest(key, title, content) for key, title, _, content in chapters}
+    paths = {key: os.path.join(cache_dir, f"{key}.{writer.extension}") for key in digests}
+    stale = [chapter for chapter in chapters
+             if index.get(chapter[0]) != digests[chapter[0]] or not os.path.exists(paths[chapter[0]])]
+
+    if stale:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # list() re-raises the first rendering error, if any
+            list(executor.map(lambda c: _write_chapter(paths[c[0]], writer, *c), stale))
+    for key in set(index) - set(digests):
+        try:
+            os.remove(os.path.join(cache_dir, f"{key}.{writer.extension}"))
+        except OSError:
+            pass
+    with open(index_path, "w") as file:
+        json.dump(digests, file, indent=2)
+
+    title = f"{data.get('character', {}).get('name') or 'Campaign'} – Campaign Journal"
+    temp_path = output_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as book:
+        book.write(writer.begin(title, [(key, chapter_title) for key, chapter_title, _, _ in chapters]))
+        for key, _, _, _ in chapters:
+            with open(paths[key], encoding="utf-8") as chapter:
+                shutil.copyfileobj(chapter, book)
+        book.write(writer.end())
+    os.replace(temp_path, output_path)
+    return {"chapters": len(chapters), "rendered": [c[0] for c in stale],
+            "reused": len(chapters) - len(stale), "bytes": os.path.getsize(output_path)}
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python3 book.py <journal file> <book file (.md or .html)>")
+        return 1
+    from utils import load_journal
+    try:
+        data = load_journal(sys.argv[1])
+        report = export_book(data, sys.argv[2], sys.argv[1])
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Wrote {sys.argv[2]} ({report['bytes']:,} bytes): {report['chapters']} chapters, "
+          f"{len(report['rendered'])} rendered, {report['reused']} unchanged")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
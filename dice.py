@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+# dice.py – Dice expressions with outcome distributions
+# Parses expressions such as "1d10+2", "4d6kh3", "2d20kl1", "d20 adv",
+# "8d6 - 1d4 + 3" and computes the exact probability of every total:
+# - NdM sums add one die at a time with a running sum over the last M totals,
+#   about N*N*M/2 steps; every (N, M) result is memoized
+# - keep highest/lowest (kh/kl) is counted face by face instead of
+#   enumerating the M**N rolls
+# Every step is bounded by MAX_EXACT_WORK so the odds stay instant in the GUI.
+# Sums too large to count exactly (e.g. 1000d1000) are approximated by a
+# normal distribution with their exact mean and variance; keep pools too
+# large to count (e.g. 100d6kh50) use a normal distribution with the mean and
+# variance of a fixed-seed sample of rolls instead.
+# NumPy is used for the array arithmetic when it is installed; otherwise the
+# same algorithms run on plain lists.
+#   python3 dice.py "4d6kh3"            # print the distribution of an expression
+
+import re
+import sys
+import math
+import random
+import functools
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Limits that keep a single expression from taking minutes to evaluate
+MAX_DICE = 1000
+MAX_SIDES = 1000
+# Most array element operations one exact step may take (about 0.1 s either
+# way; NumPy does them in bulk)
+MAX_EXACT_WORK = 20_000_000 if np is not None else 250_000
+# Standard deviations of an approximated distribution that are kept
+NORMAL_SPAN = 7
+# Dice rolled (about 0.1 s) to estimate the moments of a keep pool too large
+# to count; rolling runs in plain Python either way
+KEEP_SAMPLE_DICE = 250_000
+
+_TERM = re.compile(r"""\s*([+-])?\s*(?:
+    (?P<count>\d*)d(?P<sides>\d+|%)\s*(?:(?P<keep>kh|kl|k)\s*(?P<kept>\d+)|(?P<adv>adv|dis))?
+    |(?P<flat>\d+)
+)\s*""", re.IGNORECASE | re.VERBOSE)
+
+def parse(expression):
+    """
+    Parse a dice expression into terms.
+
+    Args:
+        expression: e.g. "2d6+3", "4d6kh3", "d20 adv", "1d8 - 1"
+
+    Returns:
+        list: (sign, count, sides, kept, keep_highest) tuples; flat modifiers
+              have count 0 and sides equal to their value
+
+    Raises:
+        ValueError: If the expression is malformed or too large
+    """
+    text = str(expression or "").strip()
+    if not text:
+        raise ValueError("Empty dice expression")
+    terms = []
+    position = 0
+    while position < len(text):
+        match = _TERM.match(text, position)
+        if not match or match.end() == position or (terms and not match.group(1)):
+            raise ValueError(f"Cannot read dice expression at '{text[position:]}'")
+        position = match.end()
+        sign = -1 if match.group(1) == "-" else 1
+        if match.group("flat") is not None:
+            terms.append((sign, 0, int(match.group("flat")), 0, True))
+            continue
+
+        count = int(match.group("count") or 1)
+        sides = 100 if match.group("sides") == "%" else int(match.group("sides"))
+        if not 1 <= count <= MAX_DICE or not 1 <= sides <= MAX_SIDES:
+            raise ValueError(f"Dice must be between 1d1 and {MAX_DICE}d{MAX_SIDES}")
+        kept, keep_highest = count, True
+        if match.group("adv"):
+            # Advantage/disadvantage: roll the dice twice, keep the better/worse set
+            kept, keep_highest = count, match.group("adv").lower() == "adv"
+            count *= 2
+            if count > MAX_DICE:
+                raise ValueError(f"At most {MAX_DICE} dice can be rolled")
+            if kept > 1:
+                raise ValueError("Advantage applies to a single die, e.g. 'd20 adv'")
+        elif match.group("keep"):
+            kept = int(match.group("kept"))
+            keep_highest = match.group("keep").lower() != "kl"
+            if not 1 <= kept <= count:
+                raise ValueError(f"Cannot keep {kept} of {count} dice")
+        terms.append((sign, count, sides, kept, keep_highest))
+    return terms
+
+# Distributions are (lowest total, probabilities) with probabilities as a tuple,
+# so memoized results can be shared safely.
+
+def _array(values):
+    return np.array(values, dtype=float) if np is not None else list(values)
+
+def _zeros(length):
+    return np.zeros(length) if np is not None else [0.0] * length
+
+def _add_shifted(target, source, shift, weight):
+    """target[shift:] += weight * source"""
+    if np is not None:
+        target[shift:shift + len(source)] += weight * source
+    else:
+        for i, p in enumerate(source):
+            if p:
+                target[shift + i] += weight * p
+
+def _add_die(probs, sides):
+    """Distribution after adding one more die: each total is the mean of the last `sides`."""
+    length = len(probs) + sides - 1
+    if np is not None:
+        cumulative = np.concatenate(([0.0], np.cumsum(probs)))
+        ends = np.minimum(np.arange(1, length + 1), len(probs))
+        starts = np.maximum(np.arange(1, length + 1) - sides, 0)
+        return np.maximum((cumulative[ends] - cumulative[starts]) / sides, 0.0)
+    result = [0.0] * length
+    running = 0.0
+    for i in range(length):
+        if i < len(probs):
+            running += probs[i]
+        if i >= sides:
+            running -= probs[i - sides]
+        result[i] = max(running, 0.0) / sides
+    return result
+
+def _convolve(a, b):
+    if np is not None:
+        return np.convolve(a, b)
+    if len(a) < len(b):
+        a, b = b, a
+    result = [0.0] * (len(a) + len(b) - 1)
+    for j, q in enumerate(b):
+        if q:
+            for i, p in enumerate(a):
+                result[i + j] += p * q
+    return result
+
+def _frozen(offset, probabilities):
+    return offset, tuple(float(p) for p in probabilities)
+
+def sum_work(count, sides):
+    """Array element operations sum_distribution(count, sides) takes."""
+    return count * count * sides // 2
+
+@functools.lru_cache(maxsize=1024)
+def sum_distribution(count, sides):
+    """
+    Distribution of the sum of count dice with sides faces.
+
+    Returns:
+        tuple: (lowest total, probabilities of each total from the lowest up)
+    """
+    probs = _array([1.0 / sides] * sides)
+    for _ in range(count - 1):
+        probs = _add_die(probs, sides)
+    return _frozen(count, probs)
+
+def _log_comb(n, k):
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+def keep_work(count, sides, kept):
+    """Array element and binomial term operations keep_distribution() takes."""
+    return sides * kept * (kept * kept * sides // 2 + count)
+
+@functools.lru_cache(maxsize=1024)
+def keep_distribution(count, sides, kept, keep_highest=True):
+    """
+    Distribution of the sum of the kept highest (or lowest) dice of a pool.
+
+    Faces are visited from highest to lowest. For each face, any number of the
+    still unassigned dice can show it; the first `kept` dice assigned are the
+    kept ones. Once all kept dice are assigned, the rest only have to show
+    lower faces, so those cases collapse into one binomial tail per state.
+
+    Returns:
+        tuple: (lowest total, probabilities of each total from the lowest up)
+
+    Raises:
+        ValueError: If the pool is too large to count exactly
+    """
+    if kept >= count:
+        return sum_distribution(count, sides)
+    if not keep_highest:
+        # Lowest of faces v are the highest of faces sides + 1 - v, mirrored
+        low, probs = keep_distribution(count, sides, kept, True)
+        return _frozen(kept * (sides + 1) - (low + len(probs) - 1), reversed(probs))
+    if keep_work(count, sides, kept) > MAX_EXACT_WORK:
+        raise ValueError(f"Keeping {kept} of {count}d{sides} is too large to compute")
+
+    log_face = math.log(1.0 / sides)
+    width = kept * sides + 1
+    result = _zeros(width)
+    # states[n] = distribution of the kept sum with n dice assigned so far (n < kept)
+    start = _zeros(width)
+    start[0] = 1.0
+    states = {0: start}
+    for face in range(sides, 0, -1):
+        log_lower = math.log((face - 1) / sides) if face > 1 else None
+        new_states = {}
+        for assigned, sums in states.items():
+            remaining = count - assigned
+            needed = kept - assigned
+            # Fewer than `needed` dice show this face: still placing kept dice
+            if face > 1:
+                for shown in range(needed):
+                    weight = math.exp(_log_comb(remaining, shown) + shown * log_face)
+                    added = shown * face
+                    if assigned + shown not in new_states:
+                        new_states[assigned + shown] = _zeros(width)
+                    _add_shifted(new_states[assigned + shown], sums[:width - added], added, weight)
+            # At least `needed` dice show this face, the rest show lower faces
+            tail = 0.0
+            for shown in range(needed, remaining + 1):
+                rest = remaining - shown
+                if rest and log_lower is None:
+                    continue
+                tail += math.exp(_log_comb(remaining, shown) + shown * log_face
+                                 + (rest * log_lower if rest else 0.0))
+            if tail:
+                added = needed * face
+                _add_shifted(result, sums[:width - added], added, tail)
+        states = new_states
+    return _frozen(kept, list(result)[kept:])
+
+@functools.lru_cache(maxsize=256)
+def sampled_keep_moments(count, sides, kept, keep_highest=True):
+    """
+    Estimate the mean and variance of a keep pool too large to count by
+    rolling it, about KEEP_SAMPLE_DICE dice in all. The seed is fixed, so the
+    same pool always gets the same estimate.
+
+    Returns:
+        tuple: (mean, variance)
+    """
+    samples = max(100, KEEP_SAMPLE_DICE // count)
+    rng = random.Random(f"{count}d{sides}k{kept}")
+    faces = range(1, sides + 1)
+    totals = []
+    for _ in range(samples):
+        roll = sorted(rng.choices(faces, k=count), reverse=keep_highest)
+        totals.append(sum(roll[:kept]))
+    mean = sum(totals) / samples
+    variance = sum((total - mean) ** 2 for total in totals) / (samples - 1)
+    return mean, variance
+
+def _term_distribution(term):
+    sign, count, sides, kept, keep_highest = term
+    if count == 0:
+        low, probs = sides, (1.0,)
+    else:
+        low, probs = keep_distribution(count, sides, kept, keep_highest)
+    if sign < 0:
+        return -(low + len(probs) - 1), tuple(reversed(probs))
+    return low, probs
+
+def _term_moments(term):
+    """(lowest total, highest total, mean, variance) of a term."""
+    sign, count, sides, kept, keep_highest = term
+    if count == 0:
+        low, high, mean, variance = sides, sides, sides, 0.0
+    elif kept >= count:
+        low, high = count, count * sides
+        mean, variance = count * (sides + 1) / 2, count * (sides * sides - 1) / 12
+    elif keep_work(count, sides, kept) > MAX_EXACT_WORK:
+        low, high = kept, kept * sides
+        mean, variance = sampled_keep_moments(count, sides, kept, keep_highest)
+    else:
+        # Small enough to count; take the moments from the counts
+        low, probs = keep_distribution(count, sides, kept, keep_highest)
+        high = low + len(probs) - 1
+        mean = sum((low + i) * p for i, p in enumerate(probs))
+        variance = sum((low + i - mean) ** 2 * p for i, p in enumerate(probs))
+    if sign < 0:
+        return -high, -low, -mean, variance
+    return low, high, mean, variance
+
+def _normal(low, high, mean, variance):
+    """
+    Normal approximation of a sum of dice: the probability of each total
+    within NORMAL_SPAN standard deviations of the mean (and the range).
+
+    Returns:
+        tuple: (lowest total, probabilities of each total from the lowest up)
+    """
+    stdev = math.sqrt(variance)
+    if stdev == 0:
+        return round(mean), (1.0,)
+    first = max(low, math.floor(mean - NORMAL_SPAN * stdev))
+    last = min(high, math.ceil(mean + NORMAL_SPAN * stdev))
+    scale = stdev * math.sqrt(2)
+    edges = [math.erf((total - 0.5 - mean) / scale) for total in range(first, last + 2)]
+    probs = [(b - a) / 2 for a, b in zip(edges, edges[1:])]
+    norm = sum(probs)
+    return first, tuple(p / norm for p in probs)
+
+class Distribution:
+    """Probability of every total of a dice expression (exact unless approximate)."""
+
+    __slots__ = ("expression", "low", "probabilities", "approximate")
+
+    def __init__(self, expression, low, probabilities, approximate=False):
+        self.expression = expression
+        self.low = low
+        self.probabilities = probabilities
+        self.approximate = approximate
+
+    @property
+    def high(self):
+        return self.low + len(self.probabilities) - 1
+
+    @property
+    def mean(self):
+        return sum((self.low + i) * p for i, p in enumerate(self.probabilities))
+
+    @property
+    def stdev(self):
+        mean = self.mean
+        return math.sqrt(sum((self.low + i - mean) ** 2 * p for i, p in enumerate(self.probabilities)))
+
+    def probability(self, total):
+        """Probability of rolling exactly total."""
+        index = total - self.low
+        return self.probabilities[index] if 0 <= index < len(self.probabilities) else 0.0
+
+    def at_least(self, total):
+        """Probability of rolling total or more."""
+        start = max(total - self.low, 0)
+        return min(1.0, sum(self.probabilities[start:]))
+
+    def at_most(self, total):
+        """Probability of rolling total or less."""
+        end = total - self.low + 1
+        return min(1.0, sum(self.probabilities[:max(end, 0)]))
+
+    def items(self):
+        """(total, probability) pairs from the lowest total up."""
+        return [(self.low + i, p) for i, p in enumerate(self.probabilities)]
+
+    def clamped(self, minimum):
+        """Distribution with every total below minimum counted as minimum."""
+        if self.low >= minimum:
+            return self
+        if self.high <= minimum:
+            return Distribution(self.expression, minimum, (1.0,), self.approximate)
+        cut = minimum - self.low
+        head = sum(self.probabilities[:cut + 1])
+        return Distribution(self.expression, minimum, (head,) + self.probabilities[cut + 1:],
+                            self.approximate)
+
+@functools.lru_cache(maxsize=256)
+def distribution(expression):
+    """
+    Compute the distribution of a dice expression. It is exact unless counting
+    it exactly would take more than MAX_EXACT_WORK per step; then a normal
+    approximation is returned (Distribution.approximate is set).
+
+    Args:
+        expression: Dice expression, see parse()
+
+    Returns:
+        Distribution
+
+    Raises:
+        ValueError: If the expression is malformed
+    """
+    terms = parse(expression)
+    low, probs = 0, _array([1.0])
+    for term in terms:
+        sign, count, sides, kept, keep_highest = term
+        if count and (sum_work(count, sides) if kept >= count
+                      else keep_work(count, sides, kept)) > MAX_EXACT_WORK:
+            break
+        term_low, term_probs = _term_distribution(term)
+        if len(probs) * len(term_probs) > MAX_EXACT_WORK:
+            break
+        low += term_low
+        if len(term_probs) > 1:
+            probs = _convolve(probs, _array(term_probs))
+    else:
+        return Distribution(expression, low, tuple(float(p) for p in probs))
+
+    moments = [_term_moments(term) for term in terms]
+    low, probs = _normal(sum(m[0] for m in moments), sum(m[1] for m in moments),
+                         sum(m[2] for m in moments), sum(m[3] for m in moments))
+    return Distribution(expression, low, probs, approximate=True)
+
+def level_up_hp(hit_dice):
+    """
+    HP gained on a level-up from a character's hit dice string.
+
+    A level-up rolls one hit die plus any flat modifier in the expression
+    (e.g. "3d10+2" rolls 1d10+2), with a minimum gain of 1.
+
+    Args:
+        hit_dice: The character's hit dice, e.g. "1d10" or "5d8+1"
+
+    Returns:
+        tuple: (Distribution of the gain, fixed gain: die average rounded up + modifier)
+
+    Raises:
+        ValueError: If hit_dice contains no die
+    """
+    terms = parse(hit_dice)
+    dice = [term for term in terms if term[1] > 0]
+    if not dice:
+        raise ValueError(f"No hit die in '{hit_dice}'")
+    sides = dice[0][2]
+    modifier = sum(sign * value for sign, count, value, _, _ in terms if count == 0)
+    expression = f"1d{sides}{modifier:+d}" if modifier else f"1d{sides}"
+    return distribution(expression).clamped(1), max(1, sides // 2 + 1 + modifier)
+
+def describe(dist, targets=None):
+    """
+    Summarize a distribution in one line, e.g. for the character tab.
+
+    Args:
+        dist: Distribution
+        targets: Totals to show "X+" odds for (default: the quartiles)
+
+    Returns:
+        str: e.g. "2-12, avg 7.0 · 7+: 58% · 10+: 17%"
+    """
+    if targets is None:
+        targets = sorted({total for total in (round(dist.mean), round(dist.mean + dist.stdev))
+                          if dist.low < total <= dist.high})
+    odds = " · ".join(f"{total}+: {dist.at_least(total):.0%}" for total in targets)
+    text = f"{'≈ ' if dist.approximate else ''}{dist.low}-{dist.high}, avg {dist.mean:.1f}"
+    return f"{text} · {odds}" if odds else text
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    if not args:
+        print("Usage: python3 dice.py \"<expression>\"   e.g. \"4d6kh3\", \"d20 adv + 5\"")
+        return 1
+    try:
+        dist = distribution(" ".join(args))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"{dist.expression}: {describe(dist)} (stdev {dist.stdev:.2f})")
+    peak = max(dist.probabilities)
+    at_least = 1.0
+    for total, p in dist.items():
+        if p >= peak / 1000:
+            print(f"{total:>6} {p:8.3%} {min(max(at_least, 0.0), 1.0):8.2%}+  {'#' * round(40 * p / peak)}")
+        at_least -= p
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
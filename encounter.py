@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# encounter.py – Monte Carlo encounter simulator seeded from the character sheet
+# Answers "does my character survive this fight?" by simulating it many
+# times. The hero comes from the journal's character (hp, level, features,
+# fighting_style, optional ac/attack_bonus/damage fields); enemies are
+# described in a compact form:
+#   "goblin x3 hp7 ac15 +4 1d6+2; bugbear hp27 ac16 +4 2d8+2"
+# Trials are split into seeded batches run on a process pool; each batch is
+# simulated for all its trials at once with NumPy arrays when NumPy is
+# installed (one plain loop per trial otherwise) and returns histograms, so
+# merging results costs nothing. simulate() reports win rate, the HP left after
+# a win and the rounds a fight takes; attach_to_quest() stores the summary in
+# a quest's detailed_log.
+#   python3 encounter.py logs/my_character.json "ogre hp59 ac11 +6 2d8+4" --trials 100000
+
+import re
+import sys
+import random
+import argparse
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dice import parse as parse_dice
+from metrics import timed
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_TRIALS = 10000
+
+# Fights still going after this many rounds count as unresolved
+MAX_ROUNDS = 50
+
+# Trials per process pool task
+BATCH_SIZE = 5000
+
+# Defaults for character fields the journal does not track
+DEFAULT_AC = 15
+DEFAULT_ABILITY_MODIFIER = 3
+DEFAULT_WEAPON_DIE = "1d8"
+
+def _damage(expression):
+    """
+    Parse a damage expression into dice and a flat bonus.
+
+    Returns:
+        tuple: ([(count, sides, sign), ...], flat bonus)
+    """
+    dice, flat = [], 0
+    for sign, count, sides, kept, _ in parse_dice(expression):
+        if count == 0:
+            flat += sign * sides
+        elif kept != count:
+            raise ValueError(f"Keep highest/lowest is not supported in damage '{expression}'")
+        else:
+            dice.append((count, sides, sign))
+    return dice, flat
+
+def character_combatant(character):
+    """
+    Build the hero's combat stats from the journal's character.
+
+    Uses ac, attack_bonus, damage and attacks when the character has them;
+    otherwise they are derived from the level (proficiency bonus), features
+    (Extra Attack, Second Wind) and fighting_style (Archery, Defense, Dueling).
+
+    Args:
+        character: The journal's "character" section
+
+    Returns:
+        dict: {"name", "hp", "ac", "attack_bonus", "damage", "attacks", "second_wind", "level"}
+    """
+    level = character.get("level", 1) if isinstance(character.get("level"), int) else 1
+    features = " ".join(str(f) for f in character.get("features", [])).lower()
+    style = str(character.get("fighting_style", "")).lower()
+    proficiency = 2 + (max(level, 1) - 1) // 4
+
+    attack_bonus = character.get("attack_bonus", proficiency + DEFAULT_ABILITY_MODIFIER + (2 if "archery" in style else 0))
+    damage = character.get("damage", f"{DEFAULT_WEAPON_DIE}+{DEFAULT_ABILITY_MODIFIER + (2 if 'dueling' in style else 0)}")
+    attacks = character.get("attacks")
+    if not isinstance(attacks, int):
+        attacks = 1
+        if "extra attack" in features:
+            attacks = 4 if level >= 20 else 3 if level >= 11 else 2
+    hp = character.get("hp") if isinstance(character.get("hp"), int) and character.get("hp") > 0 else 10
+    return {
+        "name": character.get("name") or "Hero",
+        "hp": hp,
+        "ac": character.get("ac", DEFAULT_AC + (1 if "defense" in style else 0)),
+        "attack_bonus": attack_bonus,
+        "damage": damage,
+        "attacks": attacks,
+        "second_wind": "second wind" in features,
+        "level": level,
+    }
+
+_ENEMY_TOKEN = re.compile(r"^(?:x(?P<count>\d+)|hp(?P<hp>\d+)|ac(?P<ac>\d+)|(?P<attack>[+-]\d+)|"
+                          r"attacks?(?P<attacks>\d+)|(?P<damage>\d*d\d+(?:[+-]\d+)*))$", re.IGNORECASE)
+
+def parse_enemies(description):
+    """
+    Parse an enemy group description.
+
+    Each group is separated by ';' and lists a name followed by any of:
+    xN (count), hpN, acN, +N (attack bonus), a damage expression (1d6+2) and
+    attacksN, e.g. "goblin x3 hp7 ac15 +4 1d6+2; bugbear hp27 ac16 +4 2d8+2".
+
+    Returns:
+        list: One dict per enemy with name, hp, ac, attack_bonus, damage, attacks
+
+    Raises:
+        ValueError: If the description cannot be read
+    """
+    enemies = []
+    for group in str(description).split(";"):
+        words = group.split()
+        if not words:
+            continue
+        stats = {"name": [], "count": 1, "hp": 10, "ac": 12, "attack_bonus": 3, "damage": "1d6+1", "attacks": 1}
+        for position, word in enumerate(words):
+            match = _ENEMY_TOKEN.match(word)
+            if not match:
+                # Words before the first stat are the name
+                if len(stats["name"]) != position:
+                    raise ValueError(f"Cannot read '{word}' in '{group.strip()}'")
+                stats["name"].append(word)
+                continue
+            if match.group("count"):
+                stats["count"] = int(match.group("count"))
+            elif match.group("hp"):
+                stats["hp"] = int(match.group("hp"))
+            elif match.group("ac"):
+                stats["ac"] = int(match.group("ac"))
+            elif match.group("attack"):
+                stats["attack_bonus"] = int(match.group("attack"))
+            elif match.group("attacks"):
+                stats["attacks"] = int(match.group("attacks"))
+            else:
+                stats["damage"] = match.group("damage")
+        _damage(stats["damage"])  # Validate
+        name = " ".join(stats.pop("name")) or "enemy"
+        count = stats.pop("count")
+        if not 1 <= count <= 100 or stats["hp"] < 1:
+            raise ValueError(f"Invalid enemy group '{group.strip()}'")
+        enemies.extend({"name": name if count == 1 else f"{name} {i + 1}", **stats} for i in range(count))
+    if not enemies:
+        raise ValueError("No enemies described")
+    return enemies
+
+def _empty_result():
+    return {"trials": 0, "wins": 0, "losses": 0, "unresolved": 0, "hp_left": {}, "rounds": {}}
+
+def _count(histogram, values):
+    for value in values:
+        histogram[int(value)] = histogram.get(int(value), 0) + 1
+
+# --- Pure-Python simulation, one trial at a time ---
+
+def _roll(random_, damage, crit=False):
+    dice, flat = damage
+    total = flat
+    for count, sides, sign in dice:
+        for _ in range(count * (2 if crit else 1)):
+            total += sign * (int(random_() * sides) + 1)
+    return total if total > 0 else 0
+
+def _simulate_python(hero, enemies, trials, seed):
+    random_ = random.Random(seed).random  # int(random_() * 20) + 1 is a d20, several times faster than randint
+    result = _empty_result()
+    hero_damage = _damage(hero["damage"])
+    hero_max, hero_ac, hero_attacks, hero_bonus = hero["hp"], hero["ac"], hero["attacks"], hero["attack_bonus"]
+    # Per enemy: (ac, attack bonus, attacks, damage)
+    foes = [(e["ac"], e["attack_bonus"], e["attacks"], _damage(e["damage"])) for e in enemies]
+    for _ in range(trials):
+        hero_hp = hero_max
+        enemy_hp = [e["hp"] for e in enemies]
+        alive = len(enemy_hp)
+        target = 0
+        second_wind = hero["second_wind"]
+        # Initiative: the hero wins ties, as in the NumPy simulation
+        hero_first = int(random_() * 20) >= int(random_() * 20)
+        rounds = 0
+        while rounds < MAX_ROUNDS and hero_hp > 0 and alive:
+            rounds += 1
+            for hero_acts in ((True, False) if hero_first else (False, True)):
+                if hero_hp <= 0 or not alive:
+                    break
+                if hero_acts:
+                    if second_wind and hero_hp <= hero_max // 2:
+                        hero_hp = min(hero_max, hero_hp + int(random_() * 10) + 1 + hero["level"])
+                        second_wind = False
+                    for _ in range(hero_attacks):
+                        # Enemies are fought in order, so the target is the first one still standing
+                        roll = int(random_() * 20) + 1
+                        if roll == 20 or (roll != 1 and roll + hero_bonus >= foes[target][0]):
+                            enemy_hp[target] -= _roll(random_, hero_damage, roll == 20)
+                            if enemy_hp[target] <= 0:
+                                alive -= 1
+                                target += 1
+                                if not alive:
+                                    break
+                else:
+                    for _, bonus, attacks, damage in foes[target:]:
+                        for _ in range(attacks):
+                            roll = int(random_() * 20) + 1
+                            if roll == 20 or (roll != 1 and roll + bonus >= hero_ac):
+                                hero_hp -= _roll(random_, damage, roll == 20)
+        if hero_hp <= 0:
+            result["losses"] += 1
+        elif alive:
+            result["unresolved"] += 1
+        else:
+            result["wins"] += 1
+            _count(result["hp_left"], (hero_hp,))
+        _count(result["rounds"], (rounds,))
+    result["trials"] = trials
+    return result
+
+# --- NumPy simulation, all trials of a batch at once ---
+
+def _roll_array(rng, damage, crit):
+    dice, flat = damage
+    total = np.full(len(crit), flat, dtype=np.int64)
+    for count, sides, sign in dice:
+        rolls = rng.integers(1, sides + 1, size=(len(crit), 2 * count))
+        # Critical hits roll the dice twice
+        total += sign * (rolls[:, :count].sum(axis=1) + np.where(crit, rolls[:, count:].sum(axis=1), 0))
+    return np.maximum(total, 0)
+
+def _simulate_numpy(hero, enemies, trials, seed):
+    rng = np.random.default_rng(seed)
+    hero_damage = _damage(hero["damage"])
+    enemy_damage = [_damage(e["damage"]) for e in enemies]
+    enemy_ac = np.array([e["ac"] for e in enemies])
+    hero_hp = np.full(trials, hero["hp"], dtype=np.int64)
+    enemy_hp = np.tile(np.array([e["hp"] for e in enemies], dtype=np.int64), (trials, 1))
+    second_wind = np.full(trials, hero["second_wind"])
+    hero_first = rng.integers(1, 21, trials) >= rng.integers(1, 21, trials)
+    rounds = np.zeros(trials, dtype=np.int64)
+    rows = np.arange(trials)
+
+    def fighting():
+        return (hero_hp > 0) & (enemy_hp > 0).any(axis=1)
+
+    def hero_turn(acting):
+        nonlocal hero_hp
+        heal = acting & second_wind & (hero_hp <= hero["hp"] // 2)
+        hero_hp = np.where(heal, np.minimum(hero["hp"], hero_hp + rng.integers(1, 11, trials) + hero["level"]), hero_hp)
+        second_wind[heal] = False
+        for _ in range(hero["attacks"]):
+            alive = enemy_hp > 0
+            attacking = acting & alive.any(axis=1)
+            target = alive.argmax(axis=1)
+            roll = rng.integers(1, 21, trials)
+            hit = attacking & ((roll == 20) | ((roll != 1) & (roll + hero["attack_bonus"] >= enemy_ac[target])))
+            enemy_hp[rows, target] -= np.where(hit, _roll_array(rng, hero_damage, roll == 20), 0)
+
+    def enemies_turn(acting):
+        nonlocal hero_hp
+        for index, (enemy, damage) in enumerate(zip(enemies, enemy_damage)):
+            for _ in range(enemy["attacks"]):
+                roll = rng.integers(1, 21, trials)
+                hit = acting & (enemy_hp[:, index] > 0) & (hero_hp > 0) & \
+                      ((roll == 20) | ((roll != 1) & (roll + enemy["attack_bonus"] >= hero["ac"])))
+                hero_hp = hero_hp - np.where(hit, _roll_array(rng, damage, roll == 20), 0)
+
+    for _ in range(MAX_ROUNDS):
+        active = fighting()
+        if not active.any():
+            break
+        rounds += active
+        # Heroes who won initiative act first, then every enemy, then the heroes who lost it
+        hero_turn(active & hero_first)
+        enemies_turn(active & fighting())
+        hero_turn(active & ~hero_first & fighting())
+
+    won = (hero_hp > 0) & ~(enemy_hp > 0).any(axis=1)
+    lost = hero_hp <= 0
+    result = _empty_result()
+    result.update(trials=trials, wins=int(won.sum()), losses=int(lost.sum()),
+                  unresolved=int(trials - won.sum() - lost.sum()))
+    values, counts = np.unique(hero_hp[won], return_counts=True)
+    result["hp_left"] = {int(v): int(c) for v, c in zip(values, counts)}
+    values, counts = np.unique(rounds, return_counts=True)
+    result["rounds"] = {int(v): int(c) for v, c in zip(values, counts)}
+    return result
+
+def simulate_batch(hero, enemies, trials, seed):
+    """Simulate one batch of trials with a fixed seed and return histograms."""
+    if np is not None:
+        return _simulate_numpy(hero, enemies, trials, seed)
+    return _simulate_python(hero, enemies, trials, seed)
+
+def _percentile(histogram, fraction):
+    total = sum(histogram.values())
+    running = 0
+    for value in sorted(histogram):
+        running += histogram[value]
+        if running >= fraction * total:
+            return value
+    return None
+
+def _mean(histogram):
+    total = sum(histogram.values())
+    return sum(v * c for v, c in histogram.items()) / total if total else None
+
+@timed("simulate_encounter")
+def simulate(hero, enemies, trials=DEFAULT_TRIALS, seed=None, workers=None):
+    """
+    Simulate an encounter many times across a process pool.
+
+    Args:
+        hero: Combatant from character_combatant()
+        enemies: Enemies from parse_enemies()
+        trials: Number of fights to simulate
+        seed: Seed for reproducible results (random if omitted)
+        workers: Worker processes (default: one per CPU; 1 runs in this process)
+
+    Returns:
+        dict: trials, win_rate, loss_rate, unresolved, hp_left and rounds
+              histograms, and their averages and quartiles
+    """
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    batches = [min(BATCH_SIZE, trials - start) for start in range(0, trials, BATCH_SIZE)]
+    seeds = [seed + i for i in range(len(batches))]
+    if workers == 1 or len(batches) == 1:
+        results = [simulate_batch(hero, enemies, n, s) for n, s in zip(batches, seeds)]
+    else:
+        # spawn, not fork: the GUI process must not be forked with Tk running
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results = list(executor.map(simulate_batch, [hero] * len(batches), [enemies] * len(batches),
+                                        batches, seeds))
+
+    total = _empty_result()
+    for result in results:
+        for key in ("trials", "wins", "losses", "unresolved"):
+            total[key] += result[key]
+        for key in ("hp_left", "rounds"):
+            for value, count in result[key].items():
+                total[key][value] = total[key].get(value, 0) + count
+
+    return {
+        "trials": total["trials"],
+        "seed": seed,
+        "win_rate": total["wins"] / total["trials"] if total["trials"] else 0.0,
+        "loss_rate": total["losses"] / total["trials"] if total["trials"] else 0.0,
+        "unresolved": total["unresolved"],
+        "hp_left": dict(sorted(total["hp_left"].items())),
+        "avg_hp_left": _mean(total["hp_left"]),
+        "hp_left_quartiles": [_percentile(total["hp_left"], f) for f in (0.25, 0.5, 0.75)],
+        "rounds": dict(sorted(total["rounds"].items())),
+        "avg_rounds": _mean(total["rounds"]),
+        "rounds_quartiles": [_percentile(total["rounds"], f) for f in (0.25, 0.5, 0.75)],
+    }
+
+def describe_result(result, hero):
+    """Summarize a simulation result in a few lines of text."""
+    lines = [f"{hero['name']} wins {result['win_rate']:.1%} of {result['trials']:,} fights "
+             f"(loses {result['loss_rate']:.1%}"
+             + (f", {result['unresolved']:,} unresolved" if result["unresolved"] else "") + ")."]
+    if result["avg_hp_left"] is not None:
+        q1, median, q3 = result["hp_left_quartiles"]
+        lines.append(f"HP left after a win: avg {result['avg_hp_left']:.1f} of {hero['hp']} "
+                     f"(median {median}, middle half {q1}-{q3}).")
+    if result["avg_rounds"] is not None:
+        q1, median, q3 = result["rounds_quartiles"]
+        lines.append(f"Rounds: avg {result['avg_rounds']:.1f} (median {median}, middle half {q1}-{q3}).")
+    return "\n".join(lines)
+
+def attach_to_quest(quest, description, hero, result):
+    """
+    Record a simulation summary in a quest's detailed_log["simulations"].
+
+    Args:
+        quest: Quest dict
+        description: Enemy description that was simulated
+        hero: Combatant used
+        result: simulate() result
+
+    Returns:
+        dict: The stored summary
+    """
+    summary = {
+        "date": datetime.datetime.now().strftime("%Y-%m-%d"),
+        "enemies": description,
+        "hero": {k: hero[k] for k in ("hp", "ac", "attack_bonus", "damage", "attacks")},
+        "trials": result["trials"],
+        "win_rate": round(result["win_rate"], 4),
+        "avg_hp_left": round(result["avg_hp_left"], 1) if result["avg_hp_left"] is not None else None,
+        "avg_rounds": round(result["avg_rounds"], 1) if result["avg_rounds"] is not None else None,
+    }
+    log = quest.setdefault("detailed_log", {})
+    log.setdefault("simulations", []).append(summary)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate an encounter against the journal's character")
+    parser.add_argument("journal", help="journal file with the character")
+    parser.add_argument("enemies", help='e.g. "goblin x3 hp7 ac15 +4 1d6+2; bugbear hp27 ac16 +4 2d8+2"')
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS, help=f"fights to simulate (default: {DEFAULT_TRIALS})")
+    parser.add_argument("--seed", type=int, help="seed for reproducible results")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    from utils import load_journal
+    try:
+        character = load_journal(args.journal).get("character", {})
+        hero = character_combatant(character)
+        enemies = parse_enemies(args.enemies)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"{hero['name']}: HP {hero['hp']}, AC {hero['ac']}, {hero['attacks']} x {hero['damage']} at "
+          f"{hero['attack_bonus']:+d}{', Second Wind' if hero['second_wind'] else ''}")
+    print(f"vs {', '.join(e['name'] for e in enemies)}\n")
+    result = simulate(hero, enemies, args.trials, args.seed, args.workers)
+    print(describe_result(result, hero))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,29 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog, scrolledtext
-from utils import load_journal, save_journal, add_journal_entry, update_section, print_summary, list_json_files, clean_journal_data
+from tkinter import ttk, messagebox, filedialog, scrolledtext, simpledialog
+from utils import load_journal, save_journal, add_journal_entry, update_section, build_summary, list_json_files, clean_journal_data, save_sync_base, load_sync_base, load_sync_digests, load_sync_omitted, JournalHashTree
+from journal_diff import diff_journals, apply_changes, iter_hunks, count_changes, describe_hunk, merge_journals, describe_conflict, make_delta, apply_delta, assign_record_ids
+from ai_export import build_budgeted_export, restore_omitted, strip_export_keys, DEFAULT_TOKEN_BUDGET
+from snapshots import record_milestone, load_snapshot, compare_snapshots
+from profiling import SessionProfiler, install_tk_profiler, DEFAULT_THRESHOLD_MS
+from metrics import timed, enable as enable_metrics, is_enabled as metrics_enabled, load_metrics, summarize_metrics
+from models import JournalModel, MISSING
+from inventory import Inventory
+from quests import QuestLog
+from migrations import migrate_journal, backup_before_migration
+from backups import (create_backup as backup_journal, restore_backup as restore_from_backup, read_backup,
+                     parse_backup_name, get_backup_dir, list_backups, load_policy, save_policy,
+                     prune_in_background, format_size, load_catalog, describe_backup, DEFAULT_RETENTION)
+from archive import archive_entries, search_entries, without_archived, load_index as load_archive_index, save_policy as save_archive_policy
+from dice import distribution as dice_distribution, level_up_hp, describe as describe_dice
+from analytics import CampaignStats, get_stats_path
+from book import export_book
+from encounter import character_combatant, parse_enemies, simulate, describe_result as describe_encounter, attach_to_quest, DEFAULT_TRIALS
+from locking import JournalHandle, JournalChangedError, other_holders, describe_holders, LEASE_SECONDS
 import os
 import json
-import shutil
-import datetime
+import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
 class DnDJournalGUI:
@@ -16,6 +35,22 @@ class DnDJournalGUI:
         # Journal data and path
         self.journal_data = None
         self.current_journal_path = None
+        # Lock/lease handle for current_journal_path, see save_current_journal()
+        self.journal_handle = None
+        # Typed view of journal_data used by the list renderers
+        self.model = None
+        # Name-indexed inventory store, see get_inventory()
+        self.inventory = None
+        # Id-keyed quest index, see get_quest_log()
+        self.quest_log = None
+        # Quest id -> (content digest, hidden detail window), oldest first
+        self.quest_log_windows = OrderedDict()
+        # Campaign statistics of the current journal, see record_stats()
+        self.stats = None
+        self.stats_stale = True
+        # Hash tree of journal_data and its section digests as last loaded/saved, see mark_saved()
+        self.hash_tree = None
+        self.saved_digests = None
         
         # Status bars
         status_frame = ttk.Frame(self.root)
@@ -51,11 +86,16 @@ class DnDJournalGUI:
         self.create_inventory_tab()
         self.create_quests_tab()
         self.create_character_tab()
+        self.create_stats_tab()
         self.create_settings_tab()
         
         # Start with welcome tab
         self.notebook.select(0)
         
+        # Release the journal lease on exit and keep it fresh while open
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(LEASE_SECONDS * 1000 // 3, self.renew_lease)
+        
     def create_welcome_tab(self):
         """Create the welcome/selection tab"""
         tab = ttk.Frame(self.notebook)
@@ -113,6 +153,7 @@ class DnDJournalGUI:
         
         self.recent_entries = scrolledtext.ScrolledText(entries_frame, state=tk.DISABLED)
         self.recent_entries.pack(fill=tk.BOTH, expand=True)
+        ttk.Button(entries_frame, text="Search All Entries", command=self.search_all_entries).pack(anchor=tk.E, pady=(5, 0))
         
     def create_inventory_tab(self):
         """Create the inventory management tab"""
@@ -179,7 +220,27 @@ class DnDJournalGUI:
         ttk.Button(button_frame, text="Add Quest", command=self.add_quest).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Complete Quest", command=self.complete_quest).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Add Rumor", command=self.add_rumor).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Follow Rumor", command=self.accept_rumor).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Simulate Encounter", command=self.simulate_encounter).pack(side=tk.RIGHT, padx=5)
+
+    # Sections of a quest's detailed_log in display order: (field, heading, is_list)
+    QUEST_LOG_SECTIONS = (
+        ("setting", "📍 Setting", False),
+        ("trigger", "❗ Trigger", False),
+        ("player_choices", "🧠 Player Choices", True),
+        ("enemy", "☠️ Enemy", False),
+        ("combat_notes", "⚔️ Combat Notes", True),
+        ("aftermath", "🧍 Aftermath", False),
+        ("character_notes", "💭 Character Notes", True),
+        ("why_it_matters", "⭐ Why It Matters", False),
+    )
+    # List items rendered per step while scrolling, and lines rendered ahead of the view
+    QUEST_LOG_CHUNK = 200
+    QUEST_LOG_MARGIN = 80
+    # Closed quest log windows kept for reopening
+    QUEST_LOG_CACHE_SIZE = 8
 
+    @timed("gui.view_full_quest_log")
     def view_full_quest_log(self):
         """Show the full detailed log for a completed quest"""
         selection = self.completed_quests.curselection()
@@ -200,57 +261,84 @@ class DnDJournalGUI:
             
         log = quest["detailed_log"]
         
+        # Reopen the cached window unless the quest changed since it was rendered
+        cache_key = quest.get("id") or quest.get("title")
+        digest = hashlib.sha1(json.dumps([quest.get("title"), log], sort_keys=True).encode("utf-8")).hexdigest()
+        cached = self.quest_log_windows.pop(cache_key, None)
+        if cached:
+            if cached[0] == digest and cached[1].winfo_exists():
+                self.quest_log_windows[cache_key] = cached
+                cached[1].deiconify()
+                cached[1].lift()
+                return
+            cached[1].destroy()
+        
         # Create detail window
         detail_win = tk.Toplevel(self.root)
         detail_win.title(f"Quest Log: {quest.get('title', 'Untitled Quest')}")
         detail_win.geometry("700x800")
+        detail_win.protocol("WM_DELETE_WINDOW", detail_win.withdraw)
+        self.quest_log_windows[cache_key] = (digest, detail_win)
+        while len(self.quest_log_windows) > self.QUEST_LOG_CACHE_SIZE:
+            _, (_, oldest) = self.quest_log_windows.popitem(last=False)
+            oldest.destroy()
         
-        # Main container with scrollbar
+        # One text widget for the whole log; sections are tagged, not separate widgets
         container = ttk.Frame(detail_win)
         container.pack(fill=tk.BOTH, expand=True)
-        
-        canvas = tk.Canvas(container)
-        scrollbar = ttk.Scrollbar(container, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(
-                scrollregion=canvas.bbox("all")
-            )
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
+        text = tk.Text(container, wrap=tk.WORD, padx=10, pady=5)
+        scrollbar = ttk.Scrollbar(container, orient="vertical", command=text.yview)
+        text.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
-        
-        # Helper function to add sections
-        def add_section(parent, title, content, is_list=False):
-            frame = ttk.LabelFrame(parent, text=title)
-            frame.pack(fill=tk.X, padx=5, pady=5)
-            
+        text.tag_configure("heading", font=("TkDefaultFont", 11, "bold"), spacing1=10, spacing3=4)
+        text.tag_configure("item", lmargin1=15, lmargin2=28, spacing3=2)
+        text.tag_configure("body", lmargin1=15, lmargin2=15)
+        text.tag_configure("empty", lmargin1=15, foreground="gray")
+        
+        # Headings go in now; list bodies are filled in at a mark as they scroll into view
+        pending = {}
+        for field, heading, is_list in self.QUEST_LOG_SECTIONS:
+            content = log.get(field)
+            text.insert(tk.END, heading + "\n", "heading")
             if is_list and isinstance(content, list):
-                for item in content:
-                    ttk.Label(frame, text=f"• {item}", wraplength=650).pack(anchor="w", padx=5, pady=2)
+                if content:
+                    text.insert(tk.END, "\n")
+                    text.mark_set(field, "end-2c")
+                    pending[field] = [content, 0]
+                else:
+                    text.insert(tk.END, "No information available\n", "empty")
             elif content:
-                text = tk.Text(frame, wrap=tk.WORD, height=4, width=80)
-                text.insert("1.0", content)
-                text.config(state="disabled")
-                text.pack(fill=tk.X, padx=5, pady=5)
+                text.insert(tk.END, f"{content}\n", "body")
             else:
-                ttk.Label(frame, text="No information available", foreground="gray").pack()
-        
-        # Add all sections in order
-        add_section(scrollable_frame, "📍 Setting", log.get("setting"))
-        add_section(scrollable_frame, "❗ Trigger", log.get("trigger"))
-        add_section(scrollable_frame, "🧠 Player Choices", log.get("player_choices"), is_list=True)
-        add_section(scrollable_frame, "☠️ Enemy", log.get("enemy"))
-        add_section(scrollable_frame, "⚔️ Combat Notes", log.get("combat_notes"), is_list=True)
-        add_section(scrollable_frame, "🧍 Aftermath", log.get("aftermath"))
-        add_section(scrollable_frame, "💭 Character Notes", log.get("character_notes"), is_list=True)
-        add_section(scrollable_frame, "⭐ Why It Matters", log.get("why_it_matters"))
+                text.insert(tk.END, "No information available\n", "empty")
+        
+        def render_visible():
+            # Fill pending sections whose mark is within QUEST_LOG_MARGIN lines of the view
+            if not text.winfo_exists():
+                return
+            text.config(state="normal")
+            limit = int(text.index(f"@0,{text.winfo_height()}").split(".")[0]) + self.QUEST_LOG_MARGIN
+            for field in list(pending):
+                items, done = pending[field]
+                while int(text.index(field).split(".")[0]) <= limit and done < len(items):
+                    chunk = items[done:done + self.QUEST_LOG_CHUNK]
+                    text.insert(field, "".join(f"• {item}\n" for item in chunk), "item")
+                    done += len(chunk)
+                if done >= len(items):
+                    text.mark_unset(field)
+                    del pending[field]
+                else:
+                    pending[field][1] = done
+            text.config(state="disabled")
+        
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            if pending:
+                text.after_idle(render_visible)
+        
+        text.configure(yscrollcommand=on_scroll)
+        text.bind("<Configure>", lambda e: pending and text.after_idle(render_visible))
+        render_visible()
         
     def create_character_tab(self):
         """Create the character stats tab"""
@@ -306,6 +394,34 @@ class DnDJournalGUI:
         ttk.Label(info_frame, text="Hit Dice:").grid(row=4, column=0, sticky=tk.W, padx=5, pady=5)
         self.char_hit_dice = ttk.Entry(info_frame)
         self.char_hit_dice.grid(row=4, column=1, sticky=tk.W, padx=5, pady=5)
+        self.char_hit_dice.bind("<KeyRelease>", lambda e: self.update_level_up_hp())
+        
+        # Expected HP gain on the next level-up, from the hit dice
+        self.level_up_var = tk.StringVar()
+        ttk.Label(info_frame, text="Level-up HP:").grid(row=5, column=0, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(info_frame, textvariable=self.level_up_var, foreground="gray").grid(
+            row=5, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        # Odds of any dice expression
+        odds_frame = ttk.LabelFrame(scrollable_frame, text="Dice Odds", padding=10)
+        odds_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(odds_frame, text="Roll:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        self.dice_expression = ttk.Entry(odds_frame)
+        self.dice_expression.insert(0, "d20 adv + 5")
+        self.dice_expression.grid(row=0, column=1, sticky=tk.EW, padx=5, pady=5)
+        ttk.Label(odds_frame, text="Target:").grid(row=0, column=2, sticky=tk.W, padx=5, pady=5)
+        self.dice_target = ttk.Spinbox(odds_frame, from_=-999, to=99999, width=6,
+                                       command=self.update_dice_odds)
+        self.dice_target.set(15)
+        self.dice_target.grid(row=0, column=3, sticky=tk.W, padx=5, pady=5)
+        self.dice_odds_var = tk.StringVar()
+        ttk.Label(odds_frame, textvariable=self.dice_odds_var, wraplength=500).grid(
+            row=1, column=0, columnspan=4, sticky=tk.W, padx=5, pady=5)
+        odds_frame.columnconfigure(1, weight=1)
+        for widget in (self.dice_expression, self.dice_target):
+            widget.bind("<KeyRelease>", lambda e: self.update_dice_odds())
+        self.update_dice_odds()
         
         # Currency
         currency_frame = ttk.LabelFrame(scrollable_frame, text="Currency", padding=10)
@@ -333,6 +449,135 @@ class DnDJournalGUI:
         # Save button
         ttk.Button(scrollable_frame, text="Save Changes", command=self.save_character).pack(pady=10)
         
+    def update_level_up_hp(self):
+        """Show the expected HP gain for the hit dice on the character tab"""
+        hit_dice = self.char_hit_dice.get().strip()
+        if not hit_dice:
+            self.level_up_var.set("Enter hit dice (e.g. 1d10 or 1d10+2 with CON)")
+            return
+        try:
+            gain, fixed = level_up_hp(hit_dice)
+            self.level_up_var.set(f"{describe_dice(gain)} (fixed: {fixed})")
+        except ValueError as e:
+            self.level_up_var.set(str(e))
+
+    @timed("gui.update_dice_odds")
+    def update_dice_odds(self):
+        """Show the distribution of the dice expression on the character tab"""
+        try:
+            dist = dice_distribution(self.dice_expression.get().strip())
+        except ValueError as e:
+            self.dice_odds_var.set(str(e))
+            return
+        text = describe_dice(dist)
+        try:
+            target = int(self.dice_target.get())
+            text += f"\nP(≥ {target}) = {dist.at_least(target):.1%}   P(= {target}) = {dist.probability(target):.1%}"
+        except ValueError:
+            pass
+        self.dice_odds_var.set(text)
+
+    def create_stats_tab(self):
+        """Create the campaign statistics tab"""
+        tab = ttk.Frame(self.notebook)
+        self.notebook.add(tab, text="Stats")
+        self.stats_tab = tab
+
+        overview_frame = ttk.LabelFrame(tab, text="Overview", padding=10)
+        overview_frame.pack(fill=tk.X, padx=10, pady=10)
+        self.stats_overview_var = tk.StringVar(value="No journal loaded")
+        ttk.Label(overview_frame, textvariable=self.stats_overview_var, justify=tk.LEFT).pack(anchor=tk.W)
+
+        tables_frame = ttk.Frame(tab)
+        tables_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+
+        # Entries and words per session, newest first
+        sessions_frame = ttk.LabelFrame(tables_frame, text="Sessions", padding=5)
+        sessions_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 5))
+        columns = ("date", "entries", "words")
+        self.stats_sessions = ttk.Treeview(sessions_frame, columns=columns, show="headings")
+        for column, width in zip(columns, (100, 70, 80)):
+            self.stats_sessions.heading(column, text=column.title())
+            self.stats_sessions.column(column, width=width, anchor=tk.W)
+        scrollbar = ttk.Scrollbar(sessions_frame, orient=tk.VERTICAL, command=self.stats_sessions.yview)
+        self.stats_sessions.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.stats_sessions.pack(fill=tk.BOTH, expand=True)
+
+        # Days each completed quest took, most recently completed first
+        quests_frame = ttk.LabelFrame(tables_frame, text="Quest Completion", padding=5)
+        quests_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 0))
+        columns = ("quest", "days")
+        self.stats_quests = ttk.Treeview(quests_frame, columns=columns, show="headings")
+        for column, width in zip(columns, (220, 60)):
+            self.stats_quests.heading(column, text=column.title())
+            self.stats_quests.column(column, width=width, anchor=tk.W)
+        scrollbar = ttk.Scrollbar(quests_frame, orient=tk.VERTICAL, command=self.stats_quests.yview)
+        self.stats_quests.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.stats_quests.pack(fill=tk.BOTH, expand=True)
+
+        history_frame = ttk.LabelFrame(tab, text="Progression", padding=10)
+        history_frame.pack(fill=tk.X, padx=10, pady=10)
+        self.stats_history_var = tk.StringVar(value="")
+        ttk.Label(history_frame, textvariable=self.stats_history_var, justify=tk.LEFT,
+                  wraplength=740).pack(anchor=tk.W)
+
+        # Render only while the tab is visible; record_stats() marks it stale
+        self.notebook.bind("<<NotebookTabChanged>>", lambda e: self.update_stats_tab(), add="+")
+
+    @timed("gui.update_stats_tab")
+    def update_stats_tab(self):
+        """Show the stored campaign statistics if the Stats tab is visible and out of date"""
+        if not self.stats or not self.stats_stale:
+            return
+        if self.notebook.select() != str(self.stats_tab):
+            return
+        self.stats_stale = False
+        report = self.stats.dashboard()
+
+        totals = report["totals"]
+        lines = [f"{totals['sessions']} sessions, {totals['entries']} entries, {totals['words']:,} words "
+                 f"(avg {totals['words_per_session']:.0f} words per session)"]
+        if totals["first_session"]:
+            lines[0] += f", {totals['first_session']} to {totals['last_session']}"
+        lines.append(f"Quests: {totals['active']} active, {totals['completed']} completed, {totals['rumors']} rumors")
+        conversion = report["conversion"]
+        if conversion["rate"] is not None:
+            lines.append(f"Rumors followed up: {conversion['followed']} of {conversion['rumors_heard']} "
+                         f"({conversion['rate']:.0%})")
+        if report["quest_days"]:
+            days = report["quest_days"]
+            lines.append(f"Days to complete a quest: avg {days['average']:.1f}, median {days['median']:g}, "
+                         f"shortest {days['shortest']}, longest {days['longest']}")
+        self.stats_overview_var.set("\n".join(lines))
+
+        self.stats_sessions.delete(*self.stats_sessions.get_children())
+        for date, count, words in report["sessions"]:
+            self.stats_sessions.insert("", tk.END, values=(date, count, f"{words:,}"))
+        self.stats_quests.delete(*self.stats_quests.get_children())
+        for title, days in report["quest_times"]:
+            self.stats_quests.insert("", tk.END, values=(title, days))
+
+        history = []
+        if report["levels"]:
+            history.append("Level: " + " → ".join(f"{level} ({date})" for date, level in report["levels"]))
+        if report["currency"]:
+            history.append("Wealth (gp): " + " → ".join(f"{gold:,.2f} ({date})" for date, gold in report["currency"][-12:]))
+        self.stats_history_var.set("\n".join(history) or "No level or currency changes recorded yet")
+
+    def record_stats(self):
+        """Bring the campaign statistics up to date with journal_data and store them"""
+        if not self.stats or not self.journal_data:
+            return
+        if self.hash_tree is not None:
+            # Only sections and entries whose digest changed are looked at
+            self.hash_tree.refresh(self.journal_data)
+        if self.stats.sync_journal(self.current_journal_path, self.journal_data, self.hash_tree):
+            self.stats.save()
+            self.stats_stale = True
+        self.update_stats_tab()
+
     def create_settings_tab(self):
         """Create the settings tab with organized sections"""
         tab = ttk.Frame(self.notebook)
@@ -368,12 +613,18 @@ class DnDJournalGUI:
         backup_frame.pack(fill=tk.X, pady=2)
         ttk.Button(backup_frame, text="Create Backup", command=self.create_backup).pack(fill=tk.X)
         ttk.Button(backup_frame, text="Restore Backup", command=self.restore_backup).pack(fill=tk.X, pady=5)
+        ttk.Button(backup_frame, text="Backup Retention", command=self.edit_backup_retention).pack(fill=tk.X)
+        ttk.Button(backup_frame, text="Archive Old Entries", command=self.edit_archive_policy).pack(fill=tk.X, pady=5)
         
         # Import/Export
         transfer_frame = ttk.LabelFrame(data_frame, text="Transfer", padding=5)
         transfer_frame.pack(fill=tk.X, pady=2)
         ttk.Button(transfer_frame, text="Import Journal", command=self.import_journal).pack(fill=tk.X)
         ttk.Button(transfer_frame, text="Export Journal", command=self.export_journal).pack(fill=tk.X, pady=5)
+        ttk.Button(transfer_frame, text="Export for AI (Token Budget)", command=self.export_budgeted).pack(fill=tk.X)
+        ttk.Button(transfer_frame, text="Export Changes Since Last Sync", command=self.export_delta).pack(fill=tk.X, pady=5)
+        ttk.Button(transfer_frame, text="Import AI Changes", command=self.import_delta).pack(fill=tk.X)
+        ttk.Button(transfer_frame, text="Export Campaign Book", command=self.export_book).pack(fill=tk.X, pady=5)
         
         # Application Settings Section
         app_frame = ttk.LabelFrame(scrollable_frame, text="Application Settings", padding=10)
@@ -394,6 +645,14 @@ class DnDJournalGUI:
         ttk.Combobox(theme_frame, textvariable=self.theme_var,
                     values=["default", "light", "dark"], width=15).pack(side=tk.LEFT, padx=5)
         
+        # Performance metrics
+        metrics_frame = ttk.Frame(app_frame)
+        metrics_frame.pack(fill=tk.X, pady=2)
+        self.metrics_var = tk.BooleanVar(value=metrics_enabled())
+        ttk.Checkbutton(metrics_frame, text="Record Timing Metrics", variable=self.metrics_var,
+                       command=lambda: enable_metrics(self.metrics_var.get())).pack(side=tk.LEFT)
+        ttk.Button(metrics_frame, text="Show Metrics", command=self.show_metrics).pack(side=tk.RIGHT)
+        
         # Quick Actions Section
         actions_frame = ttk.LabelFrame(scrollable_frame, text="Quick Actions", padding=10)
         actions_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -402,26 +661,22 @@ class DnDJournalGUI:
                  command=self.show_current_summary).pack(fill=tk.X, pady=2)
         ttk.Button(actions_frame, text="Refresh Journal List",
                  command=self.refresh_journal_list).pack(fill=tk.X, pady=5)
+        ttk.Button(actions_frame, text="Milestone History",
+                 command=self.show_milestones).pack(fill=tk.X, pady=2)
 
+    @timed("gui.create_backup")
     def create_backup(self):
         """Create a timestamped backup of current journal"""
         if not self.current_journal_path:
             messagebox.showwarning("Warning", "No journal loaded to backup")
             return
             
-        backup_dir = os.path.join(os.path.dirname(self.current_journal_path), "backups")
-        os.makedirs(backup_dir, exist_ok=True)
-        
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"backup_{timestamp}_{os.path.basename(self.current_journal_path)}"
-        backup_path = os.path.join(backup_dir, backup_name)
-        
         try:
             if not os.path.exists(self.current_journal_path):
                 messagebox.showerror("Error", f"Journal file not found: {self.current_journal_path}")
                 return
                 
-            shutil.copy2(self.current_journal_path, backup_path)
+            backup_path = backup_journal(self.current_journal_path)
             messagebox.showinfo("Success",
                 f"Backup created successfully!\n\n"
                 f"Original: {self.current_journal_path}\n"
@@ -435,67 +690,472 @@ class DnDJournalGUI:
                 f"Failed to create backup:\n{str(e)}\n\n"
                 "Please ensure the file isn't open in another program.")
 
+    @timed("gui.restore_backup")
     def restore_backup(self):
-        """Restore from a backup file"""
-        backup_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "backups")
+        """Browse the backup catalog and restore a backup"""
+        if self.current_journal_path:
+            backup_dir = get_backup_dir(self.current_journal_path)
+        else:
+            backup_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "backups")
         os.makedirs(backup_dir, exist_ok=True)
-        
-        backup_file = filedialog.askopenfilename(
-            initialdir=backup_dir,
-            title="Select Backup to Restore",
-            filetypes=[("JSON files", "*.json")]
+
+        win = tk.Toplevel(self.root)
+        win.title("Restore Backup")
+        win.geometry("900x500")
+
+        filter_frame = ttk.Frame(win)
+        filter_frame.pack(fill=tk.X, padx=10, pady=(10, 5))
+        ttk.Label(filter_frame, text="Journal:").pack(side=tk.LEFT)
+        journal_var = tk.StringVar(value="All")
+        journal_box = ttk.Combobox(filter_frame, textvariable=journal_var, state="readonly", width=25)
+        journal_box.pack(side=tk.LEFT, padx=5)
+        ttk.Label(filter_frame, text="Search:").pack(side=tk.LEFT, padx=(10, 0))
+        search_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=search_var, width=25).pack(side=tk.LEFT, padx=5)
+
+        def browse_file():
+            backup_file = filedialog.askopenfilename(
+                initialdir=backup_dir,
+                title="Select Backup to Restore",
+                filetypes=[("Journal backups", "*.json *.json.gz"), ("JSON files", "*.json")],
+                parent=win
+            )
+            if backup_file:
+                self.restore_backup_file(backup_file, win)
+
+        ttk.Button(filter_frame, text="Browse File...", command=browse_file).pack(side=tk.RIGHT)
+
+        panes = ttk.PanedWindow(win, orient=tk.HORIZONTAL)
+        panes.pack(fill=tk.BOTH, expand=True, padx=10)
+        list_frame = ttk.Frame(panes)
+        columns = ("taken", "journal", "character", "level", "entries", "size")
+        headings = ("Backed Up", "Journal", "Character", "Level", "Entries", "Size")
+        tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode="browse")
+        for column, heading, width in zip(columns, headings, (140, 130, 120, 45, 60, 70)):
+            tree.heading(column, text=heading, command=lambda c=column: sort_by(c))
+            tree.column(column, width=width, anchor=tk.W)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        panes.add(list_frame, weight=3)
+        preview = scrolledtext.ScrolledText(panes, wrap=tk.WORD, width=40)
+        preview.config(state=tk.DISABLED)
+        panes.add(preview, weight=2)
+
+        button_frame = ttk.Frame(win)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        status_var = tk.StringVar(value="Reading the backup catalog...")
+        ttk.Label(button_frame, textvariable=status_var, foreground="gray").pack(side=tk.LEFT)
+        restore_button = ttk.Button(button_frame, text="Restore", state=tk.DISABLED)
+        restore_button.pack(side=tk.RIGHT)
+
+        # Everything below works on the catalog entries; backup files are only read to restore
+        catalog = []
+        shown = {}
+        order = {"column": "taken", "reverse": True}
+        sort_keys = {
+            "taken": lambda e: e["taken"],
+            "journal": lambda e: e["journal"].lower(),
+            "character": lambda e: e.get("character", "").lower(),
+            "level": lambda e: e.get("level") or 0,
+            "entries": lambda e: e.get("entries", 0),
+            "size": lambda e: e["size"],
+        }
+
+        def populate(*_):
+            tree.delete(*tree.get_children())
+            shown.clear()
+            journal = journal_var.get()
+            search = search_var.get().strip().lower()
+            entries = [e for e in catalog if journal == "All" or e["journal"] == journal]
+            if search:
+                entries = [e for e in entries if search in " ".join(
+                    (e["journal"], e["taken"], e.get("character", ""), e.get("class", ""))).lower()]
+            entries.sort(key=sort_keys[order["column"]], reverse=order["reverse"])
+            for entry in entries:
+                shown[entry["name"]] = entry
+                tree.insert("", tk.END, iid=entry["name"], values=(
+                    entry["taken"].replace("T", " "), entry["journal"],
+                    entry.get("character", "") if not entry.get("error") else "(unreadable)",
+                    entry.get("level") or "", entry.get("entries", ""), format_size(entry["size"])))
+            status_var.set(f"{len(entries)} of {len(catalog)} backup(s), "
+                           f"{format_size(sum(e['size'] for e in catalog))} in total")
+            show_preview()
+
+        def sort_by(column):
+            order["reverse"] = not order["reverse"] if order["column"] == column else column in ("taken", "level", "entries", "size")
+            order["column"] = column
+            populate()
+
+        def selected_entry():
+            selection = tree.selection()
+            return shown.get(selection[0]) if selection else None
+
+        def show_preview(*_):
+            entry = selected_entry()
+            text = describe_backup(entry) if entry else "Select a backup to see what it contains."
+            if entry and not entry.get("error") and self.hash_tree and self.current_journal_path \
+                    and os.path.basename(self.current_journal_path) == entry["journal"]:
+                self.hash_tree.refresh(self.journal_data)
+                changed = self.hash_tree.changed_sections({"sections": entry.get("sections", {})})
+                compared = (f"Differs from the open journal in: {', '.join(changed)}" if changed
+                            else "Same content as the open journal")
+                text = f"{compared}\n\n{text}"
+            preview.config(state=tk.NORMAL)
+            preview.delete("1.0", tk.END)
+            preview.insert(tk.END, text)
+            preview.config(state=tk.DISABLED)
+            restore_button.config(state=tk.NORMAL if entry and not entry.get("error") else tk.DISABLED)
+
+        @timed("gui.restore_backup.restore")
+        def restore():
+            entry = selected_entry()
+            if entry and self.restore_backup_file(entry["path"], win):
+                load()
+
+        # Cataloging new backups parses them once, so read the catalog off the UI thread
+        loaded = {}
+
+        def load():
+            loaded.pop("result", None)
+            thread = threading.Thread(target=lambda: loaded.update(result=load_catalog(backup_dir)), daemon=True)
+            thread.start()
+            poll(thread)
+
+        def poll(thread):
+            if not win.winfo_exists():
+                return
+            if thread.is_alive():
+                win.after(100, poll, thread)
+                return
+            catalog[:] = loaded.get("result", [])
+            journals = sorted({e["journal"] for e in catalog})
+            journal_box["values"] = ["All"] + journals
+            if journal_var.get() not in journal_box["values"]:
+                journal_var.set("All")
+            if not loaded.get("shown") and self.current_journal_path \
+                    and os.path.basename(self.current_journal_path) in journals:
+                journal_var.set(os.path.basename(self.current_journal_path))  # Start with the open journal
+            loaded["shown"] = True
+            populate()
+
+        tree.bind("<<TreeviewSelect>>", show_preview)
+        tree.bind("<Double-1>", lambda e: restore())
+        journal_box.bind("<<ComboboxSelected>>", populate)
+        search_var.trace_add("write", populate)
+        restore_button.config(command=restore)
+        load()
+
+    def restore_backup_file(self, backup_file, parent=None):
+        """
+        Restore a journal from a backup file, after confirmation.
+
+        Args:
+            backup_file: Backup to restore
+            parent: Window the dialogs belong to
+
+        Returns:
+            bool: True if the journal was restored
+        """
+        parent = parent or self.root
+        parsed = parse_backup_name(backup_file)
+        if parsed is None:
+            messagebox.showerror("Error", "Not a backup file. Backups are named backup_<date>_<time>_<journal>.json",
+                                 parent=parent)
+            return False
+        original_name = parsed[1]
+        restore_path = os.path.abspath(os.path.join(os.path.dirname(backup_file), "..", original_name))
+
+        confirm_msg = (
+            f"Restore journal from backup?\n\n"
+            f"Backup: {os.path.basename(backup_file)}\n"
+            f"Will overwrite: {original_name}\n\n"
+            "The current version is backed up first."
         )
-        
-        if not backup_file:
-            return
-            
+        if not messagebox.askyesno("Confirm Restore", confirm_msg, icon='warning', parent=parent):
+            return False
+
         try:
             # Load the backup to verify it's valid
-            test_load = load_journal(backup_file)
-            
-            # Get original filename from backup name
-            original_name = "_".join(backup_file.split("_")[2:])
-            restore_path = os.path.join(os.path.dirname(backup_file), "..", original_name)
-            
-            confirm_msg = (
-                f"Restore journal from backup?\n\n"
-                f"Backup: {os.path.basename(backup_file)}\n"
-                f"Will overwrite: {original_name}\n\n"
-                "This cannot be undone!"
-            )
-            
-            if messagebox.askyesno("Confirm Restore", confirm_msg, icon='warning'):
-                try:
-                    if not os.path.exists(backup_file):
-                        messagebox.showerror("Error", f"Backup file not found: {backup_file}")
-                        return
-                        
-                    shutil.copy2(backup_file, restore_path)
-                    
-                    # Reload if it was the current journal
-                    if self.current_journal_path == restore_path:
-                        self.journal_data = test_load
-                        self.update_all_tabs()
-                    
-                    messagebox.showinfo("Success",
-                        f"Journal restored successfully!\n\n"
-                        f"Backup: {backup_file}\n"
-                        f"Restored to: {restore_path}")
-                        
-                except PermissionError:
-                    messagebox.showerror("Error",
-                        "Permission denied. Please check:\n"
-                        f"- Read access to: {backup_file}\n"
-                        f"- Write access to: {restore_path}")
-                except Exception as e:
-                    messagebox.showerror("Error",
-                        f"Failed to restore backup:\n{str(e)}\n\n"
-                        "Please ensure files aren't open in another program.")
-        except json.JSONDecodeError:
-            messagebox.showerror("Error", "Invalid backup file format. Please select a valid JSON journal file.")
+            read_backup(backup_file)
+            previous = restore_from_backup(backup_file, restore_path)
+        except FileNotFoundError:
+            messagebox.showerror("Error", f"Backup file not found: {backup_file}", parent=parent)
+            return False
+        except (json.JSONDecodeError, UnicodeDecodeError, EOFError):
+            messagebox.showerror("Error", "Invalid backup file format. Please select a valid JSON journal file.",
+                                 parent=parent)
+            return False
+        except PermissionError:
+            messagebox.showerror("Error",
+                "Permission denied. Please check:\n"
+                f"- Read access to: {backup_file}\n"
+                f"- Write access to: {restore_path}", parent=parent)
+            return False
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to process backup: {str(e)}")
+            messagebox.showerror("Error",
+                f"Failed to restore backup:\n{str(e)}\n\n"
+                "Please ensure files aren't open in another program.", parent=parent)
+            return False
+
+        # Reload if it was the current journal
+        if self.current_journal_path == restore_path:
+            self.journal_data = self.journal_handle.load()
+            self.mark_saved()
+            self.update_all_tabs()
+
+        messagebox.showinfo("Success",
+            f"Journal restored successfully!\n\n"
+            f"Backup: {backup_file}\n"
+            f"Restored to: {restore_path}" +
+            (f"\nPrevious version saved as: {previous}" if previous else ""), parent=parent)
+        return True
+
+    def archive_old_entries(self, policy=None, force=False):
+        """
+        Move old journal entries to the archive if the archive policy lets
+        any go, and save the smaller journal.
+
+        Args:
+            policy: Archive policy (default: the journal's stored policy)
+            force: Archive even fewer entries than a full batch
+
+        Returns:
+            int: Number of entries archived
+        """
+        if not self.journal_data or not self.current_journal_path:
+            return 0
+        try:
+            moved = archive_entries(self.current_journal_path, self.journal_data, policy, force)
+        except (OSError, TimeoutError) as e:
+            print(f"Warning: Could not archive old entries: {e}")
+            return 0
+        if moved and not self.save_current_journal(autosave=True):
+            # The entries are in the archive and still in the file; the next save removes them
+            print("Warning: Could not save the journal after archiving old entries")
+        return moved
+
+    @timed("gui.edit_archive_policy")
+    def edit_archive_policy(self):
+        """Edit how many journal entries stay in the journal file and archive the rest"""
+        if not self.journal_data or not self.current_journal_path:
+            messagebox.showwarning("Warning", "No journal loaded")
+            return
+        index = load_archive_index(self.current_journal_path)
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Archive Old Entries")
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        status_var = tk.StringVar()
+        ttk.Label(dialog, textvariable=status_var, foreground="gray").grid(
+            row=0, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        keep_last_var = tk.IntVar(value=index["policy"]["keep_last"])
+        keep_days_var = tk.IntVar(value=index["policy"]["keep_days"])
+        for row, (label, variable, unit) in enumerate((
+                ("Keep the newest", keep_last_var, "entries in the journal"),
+                ("and all entries from the last", keep_days_var, "days (0 = by count only)")), start=1):
+            ttk.Label(dialog, text=label).grid(row=row, column=0, sticky=tk.W, padx=5, pady=2)
+            spin_frame = ttk.Frame(dialog)
+            spin_frame.grid(row=row, column=1, sticky=tk.W, padx=5, pady=2)
+            ttk.Spinbox(spin_frame, from_=0, to=1000000, textvariable=variable, width=8).pack(side=tk.LEFT)
+            ttk.Label(spin_frame, text=unit).pack(side=tk.LEFT, padx=5)
+
+        def show_status():
+            chunks = load_archive_index(self.current_journal_path)["chunks"]
+            status_var.set(f"{len(self.journal_data.get('journal_log', []))} entries in the journal, "
+                           f"{sum(chunk['count'] for chunk in chunks)} archived in {len(chunks)} chunk(s)")
+
+        def read_policy():
+            try:
+                policy = {"keep_last": keep_last_var.get(), "keep_days": keep_days_var.get()}
+            except tk.TclError:
+                messagebox.showerror("Error", "Please enter whole numbers", parent=dialog)
+                return None
+            if min(policy.values()) < 0:
+                messagebox.showerror("Error", "Values cannot be negative", parent=dialog)
+                return None
+            return policy if save_archive_policy(self.current_journal_path, policy) else None
+
+        @timed("gui.edit_archive_policy.save")
+        def on_save():
+            if read_policy() is not None:
+                dialog.destroy()
+
+        @timed("gui.edit_archive_policy.archive")
+        def on_archive():
+            policy = read_policy()
+            if policy is None:
+                return
+            moved = self.archive_old_entries(policy, force=True)
+            if moved:
+                self.update_all_tabs()
+            show_status()
+            messagebox.showinfo("Archive", f"{moved} entries archived" if moved else "No entries to archive",
+                                parent=dialog)
+
+        button_frame = ttk.Frame(dialog)
+        button_frame.grid(row=3, column=0, columnspan=2, sticky=tk.EW, padx=5, pady=5)
+        ttk.Button(button_frame, text="Save", command=on_save).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Archive Now", command=on_archive).pack(side=tk.RIGHT, padx=5)
+        show_status()
+
+    @timed("gui.search_all_entries")
+    def search_all_entries(self):
+        """Search journal entries, reading through to the archive"""
+        if not self.journal_data:
+            messagebox.showwarning("Warning", "Please load or create a journal first")
+            return
+
+        win = tk.Toplevel(self.root)
+        win.title("Search Entries")
+        win.geometry("800x500")
+
+        search_frame = ttk.Frame(win)
+        search_frame.pack(fill=tk.X, padx=10, pady=(10, 5))
+        search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=search_var, width=40)
+        search_entry.pack(side=tk.LEFT)
+        archived_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(search_frame, text="Include archived entries", variable=archived_var).pack(side=tk.LEFT, padx=10)
 
+        panes = ttk.PanedWindow(win, orient=tk.VERTICAL)
+        panes.pack(fill=tk.BOTH, expand=True, padx=10)
+        list_frame = ttk.Frame(panes)
+        tree = ttk.Treeview(list_frame, columns=("date", "title", "where"), show="headings", selectmode="browse")
+        for column, heading, width in (("date", "Date", 100), ("title", "Title", 480), ("where", "Stored In", 100)):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor=tk.W)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        panes.add(list_frame, weight=3)
+        preview = scrolledtext.ScrolledText(panes, wrap=tk.WORD, height=8, state=tk.DISABLED)
+        panes.add(preview, weight=2)
+        status_var = tk.StringVar()
+        ttk.Label(win, textvariable=status_var, foreground="gray").pack(anchor=tk.W, padx=10, pady=5)
+
+        results = []
+        limit = 200
+
+        @timed("gui.search_all_entries.search")
+        def search(*_):
+            # The journal is searched first; archived chunks are only read for more results
+            results[:] = search_entries(self.current_journal_path, self.journal_data, search_var.get(),
+                                        archived_var.get(), limit)
+            tree.delete(*tree.get_children())
+            for i, (entry, archived) in enumerate(results):
+                tree.insert("", tk.END, iid=str(i), values=(entry.get("date", ""), entry.get("title", ""),
+                                                            "Archive" if archived else "Journal"))
+            status_var.set(f"{len(results)} entries" + (f" (showing the newest {limit})" if len(results) >= limit else ""))
+            show_entry()
+
+        def show_entry(*_):
+            selection = tree.selection()
+            preview.config(state=tk.NORMAL)
+            preview.delete("1.0", tk.END)
+            if selection:
+                entry = results[int(selection[0])][0]
+                preview.insert(tk.END, f"[{entry.get('date')}] {entry.get('title')}\n\n{entry.get('content') or ''}")
+            preview.config(state=tk.DISABLED)
+
+        ttk.Button(search_frame, text="Search", command=search).pack(side=tk.LEFT)
+        search_entry.bind("<Return>", search)
+        tree.bind("<<TreeviewSelect>>", show_entry)
+        search_entry.focus_set()
+        search()
+
+    def backup_before(self, journal_path, action):
+        """
+        Back up a journal before it is overwritten by an import. If that fails,
+        ask whether to go ahead without a backup.
+
+        Args:
+            journal_path: Journal about to be overwritten
+            action: What is about to happen, for the question (e.g. "import")
+
+        Returns:
+            bool: True to go ahead
+        """
+        if not journal_path or not os.path.exists(journal_path):
+            return True
+        try:
+            backup_journal(journal_path)
+            return True
+        except OSError as e:
+            return messagebox.askyesno("Backup Failed",
+                f"Could not back up {os.path.basename(journal_path)}:\n{e}\n\n"
+                f"Continue the {action} without a backup?", icon='warning')
+
+    @timed("gui.edit_backup_retention")
+    def edit_backup_retention(self):
+        """Edit how many backups are kept and prune the backup folder"""
+        if self.current_journal_path:
+            backup_dir = get_backup_dir(self.current_journal_path)
+        else:
+            backup_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "backups")
+        policy = load_policy(backup_dir)
+        backups = list_backups(backup_dir)
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Backup Retention")
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        ttk.Label(dialog, text=f"{len(backups)} backup(s), {format_size(sum(b['size'] for b in backups))}",
+                  foreground="gray").grid(row=0, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        fields = (
+            ("keep_last", "Always keep the last", "backups"),
+            ("hourly", "Keep one per hour for", "hours"),
+            ("daily", "Keep one per day for", "days"),
+            ("weekly", "Keep one per week for", "weeks"),
+            ("compress_after_days", "Compress backups older than", "days"),
+            ("max_bytes", "Limit all backups to", "MB (0 = no limit)"),
+        )
+        variables = {}
+        for row, (key, label, unit) in enumerate(fields, start=1):
+            value = policy[key] // (1024 * 1024) if key == "max_bytes" else policy[key]
+            variables[key] = tk.IntVar(value=value)
+            ttk.Label(dialog, text=label).grid(row=row, column=0, sticky=tk.W, padx=5, pady=2)
+            spin_frame = ttk.Frame(dialog)
+            spin_frame.grid(row=row, column=1, sticky=tk.W, padx=5, pady=2)
+            ttk.Spinbox(spin_frame, from_=1 if key == "keep_last" else 0, to=100000,
+                        textvariable=variables[key], width=8).pack(side=tk.LEFT)
+            ttk.Label(spin_frame, text=unit).pack(side=tk.LEFT, padx=5)
+
+        @timed("gui.edit_backup_retention.save")
+        def on_save():
+            try:
+                values = {key: variable.get() for key, variable in variables.items()}
+            except tk.TclError:
+                messagebox.showerror("Error", "Please enter whole numbers", parent=dialog)
+                return
+            if any(value < 0 for value in values.values()):
+                messagebox.showerror("Error", "Values cannot be negative", parent=dialog)
+                return
+            values["keep_last"] = max(values["keep_last"], 1)
+            values["max_bytes"] *= 1024 * 1024
+            if save_policy(values, backup_dir):
+                # Prune on a background thread; the dialog closes right away
+                prune_in_background(backup_dir, values)
+                dialog.destroy()
+            else:
+                messagebox.showerror("Error", "Failed to save the retention policy", parent=dialog)
+
+        def on_defaults():
+            for key, variable in variables.items():
+                value = DEFAULT_RETENTION[key]
+                variable.set(value // (1024 * 1024) if key == "max_bytes" else value)
+
+        button_frame = ttk.Frame(dialog)
+        button_frame.grid(row=len(fields) + 1, column=0, columnspan=2, sticky=tk.EW, padx=5, pady=5)
+        ttk.Button(button_frame, text="Save and Prune", command=on_save).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Defaults", command=on_defaults).pack(side=tk.RIGHT, padx=5)
+
+    @timed("gui.show_current_summary")
     def show_current_summary(self):
         """Display a summary of the current journal"""
         if not self.journal_data:
@@ -518,23 +1178,140 @@ class DnDJournalGUI:
         )
         text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Redirect print output to the text widget
-        import sys
-        from io import StringIO
-        old_stdout = sys.stdout
-        sys.stdout = StringIO()
-        
-        print_summary(self.journal_data)
-        
-        output = sys.stdout.getvalue()
-        sys.stdout = old_stdout
-        
-        text.insert(tk.END, output)
+        text.insert(tk.END, self.summary_text(self.journal_data))
         text.config(state=tk.DISABLED)
         text.config(state=tk.DISABLED)
         
+    @timed("gui.show_milestones")
+    def show_milestones(self):
+        """Browse milestones and view or compare their snapshots"""
+        if not self.journal_data or not self.current_journal_path:
+            messagebox.showwarning("Warning", "No journal loaded")
+            return
+
+        milestones = self.journal_data.get("_meta", {}).get("milestones", [])
+        if not milestones:
+            messagebox.showinfo("Milestones", "No milestones recorded yet")
+            return
+
+        win = tk.Toplevel(self.root)
+        win.title("Milestone History")
+        win.geometry("700x450")
+
+        columns = ("timestamp", "type", "details")
+        tree = ttk.Treeview(win, columns=columns, show="headings", selectmode="extended")
+        for column, width in zip(columns, (160, 130, 380)):
+            tree.heading(column, text=column.title())
+            tree.column(column, width=width, anchor=tk.W)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        for i, milestone in enumerate(milestones):
+            details = ", ".join(f"{k}: {v}" for k, v in milestone.items()
+                                if k not in ("type", "timestamp", "snapshot") and v is not None)
+            if not milestone.get("snapshot"):
+                details = (details + " " if details else "") + "(no snapshot)"
+            tree.insert("", tk.END, iid=str(i), values=(milestone.get("timestamp", ""),
+                                                        milestone.get("type", ""), details))
+
+        def selected_snapshots():
+            return [milestones[int(iid)] for iid in tree.selection()]
+
+        @timed("gui.show_milestones.view")
+        def view():
+            selected = selected_snapshots()
+            if len(selected) != 1 or not selected[0].get("snapshot"):
+                messagebox.showwarning("Warning", "Select one milestone with a snapshot", parent=win)
+                return
+            try:
+                snapshot = load_snapshot(self.current_journal_path, selected[0]["snapshot"])
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to load snapshot: {e}", parent=win)
+                return
+            self.show_text_window(f"Snapshot - {selected[0].get('type')} at {selected[0].get('timestamp')}",
+                                  self.summary_text(snapshot))
+
+        @timed("gui.show_milestones.compare")
+        def compare():
+            selected = selected_snapshots()
+            if len(selected) != 2 or not all(m.get("snapshot") for m in selected):
+                messagebox.showwarning("Warning", "Select two milestones with snapshots", parent=win)
+                return
+            try:
+                changeset = compare_snapshots(self.current_journal_path,
+                                              selected[0]["snapshot"], selected[1]["snapshot"])
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to compare snapshots: {e}", parent=win)
+                return
+            lines = [describe_hunk(hunk) for hunk in iter_hunks(changeset)]
+            self.show_text_window("Milestone Comparison",
+                                  f"From {selected[0].get('timestamp')} to {selected[1].get('timestamp')}\n\n"
+                                  + ("\n".join(lines) if lines else "No differences"))
+
+        button_frame = ttk.Frame(win)
+        button_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Button(button_frame, text="View Snapshot", command=view).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Compare Two", command=compare).pack(side=tk.LEFT, padx=5)
+
+    @timed("gui.show_metrics")
+    def show_metrics(self):
+        """Show p50/p95 timings per operation from the metrics log"""
+        win = tk.Toplevel(self.root)
+        win.title("Performance Metrics")
+        win.geometry("840x450")
+
+        columns = ("operation", "count", "p50_ms", "p95_ms", "max_ms", "p95_cpu_ms", "last_records", "last_bytes")
+        tree = ttk.Treeview(win, columns=columns, show="headings")
+        for column, width in zip(columns, (240, 60, 80, 80, 80, 90, 90, 90)):
+            tree.heading(column, text=column.replace("_", " ").title())
+            tree.column(column, width=width, anchor=tk.W if column == "operation" else tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        status_var = tk.StringVar()
+        ttk.Label(win, textvariable=status_var).pack(anchor=tk.W, padx=10)
+
+        # Not timed: every refresh of this view would add a record to it
+        def refresh():
+            tree.delete(*tree.get_children())
+            try:
+                summary = summarize_metrics(load_metrics())
+            except OSError as e:
+                status_var.set(f"Could not read metrics: {e}")
+                return
+            for operation, stats in summary.items():
+                tree.insert("", tk.END, values=(operation, stats["count"], stats["p50_ms"], stats["p95_ms"],
+                                                stats["max_ms"], "" if stats["p95_cpu_ms"] is None else stats["p95_cpu_ms"],
+                                                stats["last_records"] or "",
+                                                stats["last_bytes"] or ""))
+            if summary:
+                status_var.set(f"{len(summary)} operations")
+            elif metrics_enabled():
+                status_var.set("No metrics recorded yet")
+            else:
+                status_var.set("Metrics are off. Enable 'Record Timing Metrics' in Settings.")
+
+        ttk.Button(win, text="Refresh", command=refresh).pack(anchor=tk.E, padx=10, pady=5)
+        refresh()
+
+    def summary_text(self, data):
+        """Render the print_summary() text for a journal"""
+        try:
+            return build_summary(data)["text"]
+        except Exception as e:
+            return f"Error building summary: {e}"
+
+    def show_text_window(self, title, content):
+        """Show read-only text in a new window"""
+        win = tk.Toplevel(self.root)
+        win.title(title)
+        win.geometry("800x600")
+        text = scrolledtext.ScrolledText(win, wrap=tk.WORD, font=('Consolas', 10))
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        text.insert(tk.END, content)
+        text.config(state=tk.DISABLED)
+
     # TODO: Implement all the command methods for the GUI
     
+    @timed("gui.refresh_journal_list")
     def refresh_journal_list(self):
         """Refresh the list of available journals"""
         logs_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
@@ -547,6 +1324,7 @@ class DnDJournalGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to list journals: {e}")
     
+    @timed("gui.load_selected_journal")
     def load_selected_journal(self):
         """Load the selected journal from the list"""
         selection = self.journal_listbox.curselection()
@@ -559,14 +1337,134 @@ class DnDJournalGUI:
         journal_path = os.path.join(logs_dir, journal_name)
         
         try:
-            self.journal_data = load_journal(journal_path)
-            self.current_journal_path = journal_path
-            self.status_var.set(f"Loaded: {journal_name}")
+            handle = JournalHandle(journal_path, "gui")
+            self.journal_data = handle.load()
+            self.open_journal(handle)
+            # Upgrade files written by older versions, once
+            if migrate_journal(self.journal_data):
+                backup_before_migration(journal_path)
+                self.hash_tree.invalidate()  # Migrations edit records in place
+                self.save_current_journal(autosave=True)
+            # Keep the journal file small: old entries go to the archive
+            archived = self.archive_old_entries()
+            self.status_var.set(f"Loaded: {journal_name}" + (f" ({archived} old entries archived)" if archived else ""))
             self.update_all_tabs()
             self.notebook.select(1)  # Switch to journal tab
+            if holders := other_holders(journal_path):
+                messagebox.showinfo("Journal Shared",
+                    f"{journal_name} is also open in: {describe_holders(holders)}\n\n"
+                    "Changes made there are detected when you save and can be merged.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load journal: {e}")
-    
+
+    def open_journal(self, handle):
+        """Make handle the current journal, releasing the previous one"""
+        if self.journal_handle and self.journal_handle.path != handle.path:
+            self.journal_handle.close()
+        self.journal_handle = handle
+        self.current_journal_path = handle.path
+        if not self.stats or self.stats.path != get_stats_path(handle.path):
+            self.stats = CampaignStats.load(handle.path)
+            self.stats_stale = True
+        self.hash_tree = JournalHashTree()
+        self.mark_saved()
+
+    def mark_saved(self):
+        """Record journal_data as the state on disk, for unsaved_sections()"""
+        self.hash_tree.refresh(self.journal_data)
+        self.saved_digests = self.hash_tree.summary()
+
+    def unsaved_sections(self, full=False):
+        """
+        List the sections of journal_data that differ from the file as last
+        loaded or saved. Only appended, replaced and invalidated records are
+        hashed, so this is cheap enough to run before every save.
+
+        Args:
+            full: Hash every record again, so edits made in place without
+                  hash_tree.invalidate() are found too
+
+        Returns:
+            list: Section names (see JournalHashTree), empty if nothing changed
+        """
+        if self.hash_tree is None or self.saved_digests is None:
+            return ["journal"]
+        if full:
+            self.hash_tree.invalidate()
+        self.hash_tree.refresh(self.journal_data)
+        return self.hash_tree.changed_sections(self.saved_digests)
+
+    def save_current_journal(self, autosave=False):
+        """
+        Save the current journal, unless another program changed the file
+        since it was loaded. In that case offer to merge both sets of changes,
+        otherwise nothing is written. Nothing is written either if the journal
+        is the same as when it was last loaded or saved: autosaves go by the
+        incremental hash tree, other saves only skip the write once every
+        record has been hashed again.
+
+        Args:
+            autosave: The save was not asked for by the user (after a
+                      migration or archiving on load)
+
+        Returns:
+            bool: True if the journal was saved (or had nothing to save)
+        """
+        if not self.unsaved_sections() and (autosave or not self.unsaved_sections(full=True)):
+            return True
+        try:
+            if not self.journal_handle.save(self.journal_data):
+                return False
+            self.mark_saved()
+            self.record_stats()
+            return True
+        except TimeoutError as e:
+            messagebox.showerror("Error", f"{e}. Try again in a moment.")
+            return False
+        except JournalChangedError as e:
+            changed = e
+        if not messagebox.askyesno("Journal Changed",
+                f"{os.path.basename(changed.path)} was changed by another program since you loaded it.\n\n"
+                "Merge your changes with theirs? If not, the file is left as it is "
+                "and your latest change is not saved.", icon='warning'):
+            return False
+
+        base_data, disk_data = changed.base, changed.disk_data
+        assign_record_ids(base_data, self.journal_data)
+        assign_record_ids(disk_data, self.journal_data, base_data)
+        merged_data, conflicts = merge_journals(base_data, self.journal_data, disk_data)
+        if conflicts:
+            take_remote = self.resolve_conflicts(conflicts, "other program", "Last loaded")
+            if take_remote is None:
+                return False
+            merged_data, _ = merge_journals(base_data, self.journal_data, disk_data, take_remote)
+        try:
+            saved = self.journal_handle.save(merged_data, expected=changed.version)
+        except (TimeoutError, JournalChangedError) as again:
+            messagebox.showerror("Error", f"Could not save: {again}. Please try again.")
+            return False
+        if saved:
+            self.journal_data = merged_data
+            self.mark_saved()
+            self.update_all_tabs()
+        return saved
+
+    def renew_lease(self):
+        """Periodically renew the lease on the open journal"""
+        if self.journal_handle:
+            try:
+                self.journal_handle.renew()
+            except (OSError, TimeoutError) as e:
+                print(f"Warning: Could not renew journal lease: {e}")
+        self.root.after(LEASE_SECONDS * 1000 // 3, self.renew_lease)
+
+    def on_close(self):
+        """Release the journal lease and close the window"""
+        if self.journal_handle:
+            self.journal_handle.close()
+        self.root.destroy()
+
+    @timed("gui.import_updated_log")
     def import_updated_log(self):
         """Import an updated journal file and overwrite an existing one"""
         if not self.journal_data:
@@ -598,26 +1496,244 @@ class DnDJournalGUI:
         
         if not target_file:
             return  # User cancelled
-            
-        # Confirm overwrite
-        if not messagebox.askyesno("Confirm Overwrite",
-                                 f"Overwrite {os.path.basename(target_file)} with {os.path.basename(updated_file)}?"):
+
+        # Review the changes against the target before overwriting
+        is_current = os.path.abspath(target_file) == self.current_journal_path
+        try:
+            if is_current:
+                handle, target_data = self.journal_handle, self.journal_data
+            else:
+                handle = JournalHandle(target_file, "gui")
+                target_data = handle.load()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load target journal: {e}")
             return
-            
-        # Perform the overwrite
+
         try:
-            if save_journal(updated_data, target_file):
+            if holders := other_holders(target_file):
+                if not messagebox.askyesno("Journal In Use",
+                        f"{os.path.basename(target_file)} is open in: {describe_holders(holders)}\n\n"
+                        "Update it anyway? Unsaved changes there will have to be merged when that program saves.",
+                        icon='warning'):
+                    return
+
+            merged_data = self.merge_incoming(target_data, updated_data, target_file,
+                                              f"Review changes to {os.path.basename(target_file)}")
+            if merged_data is None:
+                return
+
+            # Perform the overwrite; fails if the target changed while reviewing
+            if not self.backup_before(target_file, "import"):
+                return
+            if handle.save(merged_data):
+                save_sync_base(updated_data, target_file)
                 messagebox.showinfo("Success", "Journal updated successfully")
                 
                 # If we overwrote the currently loaded file, reload it
-                if target_file == self.current_journal_path:
-                    self.journal_data = updated_data
+                if is_current:
+                    self.journal_data = merged_data
+                    self.mark_saved()
                     self.update_all_tabs()
             else:
                 messagebox.showerror("Error", "Failed to save updated journal")
+        except JournalChangedError as e:
+            messagebox.showerror("Error", f"{e} while you were reviewing. Nothing was written; please import again.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to update journal: {e}")
-    
+        finally:
+            if not is_current:
+                handle.close()
+
+    def merge_incoming(self, local_data, incoming_data, journal_path, title="Review Changes"):
+        """
+        Combine an incoming journal with local data. When a base snapshot from
+        the last export exists, local edits made since then are preserved by a
+        three-way merge and only true conflicts are shown to the user.
+
+        Returns:
+            dict: The journal to save, or None if the user cancelled
+        """
+        # Summaries of left-out history are not part of the journal
+        strip_export_keys(incoming_data)
+        base_data = load_sync_base(journal_path) if journal_path else None
+        if base_data is None:
+            return self.review_changes(local_data, incoming_data, title)
+        # Records a budgeted export left out were not removed by the AI
+        restore_omitted(incoming_data, base_data, load_sync_omitted(journal_path))
+
+        # Line up records whose ids the AI dropped (or that predate ids) with local ones
+        assign_record_ids(base_data, local_data)
+        assign_record_ids(incoming_data, local_data, base_data)
+
+        merged_data, conflicts = merge_journals(base_data, local_data, incoming_data)
+        if conflicts:
+            take_remote = self.resolve_conflicts(conflicts)
+            if take_remote is None:
+                return None
+            merged_data, _ = merge_journals(base_data, local_data, incoming_data, take_remote)
+
+        return self.review_changes(local_data, merged_data, title)
+
+    def resolve_conflicts(self, conflicts, remote="AI", base="Last export"):
+        """
+        Let the user pick the local or remote value for each merge conflict.
+
+        Args:
+            conflicts: Conflicts from merge_journals
+            remote: Name shown for the other side ("AI", "Other program")
+            base: Name shown for the common ancestor
+
+        Returns:
+            set: Ids of conflicts resolved to the remote value, or None if cancelled
+        """
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Resolve Merge Conflicts")
+        dialog.geometry("800x550")
+        dialog.transient(self.root)
+
+        ttk.Label(dialog, text=(f"{len(conflicts)} change(s) were edited both locally and by the {remote}. "
+                                "Choose which version to keep.")).pack(anchor=tk.W, padx=10, pady=5)
+
+        tree_frame = ttk.Frame(dialog)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+
+        columns = ("conflict", "keep")
+        tree = ttk.Treeview(tree_frame, columns=columns, show="headings", selectmode="extended")
+        tree.heading("conflict", text="Conflict")
+        tree.heading("keep", text="Keep")
+        tree.column("conflict", width=600, anchor=tk.W)
+        tree.column("keep", width=120, anchor=tk.W)
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        by_id = {}
+        for conflict in conflicts:
+            by_id[str(conflict["id"])] = conflict
+            tree.insert("", tk.END, iid=str(conflict["id"]), values=(describe_conflict(conflict), "Mine"))
+
+        preview = scrolledtext.ScrolledText(dialog, height=10, wrap=tk.WORD, font=('Consolas', 9))
+        preview.pack(fill=tk.X, padx=10, pady=5)
+
+        def show_preview(event=None):
+            conflict = by_id.get(tree.focus())
+            preview.config(state=tk.NORMAL)
+            preview.delete("1.0", tk.END)
+            if conflict:
+                for label, key in ((base, "base"), ("Mine", "local"), (remote, "remote")):
+                    preview.insert(tk.END, f"{label}:\n{json.dumps(conflict[key], indent=2)}\n\n")
+            preview.config(state=tk.DISABLED)
+
+        tree.bind("<<TreeviewSelect>>", show_preview)
+
+        def keep(choice):
+            for iid in tree.selection():
+                tree.set(iid, "keep", choice)
+
+        result = {"take_remote": None}
+
+        def finish():
+            result["take_remote"] = {int(iid) for iid in by_id if tree.set(iid, "keep") == remote}
+            dialog.destroy()
+
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Button(button_frame, text="Keep Mine", command=lambda: keep("Mine")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text=f"Take {remote}", command=lambda: keep(remote)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Continue", command=finish).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+
+        dialog.grab_set()
+        self.root.wait_window(dialog)
+        return result["take_remote"]
+
+    def review_changes(self, current_data, incoming_data, title="Review Changes"):
+        """
+        Show a keyed diff between two journals and let the user accept
+        individual changes.
+
+        Returns:
+            dict: The journal with the accepted changes applied, or None if cancelled
+        """
+        assign_record_ids(incoming_data, current_data)
+        changeset = diff_journals(current_data, incoming_data)
+        if not count_changes(changeset):
+            messagebox.showinfo("No Changes", "The incoming journal is identical to the current one.")
+            return None
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title(title)
+        dialog.geometry("800x600")
+        dialog.transient(self.root)
+
+        ttk.Label(dialog, text=(f"{len(changeset['added'])} added, "
+                                f"{len(changeset['removed'])} removed, "
+                                f"{len(changeset['modified'])} modified. "
+                                "Select the changes to accept.")).pack(anchor=tk.W, padx=10, pady=5)
+
+        # Hunk list
+        tree_frame = ttk.Frame(dialog)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+
+        columns = ("change", "section", "record", "fields")
+        tree = ttk.Treeview(tree_frame, columns=columns, show="headings", selectmode="extended")
+        for column, width in zip(columns, (80, 140, 300, 220)):
+            tree.heading(column, text=column.title())
+            tree.column(column, width=width, anchor=tk.W)
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        hunks = {}
+        for hunk in iter_hunks(changeset):
+            hunks[str(hunk["id"])] = hunk
+            tree.insert("", tk.END, iid=str(hunk["id"]), values=(
+                hunk["type"], hunk["section"],
+                (hunk.get("label") or hunk["key"]) if hunk["key"] is not None else "(whole section)",
+                ", ".join(hunk["fields"])))
+        tree.selection_set(list(hunks))
+
+        # Before/after preview of the focused hunk
+        preview = scrolledtext.ScrolledText(dialog, height=10, wrap=tk.WORD, font=('Consolas', 9))
+        preview.pack(fill=tk.X, padx=10, pady=5)
+
+        def show_preview(event=None):
+            hunk = hunks.get(tree.focus())
+            preview.config(state=tk.NORMAL)
+            preview.delete("1.0", tk.END)
+            if hunk:
+                preview.insert(tk.END, describe_hunk(hunk) + "\n\n")
+                if hunk["type"] != "added":
+                    preview.insert(tk.END, "Current:\n" + json.dumps(hunk["old"], indent=2) + "\n\n")
+                if hunk["type"] != "removed":
+                    preview.insert(tk.END, "Incoming:\n" + json.dumps(hunk["new"], indent=2) + "\n")
+            preview.config(state=tk.DISABLED)
+
+        tree.bind("<<TreeviewSelect>>", show_preview)
+
+        result = {"data": None}
+
+        @timed("gui.review_changes.accept")
+        def accept(selected_only):
+            accepted = {int(iid) for iid in tree.selection()} if selected_only else None
+            result["data"] = apply_changes(current_data, changeset, accepted)
+            dialog.destroy()
+
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Button(button_frame, text="Accept Selected", command=lambda: accept(True)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Accept All", command=lambda: accept(False)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Select None",
+                   command=lambda: tree.selection_remove(tree.selection())).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+
+        dialog.grab_set()
+        self.root.wait_window(dialog)
+        return result["data"]
+
+    @timed("gui.create_new_journal")
     def create_new_journal(self):
         """Create a new journal from template"""
         template_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "journal_template.json")
@@ -648,6 +1764,7 @@ class DnDJournalGUI:
             hit_dice_entry = ttk.Entry(dialog)
             hit_dice_entry.grid(row=3, column=1, padx=5, pady=5)
             
+            @timed("gui.create_new_journal.submit")
             def on_submit():
                 try:
                     journal_data = load_journal(template_path)
@@ -655,6 +1772,7 @@ class DnDJournalGUI:
                     journal_data["character"]["class"] = class_entry.get()
                     journal_data["character"]["hp"] = int(hp_entry.get())
                     journal_data["character"]["hit_dice"] = hit_dice_entry.get()
+                    migrate_journal(journal_data)
                     
                     # Create filename
                     safe_name = journal_data["character"]["name"].lower().replace(" ", "_")
@@ -663,10 +1781,14 @@ class DnDJournalGUI:
                     
                     # Save the new journal
                     os.makedirs(logs_dir, exist_ok=True)
-                    if save_journal(journal_data, filepath):
+                    handle = JournalHandle(filepath, "gui")
+                    if os.path.exists(filepath) and not messagebox.askyesno(
+                            "Confirm", f"{filename} already exists. Replace it?", icon='warning'):
+                        return
+                    if handle.save(journal_data):
                         messagebox.showinfo("Success", f"Created new journal at {filepath}")
                         self.journal_data = journal_data
-                        self.current_journal_path = filepath
+                        self.open_journal(handle)
                         self.update_all_tabs()
                         self.notebook.select(1)  # Switch to journal tab
                         dialog.destroy()
@@ -681,6 +1803,7 @@ class DnDJournalGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to create journal: {e}")
     
+    @timed("gui.add_journal_entry")
     def add_journal_entry(self):
         """Add a new journal entry"""
         if not self.journal_data:
@@ -703,7 +1826,7 @@ class DnDJournalGUI:
         
         try:
             self.journal_data = add_journal_entry(self.journal_data, entry)
-            if save_journal(self.journal_data, self.current_journal_path):
+            if self.save_current_journal():
                 messagebox.showinfo("Success", "Journal entry added")
                 self.entry_date.delete(0, tk.END)
                 self.entry_title.delete(0, tk.END)
@@ -714,6 +1837,7 @@ class DnDJournalGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to add entry: {e}")
     
+    @timed("gui.add_inventory_item")
     def add_inventory_item(self):
         """Add a new inventory item"""
         if not self.journal_data:
@@ -738,20 +1862,24 @@ class DnDJournalGUI:
         desc_entry = ttk.Entry(dialog)
         desc_entry.grid(row=2, column=1, padx=5, pady=5)
         
+        @timed("gui.add_inventory_item.submit")
         def on_submit():
             try:
-                item = {
-                    "name": name_entry.get(),
-                    "quantity": int(quantity_entry.get()),
-                    "description": desc_entry.get()
-                }
+                name = name_entry.get().strip()
+                if not name:
+                    messagebox.showwarning("Warning", "Please enter an item name")
+                    return
+                item, stacked = self.get_inventory().add(name, int(quantity_entry.get()), desc_entry.get())
+                if self.model:
+                    self.model.invalidate("inventory")  # Stacking edits an item in place
+                if self.hash_tree:
+                    self.hash_tree.invalidate("inventory", item.get("id"))
                 
-                inventory = self.journal_data.get("inventory", [])
-                inventory.append(item)
-                self.journal_data["inventory"] = inventory
-                
-                if save_journal(self.journal_data, self.current_journal_path):
-                    messagebox.showinfo("Success", "Item added to inventory")
+                if self.save_current_journal():
+                    if stacked:
+                        messagebox.showinfo("Success", f"Stacked onto existing {item['name']} (now x{item['quantity']})")
+                    else:
+                        messagebox.showinfo("Success", "Item added to inventory")
                     self.update_inventory_list()
                     dialog.destroy()
                 else:
@@ -761,6 +1889,7 @@ class DnDJournalGUI:
         
         ttk.Button(dialog, text="Add", command=on_submit).grid(row=3, column=1, sticky=tk.E, padx=5, pady=5)
     
+    @timed("gui.remove_inventory_item")
     def remove_inventory_item(self):
         """Remove selected inventory item"""
         if not self.journal_data:
@@ -773,20 +1902,49 @@ class DnDJournalGUI:
             return
             
         idx = selection[0]
-        inventory = self.journal_data.get("inventory", [])
+        inventory = self.get_inventory()
         
-        if 0 <= idx < len(inventory):
-            item_name = inventory[idx].get("name", "item")
-            if messagebox.askyesno("Confirm", f"Remove {item_name} from inventory?"):
-                inventory.pop(idx)
-                self.journal_data["inventory"] = inventory
-                
-                if save_journal(self.journal_data, self.current_journal_path):
-                    messagebox.showinfo("Success", "Item removed from inventory")
-                    self.update_inventory_list()
-                else:
-                    messagebox.showerror("Error", "Failed to save inventory")
+        if 0 <= idx < len(inventory.items):
+            item = inventory.items[idx]
+            item_name = item.get("name", "item") if isinstance(item, dict) else str(item)
+            quantity = item.get("quantity", 1) if isinstance(item, dict) else 1
+            key = inventory.key_at(idx)
+            
+            if isinstance(quantity, int) and quantity > 1:
+                amount = simpledialog.askinteger("Remove Item", f"How many {item_name} to remove?",
+                                                 parent=self.root, initialvalue=quantity,
+                                                 minvalue=1, maxvalue=quantity)
+                if amount is None:
+                    return
+                inventory.consume(None, amount, key=key)
+            elif messagebox.askyesno("Confirm", f"Remove {item_name} from inventory?"):
+                inventory.remove(None, key=key)
+            else:
+                return
+            if self.model:
+                self.model.invalidate("inventory")
+            if self.hash_tree:
+                self.hash_tree.invalidate("inventory", item.get("id") if isinstance(item, dict) else None)
+            
+            if self.save_current_journal():
+                messagebox.showinfo("Success", "Inventory updated")
+                self.update_inventory_list()
+            else:
+                messagebox.showerror("Error", "Failed to save inventory")
+    
+    def get_inventory(self):
+        """
+        Get the name-indexed inventory store for the current journal,
+        re-indexing only if the inventory list was replaced (load, import).
+        
+        Returns:
+            Inventory: Store wrapping journal_data["inventory"]
+        """
+        if self.inventory is None or self.inventory.items is not self.journal_data.get("inventory"):
+            self.inventory = Inventory(self.journal_data)
+        return self.inventory
     
+    @timed("gui.add_quest")
     def add_quest(self):
         """Add a new quest"""
         if not self.journal_data:
@@ -816,6 +1974,7 @@ class DnDJournalGUI:
         date_entry = ttk.Entry(dialog)
         date_entry.grid(row=3, column=1, padx=5, pady=5)
         
+        @timed("gui.add_quest.submit")
         def on_submit():
             try:
                 quest = {
@@ -825,11 +1984,9 @@ class DnDJournalGUI:
                     "started": date_entry.get() if date_entry.get() else None
                 }
                 
-                quests = self.journal_data.get("quests", {"active": [], "completed": [], "rumors": []})
-                quests["active"].append(quest)
-                self.journal_data["quests"] = quests
+                self.get_quest_log().add("active", quest)
                 
-                if save_journal(self.journal_data, self.current_journal_path):
+                if self.save_current_journal():
                     messagebox.showinfo("Success", "Quest added")
                     self.update_quests_lists()
                     dialog.destroy()
@@ -840,6 +1997,7 @@ class DnDJournalGUI:
         
         ttk.Button(dialog, text="Add Quest", command=on_submit).grid(row=4, column=1, sticky=tk.E, padx=5, pady=5)
     
+    @timed("gui.complete_quest")
     def complete_quest(self):
         """Mark selected quest as completed and record milestone"""
         if not self.journal_data:
@@ -860,11 +2018,13 @@ class DnDJournalGUI:
             }
             
         idx = selection[0]
-        quests = self.journal_data.get("quests", {"active": [], "completed": [], "rumors": []})
+        quest_log = self.get_quest_log()
+        active = quest_log.view("active")
         
-        if 0 <= idx < len(quests["active"]):
-            quest = quests["active"][idx]
-            quest_title = quest.get("title", "Unnamed quest")
+        if 0 <= idx < len(active) and isinstance(active[idx], dict):
+            # Address the quest by id so the dialog acts on it even if the list changes meanwhile
+            quest_id = active[idx]["id"]
+            quest_title = active[idx].get("title", "Unnamed quest")
             
             dialog = tk.Toplevel(self.root)
             dialog.title("Complete Quest")
@@ -874,23 +2034,18 @@ class DnDJournalGUI:
             date_entry = ttk.Entry(dialog)
             date_entry.pack(padx=10, pady=5)
             
+            @timed("gui.complete_quest.submit")
             def on_submit():
                 try:
-                    completed_quest = quests["active"].pop(idx)
-                    completed_quest["completed_date"] = date_entry.get() if date_entry.get() else None
-                    quests["completed"].append(completed_quest)
-                    self.journal_data["quests"] = quests
+                    quest_log = self.get_quest_log()
+                    completed_quest = quest_log.move(quest_id, "completed", date_entry.get() or None)
+                    quest_log.commit()
                     
-                    # Record milestone
-                    milestone = {
-                        "type": "quest_completed",
-                        "quest": quest_title,
-                        "timestamp": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-                        "completion_date": completed_quest.get("completed_date")
-                    }
-                    self.journal_data["_meta"]["milestones"].append(milestone)
+                    # Record milestone with a snapshot of the campaign state
+                    record_milestone(self.journal_data, self.current_journal_path, "quest_completed",
+                                     quest=quest_title, completion_date=completed_quest.get("completed_date"))
                     
-                    if save_journal(self.journal_data, self.current_journal_path):
+                    if self.save_current_journal():
                         messagebox.showinfo("Success",
                             f"Quest '{quest_title}' completed\n"
                             f"Milestone recorded for AI sync")
@@ -903,6 +2058,164 @@ class DnDJournalGUI:
             
             ttk.Button(dialog, text="Complete", command=on_submit).pack(padx=10, pady=10)
     
+    @timed("gui.accept_rumor")
+    def accept_rumor(self):
+        """Turn the selected rumor into an active quest"""
+        if not self.journal_data:
+            messagebox.showwarning("Warning", "Please load or create a journal first")
+            return
+            
+        selection = self.rumors.curselection()
+        if not selection:
+            messagebox.showwarning("Warning", "Please select a rumor to follow up")
+            return
+            
+        quest_log = self.get_quest_log()
+        rumors = quest_log.view("rumors")
+        idx = selection[0]
+        if not (0 <= idx < len(rumors) and isinstance(rumors[idx], dict)):
+            return
+        rumor = rumors[idx]
+        if not messagebox.askyesno("Confirm", f"Start a quest from '{rumor.get('title', 'Unnamed rumor')}'?"):
+            return
+            
+        try:
+            fields = {"giver": rumor["source"]} if rumor.get("source") and not rumor.get("giver") else {}
+            quest_log.move(rumor["id"], "active", **fields)
+            quest_log.commit()
+            if self.save_current_journal():
+                self.update_quests_lists()
+            else:
+                messagebox.showerror("Error", "Failed to save quest")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to accept rumor: {e}")
+
+    @timed("gui.simulate_encounter")
+    def simulate_encounter(self):
+        """Simulate a fight against described enemies; the result can be attached to the selected quest"""
+        if not self.journal_data:
+            messagebox.showwarning("Warning", "Please load or create a journal first")
+            return
+
+        # The selected active or completed quest, if any, can receive the result
+        quest_log = self.get_quest_log()
+        quest_id = quest_title = None
+        for listbox, status in ((self.active_quests, "active"), (self.completed_quests, "completed")):
+            selection = listbox.curselection()
+            quests = quest_log.view(status)
+            if selection and 0 <= selection[0] < len(quests) and isinstance(quests[selection[0]], dict):
+                quest_id = quests[selection[0]]["id"]
+                quest_title = quests[selection[0]].get("title", "Unnamed quest")
+                break
+
+        hero = character_combatant(self.journal_data.get("character", {}))
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Simulate Encounter")
+        dialog.geometry("520x320")
+
+        ttk.Label(dialog, text=f"{hero['name']}: HP {hero['hp']}, AC {hero['ac']}, "
+                               f"{hero['attacks']} x {hero['damage']} at {hero['attack_bonus']:+d}"
+                               f"{', Second Wind' if hero['second_wind'] else ''}").pack(anchor=tk.W, padx=10, pady=5)
+        ttk.Label(dialog, text="Enemies (e.g. goblin x3 hp7 ac15 +4 1d6+2; bugbear hp27 ac16 +4 2d8+2):").pack(anchor=tk.W, padx=10)
+        enemies_entry = ttk.Entry(dialog, width=60)
+        enemies_entry.insert(0, "goblin x3 hp7 ac15 +4 1d6+2")
+        enemies_entry.pack(fill=tk.X, padx=10, pady=5)
+
+        trials_frame = ttk.Frame(dialog)
+        trials_frame.pack(fill=tk.X, padx=10)
+        ttk.Label(trials_frame, text="Fights:").pack(side=tk.LEFT)
+        trials_var = tk.StringVar(value=str(DEFAULT_TRIALS))
+        ttk.Spinbox(trials_frame, from_=1000, to=1000000, increment=10000, width=10,
+                    textvariable=trials_var).pack(side=tk.LEFT, padx=5)
+
+        result_var = tk.StringVar(value="")
+        ttk.Label(dialog, textvariable=result_var, justify=tk.LEFT, wraplength=490).pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=5)
+        last_run = {}
+
+        @timed("gui.simulate_encounter.run")
+        def run():
+            try:
+                enemies = parse_enemies(enemies_entry.get())
+                trials = int(trials_var.get())
+                if not 1 <= trials <= 1000000:
+                    raise ValueError("Fights must be between 1 and 1,000,000")
+            except ValueError as e:
+                messagebox.showerror("Error", str(e), parent=dialog)
+                return
+            description = enemies_entry.get().strip()
+            run_button.config(state=tk.DISABLED)
+            attach_button.config(state=tk.DISABLED)
+            result_var.set(f"Simulating {trials:,} fights...")
+            outcome = {}
+
+            def work():
+                # Worker processes do the simulating; this thread only waits so the window stays responsive
+                try:
+                    outcome["result"] = simulate(hero, enemies, trials)
+                except Exception as e:
+                    outcome["error"] = e
+
+            def poll():
+                if not dialog.winfo_exists():
+                    return
+                if thread.is_alive():
+                    dialog.after(100, poll)
+                    return
+                run_button.config(state=tk.NORMAL)
+                if "error" in outcome:
+                    result_var.set(f"Simulation failed: {outcome['error']}")
+                    return
+                last_run.update(description=description, result=outcome["result"])
+                result_var.set(describe_encounter(outcome["result"], hero))
+                if quest_id:
+                    attach_button.config(state=tk.NORMAL)
+
+            thread = threading.Thread(target=work, daemon=True)
+            thread.start()
+            poll()
+
+        @timed("gui.simulate_encounter.attach")
+        def attach():
+            quest = self.get_quest_log().get(quest_id)
+            if quest is None:
+                messagebox.showerror("Error", "The quest no longer exists", parent=dialog)
+                return
+            attach_to_quest(quest, last_run["description"], hero, last_run["result"])
+            section = f"quests.{self.get_quest_log().status(quest_id)}"
+            if self.model:
+                self.model.invalidate(section)
+            if self.hash_tree:
+                self.hash_tree.invalidate(section, quest_id)
+            if self.save_current_journal():
+                attach_button.config(state=tk.DISABLED)
+                messagebox.showinfo("Success", f"Result added to the log of '{quest_title}'", parent=dialog)
+            else:
+                messagebox.showerror("Error", "Failed to save quest", parent=dialog)
+
+        run_button = ttk.Button(button_frame, text="Run", command=run)
+        run_button.pack(side=tk.LEFT, padx=5)
+        attach_button = ttk.Button(button_frame, text=f"Attach to '{quest_title}'" if quest_id else "Attach to Quest",
+                                   command=attach, state=tk.DISABLED)
+        attach_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+
+    def get_quest_log(self):
+        """
+        Get the id-keyed quest index for the current journal,
+        re-indexing only if the quests section was replaced (load, import).
+        
+        Returns:
+            QuestLog: Index over journal_data["quests"]
+        """
+        if self.quest_log is None or self.quest_log.quests is not self.journal_data.get("quests"):
+            self.quest_log = QuestLog(self.journal_data)
+        return self.quest_log
+    
+    @timed("gui.add_rumor")
     def add_rumor(self):
         """Add a new rumor"""
         if not self.journal_data:
@@ -932,6 +2245,7 @@ class DnDJournalGUI:
         date_entry = ttk.Entry(dialog)
         date_entry.grid(row=3, column=1, padx=5, pady=5)
         
+        @timed("gui.add_rumor.submit")
         def on_submit():
             try:
                 rumor = {
@@ -941,11 +2255,9 @@ class DnDJournalGUI:
                     "heard_date": date_entry.get() if date_entry.get() else None
                 }
                 
-                quests = self.journal_data.get("quests", {"active": [], "completed": [], "rumors": []})
-                quests["rumors"].append(rumor)
-                self.journal_data["quests"] = quests
+                self.get_quest_log().add("rumors", rumor)
                 
-                if save_journal(self.journal_data, self.current_journal_path):
+                if self.save_current_journal():
                     messagebox.showinfo("Success", "Rumor added")
                     self.update_quests_lists()
                     dialog.destroy()
@@ -956,6 +2268,7 @@ class DnDJournalGUI:
         
         ttk.Button(dialog, text="Add Rumor", command=on_submit).grid(row=4, column=1, sticky=tk.E, padx=5, pady=5)
     
+    @timed("gui.save_character")
     def save_character(self):
         """Save character changes"""
         if not self.journal_data:
@@ -981,9 +2294,14 @@ class DnDJournalGUI:
             if mental_notes:
                 self.journal_data["mental_state"] = {"notes": [mental_notes]}
             
+            previous_level = self.journal_data.get("character", {}).get("level", 1)
             self.journal_data["character"] = character
             
-            if save_journal(self.journal_data, self.current_journal_path):
+            if isinstance(previous_level, int) and character["level"] > previous_level:
+                record_milestone(self.journal_data, self.current_journal_path, "level_up",
+                                 level=character["level"])
+            
+            if self.save_current_journal():
                 messagebox.showinfo("Success", "Character saved")
             else:
                 messagebox.showerror("Error", "Failed to save character")
@@ -997,8 +2315,10 @@ class DnDJournalGUI:
         
         from datetime import datetime
         self.journal_data["_meta"]["last_ai_sync"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        record_milestone(self.journal_data, self.current_journal_path, "ai_sync")
         self.update_sync_status()
 
+    @timed("gui.import_journal")
     def import_journal(self):
         """Import a journal file"""
         if not self.journal_data:
@@ -1017,9 +2337,15 @@ class DnDJournalGUI:
             imported_data = load_journal(filepath)
             cleaned_data = clean_journal_data(imported_data)
             
-            # Confirm overwrite
-            if messagebox.askyesno("Confirm", "Replace current journal with imported data?"):
-                self.journal_data = cleaned_data
+            # Let the user pick which changes to take
+            merged_data = self.merge_incoming(self.journal_data, cleaned_data,
+                                              self.current_journal_path, "Review Imported Journal")
+            if merged_data is not None:
+                if not self.backup_before(self.current_journal_path, "import"):
+                    return
+                self.journal_data = merged_data
+                if self.current_journal_path:
+                    save_sync_base(cleaned_data, self.current_journal_path)
                 self.record_sync()
                 self.update_all_tabs()
                 messagebox.showinfo("Success",
@@ -1028,6 +2354,7 @@ class DnDJournalGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to import journal: {e}")
     
+    @timed("gui.export_journal")
     def export_journal(self):
         """Export current journal"""
         if not self.journal_data:
@@ -1046,6 +2373,9 @@ class DnDJournalGUI:
         try:
             cleaned_data = clean_journal_data(self.journal_data)
             if save_journal(cleaned_data, filepath):
+                # Keep what the AI was given so the import can be merged against it
+                if self.current_journal_path:
+                    save_sync_base(cleaned_data, self.current_journal_path, self.sync_digests())
                 self.record_sync()
                 messagebox.showinfo("Success",
                     f"Journal exported to {filepath}\n"
@@ -1055,6 +2385,200 @@ class DnDJournalGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export journal: {e}")
     
+    @timed("gui.export_book")
+    def export_book(self):
+        """Export the whole campaign as a readable Markdown or HTML book"""
+        if not self.journal_data:
+            messagebox.showwarning("Warning", "No journal data to export")
+            return
+
+        filepath = filedialog.asksaveasfilename(
+            title="Export Campaign Book As",
+            defaultextension=".html",
+            filetypes=[("HTML files", "*.html"), ("Markdown files", "*.md")]
+        )
+
+        if not filepath:
+            return
+
+        try:
+            report = export_book(self.journal_data, filepath, self.current_journal_path)
+            messagebox.showinfo("Success",
+                f"Campaign book exported to {filepath}\n"
+                f"{report['chapters']} chapters ({len(report['rendered'])} rendered, {report['reused']} unchanged)")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export book: {e}")
+
+    @timed("gui.export_budgeted")
+    def export_budgeted(self):
+        """Export a minified journal trimmed to fit an AI token budget"""
+        if not self.journal_data:
+            messagebox.showwarning("Warning", "No journal data to export")
+            return
+
+        budget = simpledialog.askinteger("Token Budget", "Maximum tokens to spend on the journal:",
+                                         initialvalue=DEFAULT_TOKEN_BUDGET, minvalue=500, parent=self.root)
+        if not budget:
+            return
+
+        filepath = filedialog.asksaveasfilename(
+            title="Export Journal As",
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json")]
+        )
+
+        if not filepath:
+            return
+
+        try:
+            payload, report = build_budgeted_export(self.journal_data, budget)
+            if not save_journal(payload, filepath, compact=True):
+                messagebox.showerror("Error", "Failed to export journal")
+                return
+            # The base is the whole journal; the next delta and import skip what was left out
+            if self.current_journal_path:
+                save_sync_base(clean_journal_data(self.journal_data), self.current_journal_path,
+                               self.sync_digests(), report["omitted"])
+            self.record_sync()
+
+            report_win = tk.Toplevel(self.root)
+            report_win.title("Budgeted Export Report")
+            report_win.geometry("600x500")
+            text = scrolledtext.ScrolledText(report_win, wrap=tk.WORD)
+            text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            text.insert(tk.END, f"Exported to {filepath}\n")
+            text.insert(tk.END, f"Estimated tokens: {report['estimated_tokens']} of {report['budget']}\n\n")
+            text.insert(tk.END, "Included records:\n")
+            for section, count in report["included"].items():
+                text.insert(tk.END, f"- {section}: {count}\n")
+            text.insert(tk.END, f"\nSummarized ({len(report['summarized'])}):\n")
+            text.insert(tk.END, "".join(f"- {record}\n" for record in report["summarized"]))
+            text.insert(tk.END, f"\nDropped ({len(report['dropped'])}):\n")
+            text.insert(tk.END, "".join(f"- {record}\n" for record in report["dropped"]))
+            text.config(state=tk.DISABLED)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export journal: {e}")
+
+    @timed("gui.export_delta")
+    def export_delta(self):
+        """Export only what changed since the last AI sync"""
+        if not self.journal_data or not self.current_journal_path:
+            messagebox.showwarning("Warning", "No journal data to export")
+            return
+
+        base_data = load_sync_base(self.current_journal_path)
+        if base_data is None:
+            messagebox.showwarning("Warning",
+                "No previous sync found for this journal.\n"
+                "Use Export Journal for the first handoff to the AI.")
+            return
+
+        # Only diff the sections that changed since the digests stored at the last export
+        digests = load_sync_digests(self.current_journal_path)
+        sections = None
+        if digests is not None and self.hash_tree is not None:
+            self.hash_tree.refresh(self.journal_data)
+            sections = self.hash_tree.changed_sections(digests)
+
+        # Entries archived since the last sync were moved, not deleted
+        base_data = without_archived(self.current_journal_path, base_data)
+        cleaned_data = clean_journal_data(self.journal_data)
+        assign_record_ids(base_data, cleaned_data)
+        delta = make_delta(base_data, cleaned_data, sections)
+        if not delta["changes"]:
+            messagebox.showinfo("No Changes", "Nothing has changed since the last sync.")
+            return
+
+        filepath = filedialog.asksaveasfilename(
+            title="Export Changes As",
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json")]
+        )
+
+        if not filepath:
+            return
+
+        try:
+            if save_journal(delta, filepath):
+                save_sync_base(cleaned_data, self.current_journal_path, self.sync_digests())
+                self.record_sync()
+                messagebox.showinfo("Success",
+                    f"{len(delta['changes'])} change(s) exported to {filepath}\n"
+                    f"Sync recorded at: {self.journal_data['_meta'].get('last_ai_sync')}")
+            else:
+                messagebox.showerror("Error", "Failed to export changes")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export changes: {e}")
+
+    def sync_digests(self):
+        """Section digests of journal_data to store with the sync base on export"""
+        if self.hash_tree is None:
+            return None
+        self.hash_tree.refresh(self.journal_data)
+        return self.hash_tree.summary()
+
+    @timed("gui.import_delta")
+    def import_delta(self):
+        """Apply a change document returned by the AI to the current journal"""
+        if not self.journal_data:
+            messagebox.showwarning("Warning", "Please load or create a journal first")
+            return
+
+        filepath = filedialog.askopenfilename(
+            title="Select AI Changes to Import",
+            filetypes=[("JSON files", "*.json")]
+        )
+
+        if not filepath:
+            return
+
+        try:
+            delta = load_journal(filepath)
+            changes = delta.get("changes", []) if isinstance(delta, dict) else delta
+            if not isinstance(changes, list) or not changes:
+                messagebox.showwarning("Warning", "The selected file contains no changes.")
+                return
+
+            counts = {}
+            for change in changes:
+                op = change.get("op", "?") if isinstance(change, dict) else "?"
+                counts[op] = counts.get(op, 0) + 1
+            summary = ", ".join(f"{count} {op}" for op, count in counts.items())
+            if not messagebox.askyesno("Confirm", f"Apply {len(changes)} change(s) ({summary}) to the current journal?"):
+                return
+            if not self.backup_before(self.current_journal_path, "import"):
+                return
+
+            applied, errors = apply_delta(self.journal_data, delta)
+            assign_record_ids(self.journal_data)
+            # Changes are applied to records in place
+            if self.model:
+                self.model.invalidate()
+            if self.hash_tree:
+                self.hash_tree.invalidate()
+            self.inventory = None
+            self.quest_log = None
+
+            # Advance the sync base by the same changes so the next delta stays small
+            base_data = load_sync_base(self.current_journal_path)
+            if base_data is not None:
+                apply_delta(base_data, delta)
+                assign_record_ids(base_data, self.journal_data)
+                save_sync_base(base_data, self.current_journal_path)
+
+            self.record_sync()
+            if not self.save_current_journal():
+                messagebox.showerror("Error", "Failed to save journal")
+                return
+            self.update_all_tabs()
+
+            message = f"Applied {applied} change(s)"
+            if errors:
+                message += f"\n\n{len(errors)} change(s) could not be applied:\n" + "\n".join(errors[:10])
+            messagebox.showinfo("Import Complete", message)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to import changes: {e}")
+
     def update_sync_status(self):
         """Update the sync status display"""
         if not self.journal_data or "_meta" not in self.journal_data:
@@ -1069,6 +2593,7 @@ class DnDJournalGUI:
         else:
             self.sync_var.set("Never synced")
 
+    @timed("gui.update_all_tabs")
     def update_all_tabs(self):
         """Update all tabs with current journal data"""
         if not self.journal_data:
@@ -1083,7 +2608,11 @@ class DnDJournalGUI:
             }
             
         self.update_sync_status()
-            
+        
+        # The typed model, inventory and quest indexes are kept: section_records(),
+        # get_inventory() and get_quest_log() only redo what was replaced or invalidated
+        self.record_stats()
+
         # Update character tab
         character = self.journal_data.get("character", {})
         self.char_name.delete(0, tk.END)
@@ -1096,6 +2625,7 @@ class DnDJournalGUI:
         self.char_hp.insert(0, character.get("hp", 0))
         self.char_hit_dice.delete(0, tk.END)
         self.char_hit_dice.insert(0, character.get("hit_dice", ""))
+        self.update_level_up_hp()
         
         # Update currency
         currency = character.get("currency", {"gp": 0, "sp": 0, "cp": 0})
@@ -1121,37 +2651,52 @@ class DnDJournalGUI:
         # Update quests
         self.update_quests_lists()
     
+    @timed("gui.update_journal_entries")
     def update_journal_entries(self):
         """Update the recent journal entries display"""
         self.recent_entries.config(state=tk.NORMAL)
         self.recent_entries.delete(1.0, tk.END)
         
-        entries = self.journal_data.get("journal_log", [])
-        for entry in entries[-5:]:  # Show last 5 entries
-            if isinstance(entry, dict):
-                date = entry.get("date", "Unknown date")
-                title = entry.get("title", "Untitled entry")
-                content = entry.get("content", "")
-                
-                self.recent_entries.insert(tk.END, f"[{date}] {title}\n")
-                if content:
-                    self.recent_entries.insert(tk.END, f"{content[:100]}...\n\n" if len(content) > 100 else f"{content}\n\n")
+        for entry in self.section_records("journal_log")[-5:]:  # Show last 5 entries
+            content = entry.get("content")
+            
+            self.recent_entries.insert(tk.END, f"[{entry.get('date')}] {entry.get('title')}\n")
+            if content:
+                self.recent_entries.insert(tk.END, f"{content[:100]}...\n\n" if len(content) > 100 else f"{content}\n\n")
         
         self.recent_entries.config(state=tk.DISABLED)
     
+    @timed("gui.update_inventory_list")
     def update_inventory_list(self):
         """Update the inventory list display"""
         self.inventory_listbox.delete(0, tk.END)
         
-        inventory = self.journal_data.get("inventory", [])
-        for item in inventory:
-            if isinstance(item, dict):
-                name = item.get("name", "Unknown item")
-                quantity = item.get("quantity", 1)
-                self.inventory_listbox.insert(tk.END, f"{name} (x{quantity})")
+        for item in self.section_records("inventory"):
+            if item.raw is MISSING:
+                self.inventory_listbox.insert(tk.END, f"{item.get('name')} (x{item.get('quantity')})")
             else:
-                self.inventory_listbox.insert(tk.END, str(item))
+                self.inventory_listbox.insert(tk.END, item.name)
+    
+    def section_records(self, section):
+        """
+        Get the typed records of a list section, converting any records
+        added since the last refresh.
+        
+        Args:
+            section: Section path, e.g. "inventory" or "quests.active"
+            
+        Returns:
+            list: Record objects from models.py
+        """
+        if not self.journal_data:
+            return []
+        if self.model is None:
+            self.model = JournalModel.from_dict(self.journal_data, live=True)
+        else:
+            self.model.refresh(self.journal_data, section)
+        return self.model.records(section)
     
+    @timed("gui.show_quest_details")
     def show_quest_details(self, quest_type, index):
         """Show detailed view of a quest"""
         quest = self.journal_data.get("quests", {}).get(quest_type, [])[index]
@@ -1177,6 +2722,7 @@ class DnDJournalGUI:
         details.insert(tk.END, text)
         details.config(state=tk.DISABLED)
         
+    @timed("gui.update_quests_lists")
     def update_quests_lists(self):
         """Update the quests lists display"""
         if not hasattr(self, 'active_quests'):
@@ -1189,33 +2735,44 @@ class DnDJournalGUI:
         if not self.journal_data:
             return
             
-        quests = self.journal_data.get("quests", {})
-        print(f"DEBUG: Updating quests with {len(quests.get('active', []))} active, {len(quests.get('completed', []))} completed")  # Debug logging
-        
         # Active quests
-        for quest in quests.get("active", []):
-            title = quest.get("title", "Unnamed quest") if isinstance(quest, dict) else str(quest)
-            self.active_quests.insert(tk.END, title)
+        for quest in self.section_records("quests.active"):
+            self.active_quests.insert(tk.END, quest.get("title"))
         
         # Completed quests
-        for quest in quests.get("completed", []):
-            title = quest.get("title", "Unnamed quest") if isinstance(quest, dict) else str(quest)
-            self.completed_quests.insert(tk.END, title)
+        for quest in self.section_records("quests.completed"):
+            self.completed_quests.insert(tk.END, quest.get("title"))
         
         # Rumors
-        for rumor in quests.get("rumors", []):
-            title = rumor.get("title", "Unnamed rumor") if isinstance(rumor, dict) else str(rumor)
-            self.rumors.insert(tk.END, title)
+        for rumor in self.section_records("quests.rumors"):
+            self.rumors.insert(tk.END, rumor.get("title"))
         
         # Bind double-click to show details with selection check
         self.active_quests.bind("<Double-1>", lambda e: self.show_quest_details("active", self.active_quests.curselection()[0]) if self.active_quests.curselection() else None)
         self.completed_quests.bind("<Double-1>", lambda e: self.show_quest_details("completed", self.completed_quests.curselection()[0]) if self.completed_quests.curselection() else None)
         self.rumors.bind("<Double-1>", lambda e: self.show_quest_details("rumors", self.rumors.curselection()[0]) if self.rumors.curselection() else None)
 
-def main():
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="D&D Solo Journal")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile every GUI callback and save slow ones to logs/profiles/")
+    parser.add_argument("--profile-threshold", type=float, default=DEFAULT_THRESHOLD_MS,
+                        help="save profiles of callbacks taking more than this many ms of CPU time")
+    args = parser.parse_args(argv)
+    
+    profiler = None
+    if args.profile:
+        profiler = SessionProfiler(args.profile_threshold)
+        install_tk_profiler(profiler)
+    
     root = tk.Tk()
     app = DnDJournalGUI(root)
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        if profiler:
+            profiler.write_summary()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# ingest.py – Bulk validation, repair and indexing of a directory of journals
+# Every journal in the directory is handled by a worker process:
+# - parsed, with the line and column of any JSON error
+# - upgraded to the current schema (migrations.migrate_journal)
+# - cleaned of empty and null fields (utils.clean_journal_data, see repair_journal)
+# - checked for problems that cannot be repaired automatically
+# - written back if anything changed, after a backup in logs/backups/
+# Files that cannot be read as a journal are moved to <dir>/quarantine/
+# instead of stopping the run. The summary of every good journal (character,
+# level, record counts, last sync) is written to <dir>/ingest/index.json and
+# the per-file report with timings to <dir>/ingest/report.json.
+#   python3 ingest.py                      # ingest all journals in logs/
+#   python3 ingest.py --dry-run            # report without changing any files
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from utils import clean_journal_data, list_json_files
+from journal_diff import RECORD_SECTIONS, get_path
+from migrations import migrate_journal, backup_before_migration, get_version, normalize_sections
+from locking import JournalHandle, JournalChangedError
+from metrics import count_records
+
+def get_quarantine_dir(logs_dir):
+    """Get the folder broken journals are moved to."""
+    return os.path.join(logs_dir, "quarantine")
+
+def get_ingest_dir(logs_dir):
+    """Get the folder the index and report are written to."""
+    return os.path.join(logs_dir, "ingest")
+
+def repair_journal(data):
+    """
+    Clean a migrated journal for storage. clean_journal_data() is meant for
+    exports: it drops empty sections and leaves None placeholders in required
+    fields, so the section types and placeholders are restored afterwards.
+
+    Args:
+        data: Journal data as a dictionary (not modified)
+
+    Returns:
+        dict: Cleaned journal data
+    """
+    cleaned = clean_journal_data(data)
+    normalize_sections(cleaned)
+    character = cleaned["character"]
+    for field in ("name", "class", "level"):
+        if character.get(field) is None:
+            character.pop(field, None)
+    meta = cleaned["_meta"]
+    meta["version"] = get_version(data)
+    if not isinstance(meta.get("milestones"), list):
+        meta["milestones"] = []
+    return cleaned
+
+def validate_journal(data):
+    """
+    Check a (migrated) journal for problems that are not repaired automatically.
+
+    Args:
+        data: Journal data as a dictionary
+
+    Returns:
+        list: Problem descriptions, empty if the journal is fine
+    """
+    problems = []
+    character = data.get("character", {})
+    if not character.get("name"):
+        problems.append("character: no name")
+    if not isinstance(character.get("level", 1), int):
+        problems.append(f"character: level {character.get('level')!r} is not a number")
+    for field in ("hp", "max_hp"):
+        if field in character and not isinstance(character[field], (int, float)):
+            problems.append(f"character: {field} {character[field]!r} is not a number")
+
+    seen = {}
+    for section in RECORD_SECTIONS:
+        records = get_path(data, section)
+        if not isinstance(records, list):
+            continue
+        for position, record in enumerate(records):
+            record_id = record.get("id") if isinstance(record, dict) else None
+            if not record_id:
+                problems.append(f"{section}[{position}]: no id")
+            elif record_id in seen:
+                problems.append(f"{section}[{position}]: id {record_id} also used in {seen[record_id]}")
+            else:
+                seen[record_id] = section
+    return problems
+
+def summarize_journal(data):
+    """
+    Build the index entry of a journal.
+
+    Returns:
+        dict: Character name, class and level, record counts, version and last sync
+    """
+    character = data.get("character", {})
+    quests = data.get("quests", {})
+    meta = data.get("_meta", {})
+    return {
+        "character": character.get("name"),
+        "class": character.get("class"),
+        "level": character.get("level"),
+        "entries": len(data.get("journal_log", [])),
+        "items": len(data.get("inventory", [])),
+        "active_quests": len(quests.get("active", [])),
+        "completed_quests": len(quests.get("completed", [])),
+        "npcs": len(data.get("npcs", [])),
+        "version": get_version(data),
+        "last_ai_sync": meta.get("last_ai_sync"),
+        "milestones": len(meta.get("milestones") or []),
+    }
+
+def quarantine_file(filepath):
+    """
+    Move a broken journal out of the journal folder.
+
+    Returns:
+        str: New path of the file
+    """
+    quarantine_dir = get_quarantine_dir(os.path.dirname(os.path.abspath(filepath)))
+    os.makedirs(quarantine_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    target = os.path.join(quarantine_dir, f"{timestamp}_{os.path.basename(filepath)}")
+    shutil.move(filepath, target)
+    try:
+        os.remove(filepath + ".lock")
+    except OSError:
+        pass
+    return target
+
+def ingest_file(filepath, dry_run=False):
+    """
+    Validate, repair and summarize one journal file.
+
+    Args:
+        filepath: Path to the journal file
+        dry_run: Report only; do not write, back up or quarantine anything
+
+    Returns:
+        dict: {"file", "status", "error", "line", "column", "applied",
+               "cleaned", "problems", "summary", "quarantined_to", "timings_ms"}
+               with status "ok", "repaired", "quarantined" or "failed"
+    """
+    result = {"file": filepath, "status": "ok", "error": None, "line": None, "column": None,
+              "applied": [], "cleaned": False, "problems": [], "summary": None,
+              "quarantined_to": None, "timings_ms": {}}
+    timings = result["timings_ms"]
+    started = time.perf_counter()
+
+    def lap(phase):
+        nonlocal started
+        now = time.perf_counter()
+        timings[phase] = round((now - started) * 1000, 2)
+        started = now
+
+    handle = JournalHandle(filepath, "ingest")
+    try:
+        try:
+            data = handle.load()
+            lap("load")
+            if not isinstance(data, dict):
+                raise ValueError(f"expected a journal object, found a JSON {type(data).__name__}")
+        except json.JSONDecodeError as e:
+            result.update(error=e.msg, line=e.lineno, column=e.colno)
+        except (UnicodeDecodeError, ValueError) as e:
+            result["error"] = str(e)
+        if result["error"]:
+            result["status"] = "quarantined"
+            if not dry_run:
+                result["quarantined_to"] = quarantine_file(filepath)
+            return result
+
+        result["applied"] = migrate_journal(data)
+        lap("migrate")
+        cleaned = repair_journal(data)
+        result["cleaned"] = json.dumps(cleaned, sort_keys=True) != json.dumps(data, sort_keys=True)
+        lap("clean")
+        result["problems"] = validate_journal(cleaned)
+        result["summary"] = summarize_journal(cleaned)
+        result["summary"]["records"] = count_records(cleaned)
+        lap("validate")
+
+        if result["applied"] or result["cleaned"]:
+            result["status"] = "repaired"
+            if not dry_run:
+                backup_before_migration(filepath)
+                handle.save(cleaned)
+                lap("save")
+    except (OSError, JournalChangedError, TimeoutError) as e:
+        result.update(status="failed", error=str(e))
+    finally:
+        if os.path.exists(filepath):  # Not quarantined
+            handle.close()
+    return result
+
+def ingest_all(logs_dir, workers=None, dry_run=False):
+    """
+    Ingest every journal in a directory in parallel and write the index and report.
+
+    Args:
+        logs_dir: Directory containing the journal files
+        workers: Number of worker processes (default: one per CPU)
+        dry_run: Report only; do not change any files
+
+    Returns:
+        list: ingest_file() results, in file name order
+    """
+    paths = [os.path.join(logs_dir, name) for name in sorted(list_json_files(logs_dir))]
+    if len(paths) < 2:
+        results = [ingest_file(path, dry_run) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(ingest_file, paths, [dry_run] * len(paths), chunksize=4))
+
+    if not dry_run:
+        ingest_dir = get_ingest_dir(logs_dir)
+        os.makedirs(ingest_dir, exist_ok=True)
+        index = {os.path.basename(r["file"]): r["summary"] for r in results if r["summary"]}
+        generated = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        with open(os.path.join(ingest_dir, "index.json"), "w") as file:
+            json.dump({"generated": generated, "journals": index}, file, indent=2)
+        with open(os.path.join(ingest_dir, "report.json"), "w") as file:
+            json.dump({"generated": generated, "results": results}, file, indent=2)
+    return results
+
+def describe_result(result):
+    """Return a one-line description of an ingest result."""
+    name = os.path.basename(result["file"])
+    total = sum(result["timings_ms"].values())
+    if result["status"] == "quarantined":
+        where = f" at line {result['line']} column {result['column']}" if result["line"] else ""
+        moved = f", moved to {result['quarantined_to']}" if result["quarantined_to"] else ""
+        return f"{name}: QUARANTINED ({result['error']}{where}){moved}"
+    if result["status"] == "failed":
+        return f"{name}: FAILED ({result['error']})"
+    parts = []
+    if result["applied"]:
+        parts.append(f"migrated ({', '.join(result['applied'])})")
+    if result["cleaned"]:
+        parts.append("cleaned")
+    text = f"{name}: {result['status']}{' - ' + ', '.join(parts) if parts else ''} [{total:.1f} ms]"
+    for problem in result["problems"]:
+        text += f"\n    warning: {problem}"
+    return text
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate, repair and index every journal in a directory")
+    parser.add_argument("--logs", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs"),
+                        help="directory containing the journals (default: logs/)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--dry-run", action="store_true", help="report without changing any files")
+    args = parser.parse_args()
+
+    results = ingest_all(args.logs, args.workers, args.dry_run)
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+        print(describe_result(result))
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"\n{len(results)} journal(s) ingested{': ' + summary if summary else ''}.")
+    if not args.dry_run and results:
+        print(f"Index and report written to {get_ingest_dir(args.logs)}")
+    return 1 if counts.get("quarantined") or counts.get("failed") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
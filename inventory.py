@@ -0,0 +1,240 @@
+# inventory.py – Name-indexed inventory store with stacking
+# Wraps the journal's "inventory" list in place and indexes it by normalized
+# name plus variant ("Potion of Healing" / "Greater"), so adding, stacking,
+# consuming and looking up an item are O(1) and duplicates stack instead of
+# piling up as separate entries. Duplicates already in a journal are left as
+# they are until their item is added to, used up or removed; then they are
+# folded into the first copy, keeping any fields only they have. The list
+# keeps insertion order for display and stays the storage format, so saving
+# and syncing are unchanged.
+# Removals are compacted in one pass, so applying a whole batch of loot
+# never copies the list per item.
+
+from journal_diff import new_record_id
+
+# Optional item field that keeps otherwise identical names from stacking
+VARIANT_FIELD = "variant"
+
+def _normalize(text):
+    return " ".join(str(text or "").split()).casefold()
+
+def item_key(name, variant=None):
+    """
+    Build the stacking key for an item.
+
+    Args:
+        name: Item name
+        variant: Optional distinguishing attribute (e.g. "+1", "Greater")
+
+    Returns:
+        tuple: (normalized name, normalized variant)
+    """
+    return (_normalize(name), _normalize(variant))
+
+def _key_of(item):
+    if isinstance(item, dict):
+        return item_key(item.get("name"), item.get(VARIANT_FIELD))
+    return item_key(item)
+
+def _quantity(item):
+    if not isinstance(item, dict):
+        return 1
+    try:
+        return int(item.get("quantity", 1))
+    except (TypeError, ValueError):
+        return 1
+
+class Inventory:
+    """
+    Index over a journal's inventory list. All changes are made to the list
+    itself, so the journal data is always up to date.
+    """
+
+    def __init__(self, journal_data):
+        """
+        Index the inventory of a journal. Duplicates it contains are only
+        noted; they are stacked once their item is changed.
+
+        Args:
+            journal_data: Journal data as a dictionary
+        """
+        items = journal_data.get("inventory")
+        if not isinstance(items, list):
+            items = []
+            journal_data["inventory"] = items
+        self.items = items
+        self._index = {}
+        self._duplicates = {}
+        self._removed = set()
+        for item in items:
+            key = _key_of(item)
+            if key in self._index:
+                self._duplicates.setdefault(key, []).append(item)
+            else:
+                self._index[key] = item
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, name):
+        return item_key(name) in self._index
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def get(self, name, variant=None):
+        """Return the item with this name and variant, or None."""
+        return self._index.get(item_key(name, variant))
+
+    def key_at(self, position):
+        """Return the stacking key of the item at a display position."""
+        return _key_of(self.items[position])
+
+    def _merge_duplicates(self, key):
+        """Fold the other copies of an item into the indexed one, keeping their fields."""
+        duplicates = self._duplicates.pop(key, None)
+        if not duplicates:
+            return
+        item = self._stack(key, sum(_quantity(duplicate) for duplicate in duplicates))
+        for duplicate in duplicates:
+            if isinstance(duplicate, dict):
+                for field, value in duplicate.items():
+                    if field not in ("id", "quantity") and item.get(field) in (None, "", [], {}):
+                        item[field] = value
+            self._removed.add(id(duplicate))
+
+    def _stack(self, key, quantity):
+        item = self._index[key]
+        if not isinstance(item, dict):
+            # Legacy plain-string item: upgrade it in place so it can hold a quantity
+            position = self.items.index(item)
+            item = {"id": new_record_id("inventory"), "name": str(item), "quantity": 1}
+            self.items[position] = item
+            self._index[key] = item
+        item["quantity"] = _quantity(item) + quantity
+        return item
+
+    def add(self, name, quantity=1, description="", variant=None, **fields):
+        """
+        Add an item, stacking onto an existing item with the same name and variant.
+
+        Args:
+            name: Item name
+            quantity: Number of items to add
+            description: Description, used only for a new stack
+            variant: Optional distinguishing attribute
+            **fields: Extra fields for a new stack (tags, ...)
+
+        Returns:
+            tuple: (item dict, True if stacked onto an existing item)
+        """
+        result = self._add(name, quantity, description, variant, **fields)
+        self._compact()
+        return result
+
+    def _add(self, name, quantity=1, description="", variant=None, **fields):
+        key = item_key(name, variant)
+        if key in self._index:
+            self._merge_duplicates(key)
+            item = self._stack(key, quantity)
+            if description and not item.get("description"):
+                item["description"] = description
+            return item, True
+
+        item = {"id": new_record_id("inventory"), "name": name, "quantity": quantity, "description": description}
+        if variant:
+            item[VARIANT_FIELD] = variant
+        item.update(fields)
+        self.items.append(item)
+        self._index[key] = item
+        return item, False
+
+    def consume(self, name, quantity=1, variant=None, key=None):
+        """
+        Use up some of an item, removing it when none are left.
+
+        Args:
+            name: Item name
+            quantity: Number of items to use up
+            variant: Optional distinguishing attribute
+            key: Stacking key, instead of name and variant
+
+        Returns:
+            int: Quantity left (0 if the item was removed)
+
+        Raises:
+            KeyError: If the item is not in the inventory
+        """
+        remaining = self._consume(key or item_key(name, variant), quantity)
+        self._compact()
+        return remaining
+
+    def remove(self, name, variant=None, key=None):
+        """
+        Remove an item stack entirely.
+
+        Returns:
+            dict: The removed item
+
+        Raises:
+            KeyError: If the item is not in the inventory
+        """
+        key = key or item_key(name, variant)
+        self._merge_duplicates(key)
+        item = self._index.pop(key)
+        self._removed.add(id(item))
+        self._compact()
+        return item
+
+    def _consume(self, key, quantity):
+        self._merge_duplicates(key)
+        item = self._index[key]
+        remaining = _quantity(item) - quantity
+        if remaining > 0:
+            if not isinstance(item, dict):
+                item = self._stack(key, 0)
+            item["quantity"] = remaining
+            return remaining
+        del self._index[key]
+        self._removed.add(id(item))
+        return 0
+
+    def apply_loot(self, changes):
+        """
+        Apply a batch of gains and losses, e.g. after a dungeon.
+        Negative quantities consume items; removals are compacted once at the end.
+
+        Args:
+            changes: Iterable of item dicts with name, quantity and optional
+                     description, variant and extra fields
+
+        Returns:
+            dict: {"added": n, "stacked": n, "consumed": n, "missing": [names]}
+        """
+        report = {"added": 0, "stacked": 0, "consumed": 0, "missing": []}
+        for change in changes:
+            fields = dict(change)
+            name = fields.pop("name", None)
+            if not name:
+                continue
+            quantity = _quantity(fields)
+            fields.pop("quantity", None)
+            variant = fields.pop(VARIANT_FIELD, None)
+            if quantity < 0:
+                try:
+                    self._consume(item_key(name, variant), -quantity)
+                    report["consumed"] += 1
+                except KeyError:
+                    report["missing"].append(name)
+            elif quantity > 0:
+                _, stacked = self._add(name, quantity, variant=variant, **fields)
+                report["stacked" if stacked else "added"] += 1
+        self._compact()
+        return report
+
+    def _compact(self):
+        # Drop removed items from the list in a single pass
+        if self._removed:
+            removed = self._removed
+            self.items[:] = [item for item in self.items if id(item) not in removed]
+            self._removed = set()
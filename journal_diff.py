@@ -0,0 +1,696 @@
+# journal_diff.py – Keyed structural diff between two versions of a journal
+# Records in list sections are matched by their stable "id", falling back to a
+# natural key (quest title, NPC name, item name, entry date + title) for records
+# without one, through dictionaries, so a diff is a single linear pass over both
+# journals no matter how large the campaign gets.
+# - diff_journals(old, new): categorized changeset of added/removed/modified hunks
+# - apply_changes(old, changeset, accepted): build a journal from accepted hunks
+# - describe_hunk(hunk): one-line human-readable description of a hunk
+# - merge_journals(base, local, remote): three-way merge against the last sync base
+# - make_delta(base, current) / apply_delta(data, delta): compact change documents
+# - assign_record_ids(data, *references): give every record a stable id
+
+import uuid
+from metrics import timed
+
+def _title_key(record):
+    return record.get("title", "") if isinstance(record, dict) else str(record)
+
+def _name_key(record):
+    return record.get("name", "") if isinstance(record, dict) else str(record)
+
+def _entry_key(record):
+    if not isinstance(record, dict):
+        return str(record)
+    date = record.get("date", record.get("day", ""))
+    return f"{date}::{record.get('title', '')}"
+
+# Natural key of the records in each keyed list section, addressed like update_section()
+NATURAL_KEYS = {
+    "inventory": _name_key,
+    "quests.active": _title_key,
+    "quests.completed": _title_key,
+    "quests.rumors": _title_key,
+    "npcs": _name_key,
+    "journal_log": _entry_key,
+}
+
+# Prefix of new record ids per section
+ID_PREFIXES = {
+    "inventory": "item",
+    "quests.active": "quest",
+    "quests.completed": "quest",
+    "quests.rumors": "rumor",
+    "npcs": "npc",
+    "journal_log": "entry",
+}
+
+def _id_or(natural_key):
+    def key(record):
+        if isinstance(record, dict) and record.get("id"):
+            return record["id"]
+        return natural_key(record)
+    return key
+
+# List sections whose records are matched by key: the stable id if the record
+# has one, otherwise its natural key
+RECORD_SECTIONS = {section: _id_or(key_func) for section, key_func in NATURAL_KEYS.items()}
+
+def record_label(section, record):
+    """Return the human-readable key (title, name, ...) of a record."""
+    return NATURAL_KEYS[section](record)
+
+def new_record_id(section):
+    """
+    Generate a new stable id for a record.
+
+    Args:
+        section: Section path the record is created in, e.g. "quests.active"
+
+    Returns:
+        str: Id such as "quest-1f3a9c2b7d40"
+    """
+    return f"{ID_PREFIXES.get(section, 'rec')}-{uuid.uuid4().hex[:12]}"
+
+_MISSING = object()
+
+def _families():
+    """Group record sections whose records can move between them (quest statuses)."""
+    families = {}
+    for section in NATURAL_KEYS:
+        families.setdefault(section.partition(".")[0], []).append(section)
+    return families
+
+def _family_index(data, sections):
+    records = []
+    for section in sections:
+        value = get_path(data, section)
+        if isinstance(value, list):
+            records.extend(value)
+    return index_records(records, NATURAL_KEYS[sections[0]])
+
+@timed("assign_record_ids")
+def assign_record_ids(data, *references, create=True):
+    """
+    Give every record in the keyed list sections a stable "id" (modifies data).
+    Records without one adopt the id of the record with the same natural key
+    in the first reference that has it, so an AI reply or an old sync base that
+    dropped the ids still lines up with the local journal. A quest keeps its id
+    when it moves between active, completed and rumors.
+
+    Args:
+        data: Journal data to migrate
+        *references: Journals to take existing ids from, most trusted first
+        create: Generate new ids for records with no match in the references;
+                if False, such records are left without an id
+
+    Returns:
+        int: Number of records that were given an id
+    """
+    assigned = 0
+    for family, sections in _families().items():
+        known = {}
+        for reference in references:
+            for key, record in _family_index(reference, sections).items():
+                if isinstance(record, dict) and record.get("id"):
+                    known.setdefault(key, record["id"])
+
+        used = set()
+        pending = []
+        for section in sections:
+            for record in get_path(data, section) or []:
+                if not isinstance(record, dict):
+                    continue  # Legacy plain-string records keep their natural key
+                if record.get("id") and record["id"] not in used:
+                    used.add(record["id"])
+                else:
+                    pending.append((section, record))
+        if not pending:
+            continue
+
+        pending_ids = {id(record) for _, record in pending}
+        natural = {id(record): key for key, record in _family_index(data, sections).items()
+                   if id(record) in pending_ids}
+        for section, record in pending:
+            record_id = known.get(natural.get(id(record)))
+            if not record_id or record_id in used:
+                if not create:
+                    continue
+                record_id = new_record_id(section)
+            used.add(record_id)
+            # Put the id first so it reads naturally in the JSON file
+            fields = [(k, v) for k, v in record.items() if k != "id"]
+            record.clear()
+            record["id"] = record_id
+            record.update(fields)
+            assigned += 1
+    return assigned
+
+def get_path(data, path):
+    """Return the value at a dotted section path, or None if it is missing."""
+    node = data
+    for part in path.split("."):
+        if not isinstance(node, dict):
+            return None
+        node = node.get(part)
+    return node
+
+def _set_path(data, path, value):
+    """Set a dotted section path, copying parent dicts so the source is untouched."""
+    parts = path.split(".")
+    node = data
+    for part in parts[:-1]:
+        child = node.get(part)
+        child = dict(child) if isinstance(child, dict) else {}
+        node[part] = child
+        node = child
+    node[parts[-1]] = value
+
+def index_records(records, key_func):
+    """
+    Map record keys to records in a single pass, preserving order.
+    Repeated keys get a '#n' suffix so duplicates stay addressable.
+
+    Args:
+        records: List of records (usually dicts) from a journal section
+        key_func: Function returning the natural key of a record
+
+    Returns:
+        dict: Ordered mapping of key -> record
+    """
+    index = {}
+    seen = {}
+    for record in records if isinstance(records, list) else []:
+        key = key_func(record)
+        count = seen.get(key, 0) + 1
+        seen[key] = count
+        if count > 1:
+            key = f"{key}#{count}"
+        index[key] = record
+    return index
+
+def _changed_fields(old, new):
+    """List the fields that differ between two records."""
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return []
+    return [k for k in {**old, **new} if old.get(k, _MISSING) != new.get(k, _MISSING)]
+
+def _field_sections(old, new):
+    """
+    Yield (section, old_value, new_value) for every dict-shaped part of the
+    journal not covered by RECORD_SECTIONS, e.g. character, mental_state, _meta.
+    """
+    record_roots = {}
+    for path in RECORD_SECTIONS:
+        root, _, child = path.partition(".")
+        record_roots.setdefault(root, set())
+        if child:
+            record_roots[root].add(child)
+
+    for section in {**old, **new}:
+        old_value = old.get(section, _MISSING)
+        new_value = new.get(section, _MISSING)
+        children = record_roots.get(section)
+        if children is not None and not children:
+            continue  # Whole section is a keyed record list
+        if children:
+            # Partially keyed (quests): compare the remaining sub-keys as fields
+            old_value = {k: v for k, v in old_value.items() if k not in children} if isinstance(old_value, dict) else {}
+            new_value = {k: v for k, v in new_value.items() if k not in children} if isinstance(new_value, dict) else {}
+        yield section, old_value, new_value
+
+@timed("diff_journals")
+def diff_journals(old, new, sections=None):
+    """
+    Compute a keyed structural diff between two journals.
+
+    Args:
+        old: The current journal data
+        new: The incoming (e.g. AI-updated) journal data
+        sections: Only compare these sections (record section paths such as
+                  "quests.active" and top-level names such as "character"),
+                  e.g. the ones utils.JournalHashTree reports as changed
+
+    Returns:
+        dict: Changeset with "added", "removed" and "modified" lists of hunks.
+              Each hunk is a dict with id, type, section, key, label (the
+              title/name to display), old, new and fields (the changed field
+              names for modified records).
+    """
+    changeset = {"added": [], "removed": [], "modified": []}
+    next_id = 0
+
+    def add_hunk(kind, section, key, old_value, new_value, fields=None):
+        nonlocal next_id
+        record = new_value if new_value is not _MISSING else old_value
+        changeset[kind].append({
+            "id": next_id,
+            "type": kind,
+            "section": section,
+            "key": key,
+            "label": record_label(section, record) if section in NATURAL_KEYS else key,
+            "old": None if old_value is _MISSING else old_value,
+            "new": None if new_value is _MISSING else new_value,
+            "fields": fields or [],
+        })
+        next_id += 1
+
+    for section, key_func in RECORD_SECTIONS.items():
+        if sections is not None and section not in sections:
+            continue
+        old_index = index_records(get_path(old, section), key_func)
+        new_index = index_records(get_path(new, section), key_func)
+
+        for key, old_record in old_index.items():
+            new_record = new_index.get(key, _MISSING)
+            if new_record is _MISSING:
+                add_hunk("removed", section, key, old_record, _MISSING)
+            elif new_record != old_record:
+                add_hunk("modified", section, key, old_record, new_record,
+                         _changed_fields(old_record, new_record))
+        for key, new_record in new_index.items():
+            if key not in old_index:
+                add_hunk("added", section, key, _MISSING, new_record)
+
+    for section, old_value, new_value in _field_sections(old, new):
+        if sections is not None and section not in sections:
+            continue
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            for field in {**old_value, **new_value}:
+                before = old_value.get(field, _MISSING)
+                after = new_value.get(field, _MISSING)
+                if before is _MISSING:
+                    add_hunk("added", section, field, before, after)
+                elif after is _MISSING:
+                    add_hunk("removed", section, field, before, after)
+                elif before != after:
+                    add_hunk("modified", section, field, before, after, [field])
+        elif old_value is _MISSING:
+            add_hunk("added", section, None, old_value, new_value)
+        elif new_value is _MISSING:
+            add_hunk("removed", section, None, old_value, new_value)
+        elif old_value != new_value:
+            add_hunk("modified", section, None, old_value, new_value)
+
+    return changeset
+
+def iter_hunks(changeset):
+    """Iterate over all hunks of a changeset in id order."""
+    hunks = changeset["added"] + changeset["removed"] + changeset["modified"]
+    return sorted(hunks, key=lambda h: h["id"])
+
+def count_changes(changeset):
+    """Return the total number of hunks in a changeset."""
+    return sum(len(changeset[kind]) for kind in ("added", "removed", "modified"))
+
+@timed("apply_changes")
+def apply_changes(old, changeset, accepted=None):
+    """
+    Build a new journal by applying accepted hunks of a changeset to `old`.
+    Unchanged records and sections are shared with `old` rather than copied.
+
+    Kept records stay in their original order; accepted additions are appended
+    in the order they appear in the incoming journal.
+
+    Args:
+        old: The journal the changeset was computed against
+        changeset: Result of diff_journals()
+        accepted: Collection of hunk ids to apply, or None to apply all
+
+    Returns:
+        dict: The resulting journal data
+    """
+    result = dict(old)
+    by_section = {}
+    for hunk in iter_hunks(changeset):
+        if accepted is None or hunk["id"] in accepted:
+            by_section.setdefault(hunk["section"], []).append(hunk)
+
+    for section, hunks in by_section.items():
+        key_func = RECORD_SECTIONS.get(section)
+        if key_func:
+            changes = {h["key"]: h for h in hunks}
+            records = []
+            for key, record in index_records(get_path(old, section), key_func).items():
+                hunk = changes.get(key)
+                if hunk is None:
+                    records.append(record)
+                elif hunk["type"] == "modified":
+                    records.append(hunk["new"])
+            records.extend(h["new"] for h in hunks if h["type"] == "added")
+            _set_path(result, section, records)
+            continue
+
+        for hunk in hunks:
+            if hunk["key"] is None:
+                if hunk["type"] == "removed":
+                    result.pop(section, None)
+                else:
+                    result[section] = hunk["new"]
+                continue
+            target = result.get(section)
+            target = dict(target) if isinstance(target, dict) else {}
+            if hunk["type"] == "removed":
+                target.pop(hunk["key"], None)
+            else:
+                target[hunk["key"]] = hunk["new"]
+            result[section] = target
+
+    return result
+
+def describe_hunk(hunk):
+    """Return a short one-line description of a hunk for display."""
+    symbol = {"added": "+", "removed": "-", "modified": "~"}[hunk["type"]]
+    key = (hunk.get("label") or hunk["key"]) if hunk["key"] is not None else "(whole section)"
+    text = f"{symbol} {hunk['section']}: {key}"
+    if hunk["type"] == "modified" and hunk["fields"] and RECORD_SECTIONS.get(hunk["section"]):
+        text += f" [{', '.join(hunk['fields'])}]"
+    return text
+
+def _merge_appends(base, local, remote):
+    """
+    Merge two lists that both only appended to `base`.
+
+    Returns:
+        list: base + local additions + remote additions, or _MISSING if either
+              side edited or removed existing items
+    """
+    if not (isinstance(base, list) and isinstance(local, list) and isinstance(remote, list)):
+        return _MISSING
+    size = len(base)
+    if local[:size] != base or remote[:size] != base:
+        return _MISSING
+    local_added = local[size:]
+    return base + local_added + [item for item in remote[size:] if item not in local_added]
+
+@timed("merge_journals")
+def merge_journals(base, local, remote, take_remote=()):
+    """
+    Three-way merge of a local journal and an AI-updated journal against the
+    base snapshot both started from. Records are matched by key as in
+    diff_journals(), so the merge is linear in journal size.
+
+    Changes made on only one side are taken automatically. Records changed on
+    both sides are merged field by field; lists that both sides only appended
+    to are concatenated. Anything else is a conflict, resolved to the local
+    value unless its id is listed in `take_remote`.
+
+    Args:
+        base: Journal as it was last exported to the AI
+        local: Current journal, possibly edited since the export
+        remote: Journal returned by the AI
+        take_remote: Conflict ids to resolve in favour of the AI version
+
+    Returns:
+        tuple: (merged journal, list of conflict dicts with id, section, key,
+                label, field, base, local and remote)
+    """
+    conflicts = []
+    labels = {}
+
+    def conflict(section, key, field, b, l, r):
+        conflict_id = len(conflicts)
+        conflicts.append({
+            "id": conflict_id,
+            "section": section,
+            "key": key,
+            "label": labels.get((section, key), key),
+            "field": field,
+            "base": None if b is _MISSING else b,
+            "local": None if l is _MISSING else l,
+            "remote": None if r is _MISSING else r,
+        })
+        return r if conflict_id in take_remote else l
+
+    def merge_value(section, key, b, l, r, field=None):
+        if l == r:
+            return l
+        if b == l:
+            return r
+        if b == r:
+            return l
+        appended = _merge_appends(b, l, r)
+        if appended is not _MISSING:
+            return appended
+        if field is None and isinstance(l, dict) and isinstance(r, dict):
+            b = b if isinstance(b, dict) else {}
+            merged = {}
+            for name in {**l, **r}:
+                value = merge_value(section, key, b.get(name, _MISSING), l.get(name, _MISSING),
+                                    r.get(name, _MISSING), field=name)
+                if value is not _MISSING:
+                    merged[name] = value
+            return merged
+        return conflict(section, key, field, b, l, r)
+
+    merged = {}
+    record_roots = {path.partition(".")[0] for path in RECORD_SECTIONS}
+
+    for section in {**local, **remote}:
+        b = base.get(section, _MISSING)
+        l = local.get(section, _MISSING)
+        r = remote.get(section, _MISSING)
+        if section in record_roots:
+            # Keyed lists are merged below; merge any remaining sub-keys as fields
+            if section in RECORD_SECTIONS:
+                continue
+            children = {path.partition(".")[2] for path in RECORD_SECTIONS if path.startswith(section + ".")}
+            strip = lambda value: ({k: v for k, v in value.items() if k not in children}
+                                   if isinstance(value, dict) else {})
+            value = merge_value(section, None, strip(b), strip(l), strip(r))
+            merged[section] = dict(value) if isinstance(value, dict) else {}
+            continue
+        value = merge_value(section, None, b, l, r)
+        if value is not _MISSING:
+            merged[section] = value
+
+    for section, key_func in RECORD_SECTIONS.items():
+        base_index = index_records(get_path(base, section), key_func)
+        local_index = index_records(get_path(local, section), key_func)
+        remote_index = index_records(get_path(remote, section), key_func)
+        if not (local_index or remote_index) and get_path(local, section) is None:
+            continue
+
+        records = []
+        for key, l in local_index.items():
+            labels[(section, key)] = record_label(section, l)
+            value = merge_value(section, key, base_index.get(key, _MISSING), l,
+                                remote_index.get(key, _MISSING))
+            if value is not _MISSING:
+                records.append(value)
+        for key, r in remote_index.items():
+            if key in local_index:
+                continue
+            labels[(section, key)] = record_label(section, r)
+            value = merge_value(section, key, base_index.get(key, _MISSING), _MISSING, r)
+            if value is not _MISSING:
+                records.append(value)
+        _set_path(merged, section, records)
+
+    return merged, conflicts
+
+def describe_conflict(conflict):
+    """Return a short one-line description of a merge conflict for display."""
+    where = conflict["section"]
+    if conflict["key"] is not None:
+        where += f": {conflict.get('label') or conflict['key']}"
+    if conflict["field"] is not None:
+        where += f" [{conflict['field']}]"
+    return where
+
+DELTA_FORMAT = 1
+
+DELTA_INSTRUCTIONS = (
+    "This is a delta of the journal since the last sync, not the full journal. "
+    "Reply with a JSON object containing a 'changes' list in the same format: "
+    "{'op': 'add'|'update'|'remove', 'section': <section>, 'id': <record id>, ...}. "
+    "'add' carries 'value'; 'update' carries 'fields' (changed fields only) for "
+    "records or 'value' for plain values; 'remove' carries nothing else. "
+    "Records are identified by their 'id' field; leave 'id' out of new records."
+)
+
+# _meta fields that are local bookkeeping (the sync itself, the entry archive)
+LOCAL_META_FIELDS = {"last_ai_sync", "milestones", "archive"}
+
+@timed("make_delta")
+def make_delta(base, current, sections=None):
+    """
+    Build a compact change document describing how `current` differs from
+    `base` (the journal as last synced with the AI). Records are identified by
+    their key within the section, which stays stable between syncs. The
+    local bookkeeping in _meta (LOCAL_META_FIELDS) is left out.
+
+    Args:
+        base: Journal as last exported to the AI
+        current: Current journal data
+        sections: Only compare these sections (see diff_journals)
+
+    Returns:
+        dict: Delta document with _delta metadata, minimal context and changes
+    """
+    changes = []
+    for hunk in iter_hunks(diff_journals(base, current, sections)):
+        if hunk["section"] == "_meta" and hunk["key"] in LOCAL_META_FIELDS:
+            continue
+        change = {"op": {"added": "add", "removed": "remove", "modified": "update"}[hunk["type"]],
+                  "section": hunk["section"], "id": hunk["key"]}
+        if hunk["type"] == "added":
+            change["value"] = hunk["new"]
+        elif hunk["type"] == "modified":
+            if RECORD_SECTIONS.get(hunk["section"]) and isinstance(hunk["old"], dict) \
+                    and isinstance(hunk["new"], dict):
+                change["fields"] = {f: hunk["new"][f] for f in hunk["fields"] if f in hunk["new"]}
+                dropped = [f for f in hunk["fields"] if f not in hunk["new"]]
+                if dropped:
+                    change["remove_fields"] = dropped
+            else:
+                change["value"] = hunk["new"]
+        changes.append(change)
+
+    quests = current.get("quests", {}) if isinstance(current.get("quests"), dict) else {}
+    return {
+        "_delta": {
+            "format": DELTA_FORMAT,
+            "since": (current.get("_meta") or {}).get("last_ai_sync")
+                     or (base.get("_meta") or {}).get("last_ai_sync"),
+            "instructions": DELTA_INSTRUCTIONS,
+        },
+        "context": {
+            "character": current.get("character", {}),
+            "active_quests": [_title_key(q) for q in quests.get("active", [])],
+        },
+        "changes": changes,
+    }
+
+@timed("apply_delta")
+def apply_delta(data, delta):
+    """
+    Apply a delta document (as produced by make_delta or returned by the AI)
+    to a journal in place. Only the sections a change touches are indexed.
+    Changes that would corrupt the journal (an add without a record or of an
+    existing id, an update without fields or value) are skipped and reported.
+
+    Args:
+        data: Journal data to modify
+        delta: Dict with a "changes" list, or the list itself
+
+    Returns:
+        tuple: (number of changes applied, list of error messages)
+    """
+    changes = delta.get("changes", []) if isinstance(delta, dict) else delta
+    applied = 0
+    errors = []
+
+    by_section = {}
+    for change in changes if isinstance(changes, list) else []:
+        if not _well_formed(change):
+            errors.append(f"Malformed change: {str(change)[:100]}")
+            continue
+        by_section.setdefault(change["section"], []).append(change)
+
+    for section, section_changes in by_section.items():
+        key_func = RECORD_SECTIONS.get(section)
+        if key_func:
+            records = get_path(data, section)
+            if not isinstance(records, list):
+                records = []
+                root, _, child = section.partition(".")
+                if child:
+                    data.setdefault(root, {})[child] = records
+                else:
+                    data[root] = records
+            positions = {key: i for i, key in enumerate(index_records(records, key_func))}
+            # Also accept natural keys (titles, names) for records addressed without their id
+            natural = {key: i for i, key in enumerate(index_records(records, NATURAL_KEYS[section]))}
+            removed = set()
+            for change in section_changes:
+                position = positions.get(change.get("id"))
+                if position is None and change["op"] != "add":
+                    position = natural.get(change.get("id"))
+                if change["op"] == "add":
+                    value = change.get("value")
+                    if not isinstance(value, dict) or not _is_key(value.get("id")):
+                        errors.append(f"{section}: add of '{change.get('id')}' has no record value")
+                        continue
+                    key = key_func(value)
+                    existing = positions.get(key) if position is None else position
+                    if existing is not None and existing not in removed:
+                        errors.append(f"{section}: record '{key}' already exists")
+                        continue
+                    records.append(value)
+                    positions[key] = len(records) - 1
+                elif position is None or position in removed:
+                    errors.append(f"{section}: no record '{change.get('id')}' to {change['op']}")
+                    continue
+                elif change["op"] == "remove":
+                    removed.add(position)
+                elif "fields" in change:
+                    if not isinstance(change["fields"], dict) or not isinstance(records[position], dict):
+                        errors.append(f"{section}: cannot update fields of '{change.get('id')}'")
+                        continue
+                    records[position].update(change["fields"])
+                    for field in change.get("remove_fields", []):
+                        records[position].pop(field, None)
+                elif change.get("value") is not None:
+                    records[position] = change["value"]
+                else:
+                    errors.append(f"{section}: update of '{change.get('id')}' has no fields or value")
+                    continue
+                applied += 1
+            if removed:
+                records[:] = [r for i, r in enumerate(records) if i not in removed]
+            continue
+
+        # Whole-section changes would replace or drop every record below a root like "quests"
+        keyed = {path.partition(".")[2] for path in RECORD_SECTIONS if path.startswith(section + ".")}
+        for change in section_changes:
+            field = change.get("id")
+            if keyed and (field is None or field in keyed):
+                errors.append(f"{section}: change a record section such as '{section}.{min(keyed)}' instead")
+                continue
+            if field is None:
+                if change["op"] == "remove" and isinstance(data.get(section), dict):
+                    errors.append(f"{section}: cannot remove a whole section")
+                    continue
+                if change["op"] == "add" and section in data:
+                    errors.append(f"{section}: section already exists")
+                    continue
+                if change["op"] == "remove":
+                    data.pop(section, None)
+                elif "value" in change:
+                    data[section] = change["value"]
+                else:
+                    errors.append(f"{section}: {change['op']} has no value")
+                    continue
+            else:
+                target = data.get(section)
+                if not isinstance(target, dict):
+                    target = data[section] = {}
+                if change["op"] == "remove":
+                    target.pop(field, None)
+                elif "fields" in change and isinstance(target.get(field), dict) \
+                        and isinstance(change["fields"], dict):
+                    target[field].update(change["fields"])
+                elif "value" in change:
+                    target[field] = change["value"]
+                else:
+                    errors.append(f"{section}: {change['op']} of '{field}' has no value")
+                    continue
+            applied += 1
+
+    return applied, errors
+
+def _is_key(value):
+    """Whether a value can be a record id or field name (None means "not given")."""
+    return value is None or (isinstance(value, (str, int)) and not isinstance(value, bool))
+
+def _well_formed(change):
+    """Whether a change has the shape apply_delta expects, before touching any data."""
+    if not isinstance(change, dict) or change.get("op") not in ("add", "update", "remove"):
+        return False
+    if not change.get("section") or not isinstance(change["section"], str) or not _is_key(change.get("id")):
+        return False
+    if "fields" in change and not isinstance(change["fields"], dict):
+        return False
+    remove_fields = change.get("remove_fields", [])
+    return isinstance(remove_fields, list) and all(isinstance(field, str) for field in remove_fields)
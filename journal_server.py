@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# journal_server.py – Local JSON-over-HTTP API for an open journal
+# Keeps one journal in memory so local tools and scripts (e.g. an AI helper)
+# can read and change it without going through export/import files:
+#   GET   /api/<endpoint>   section as JSON, with an ETag; a request carrying a
+#                           matching If-None-Match gets 304 Not Modified
+#   PATCH /api/<endpoint>   apply a change list in the delta format
+#                           (journal_diff.apply_delta); If-Match makes the
+#                           write conditional (412 if the section changed)
+# Endpoints: journal, character, quests, inventory, entries. Response bodies
+# and ETags are cached per endpoint until a change touches it, so polling an
+# unchanged section costs one dict lookup. Writes are batched: the journal is
+# saved FLUSH_DELAY seconds after the first unsaved change, through
+# locking.JournalHandle, so edits made in the GUI or CLI meanwhile are merged.
+# The server listens on localhost only by default:
+#   python3 journal_server.py logs/my_character.json --port 8765
+#   curl -i localhost:8765/api/character
+#   curl -X PATCH localhost:8765/api/inventory \
+#        -d '{"changes": [{"op": "add", "value": {"name": "Rope", "quantity": 1}}]}'
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from journal_diff import apply_delta, assign_record_ids, merge_journals, get_path, describe_conflict
+from locking import JournalHandle, JournalChangedError, file_version
+from migrations import migrate_journal, backup_before_migration
+from metrics import measure, timed
+
+DEFAULT_PORT = 8765
+
+# Seconds to wait after the first unsaved change before writing to disk
+FLUSH_DELAY = 2.0
+
+# Endpoint -> journal sections it exposes; the first is the response body
+ENDPOINTS = {
+    "journal": None,
+    "character": ("character",),
+    "quests": ("quests", "quests.active", "quests.completed", "quests.rumors"),
+    "inventory": ("inventory",),
+    "entries": ("journal_log",),
+}
+
+# Section a change without one goes to; quests are changed per record list
+DEFAULT_SECTIONS = {"quests": "quests.active"}
+
+class JournalStore:
+    """An open journal held in memory, with cached endpoint bodies and batched saves."""
+
+    def __init__(self, journal_path, flush_delay=FLUSH_DELAY):
+        """
+        Load a journal, upgrading it first if it was written by an older version.
+
+        Args:
+            journal_path: Path to the journal file
+            flush_delay: Seconds to batch changes before saving
+        """
+        self.handle = JournalHandle(journal_path, "server")
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._timer = None
+        self.dirty = False
+        self.data = self.handle.load()
+        if migrate_journal(self.data):
+            backup_before_migration(self.handle.path)
+            self.handle.save(self.data)
+        # endpoint -> (etag, body bytes)
+        self._cache = {}
+
+    def get(self, endpoint):
+        """
+        Get the serialized body of an endpoint.
+
+        Returns:
+            tuple: (etag, body bytes)
+        """
+        with self._lock:
+            self._reload_if_changed()
+            cached = self._cache.get(endpoint)
+            if cached is None:
+                sections = ENDPOINTS[endpoint]
+                value = self.data if sections is None else get_path(self.data, sections[0])
+                body = json.dumps(value, indent=2).encode("utf-8")
+                cached = (f'"{hashlib.sha1(body).hexdigest()[:20]}"', body)
+                self._cache[endpoint] = cached
+            return cached
+
+    def patch(self, endpoint, changes):
+        """
+        Apply a change list to the sections of an endpoint.
+
+        Args:
+            endpoint: Endpoint name
+            changes: Delta changes; "section" defaults to the endpoint's section
+                     (quests.active for quests), and "active"/"completed"/"rumors"
+                     are accepted for quests. /api/journal changes must name one.
+
+        Returns:
+            tuple: (number applied, list of error messages)
+
+        Raises:
+            ValueError: If a change is malformed or targets a section outside the endpoint
+        """
+        sections = ENDPOINTS[endpoint]
+        for change in changes:
+            if not isinstance(change, dict):
+                raise ValueError(f"Malformed change: {str(change)[:100]}")
+            section = change.get("section") or DEFAULT_SECTIONS.get(endpoint) \
+                or (sections[0] if sections else None)
+            if endpoint == "quests" and section in ("active", "completed", "rumors"):
+                section = f"quests.{section}"
+            if not isinstance(section, str):
+                raise ValueError(f"Change has no section: {str(change)[:100]}")
+            if sections is not None and section not in sections:
+                raise ValueError(f"Section '{section}' cannot be changed through /api/{endpoint}")
+            change["section"] = section
+
+        with self._lock, measure("server.patch") as metric:
+            self._reload_if_changed()
+            try:
+                applied, errors = apply_delta(self.data, changes)
+            except Exception:
+                # Changes before the failing one are already in self.data; save those too
+                self._changed({change["section"] for change in changes})
+                raise
+            if applied:
+                assign_record_ids(self.data)
+                self._changed({change["section"] for change in changes})
+            metric["records"] = applied
+        return applied, errors
+
+    def _changed(self, sections=None):
+        # Caller holds the lock; drop the cached bodies that include the changed sections
+        if sections is None:
+            self._cache.clear()
+        else:
+            roots = {section.split(".")[0] for section in sections}
+            for endpoint, exposed in ENDPOINTS.items():
+                if exposed is None or roots & {section.split(".")[0] for section in exposed}:
+                    self._cache.pop(endpoint, None)
+        self.dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _reload_if_changed(self):
+        # Pick up saves made by the GUI or CLI; unsaved changes here are merged on flush instead
+        if not self.dirty and file_version(self.handle.path) != self.handle.version:
+            self.data = self.handle.load()
+            self._cache.clear()
+
+    @timed("server.flush")
+    def flush(self):
+        """
+        Save unsaved changes. If the file was changed by another program, both
+        sets of changes are merged; conflicting fields keep the server's value.
+
+        Returns:
+            bool: True if the journal on disk is up to date
+        """
+        with self._lock:
+            self._timer = None
+            if not self.dirty:
+                return True
+            try:
+                saved = self.handle.save(self.data)
+            except JournalChangedError as e:
+                assign_record_ids(e.base, self.data)
+                assign_record_ids(e.disk_data, self.data, e.base)
+                merged_data, conflicts = merge_journals(e.base, self.data, e.disk_data)
+                for conflict in conflicts:
+                    print(f"Warning: Kept the server's value for {describe_conflict(conflict)}")
+                try:
+                    saved = self.handle.save(merged_data, expected=e.version)
+                except (JournalChangedError, TimeoutError) as again:
+                    print(f"Warning: Could not save journal, will retry: {again}")
+                    saved = False
+                if saved:
+                    self.data = merged_data
+                    self._cache.clear()
+            except TimeoutError as e:
+                print(f"Warning: Could not save journal, will retry: {e}")
+                saved = False
+            if saved:
+                self.dirty = False
+            else:
+                self._changed(())
+            return saved
+
+    def close(self):
+        """Save pending changes and release the journal."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.flush()
+        self.handle.close()
+
+class JournalRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler for the /api endpoints; self.server.store is the JournalStore."""
+
+    server_version = "DnDJournal/1"
+
+    def _endpoint(self):
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "api" and parts[1] in ENDPOINTS:
+            return parts[1]
+        self._send_json(404, {"error": f"Unknown path {self.path}", "endpoints": [f"/api/{e}" for e in ENDPOINTS]})
+        return None
+
+    def _send_json(self, status, value, etag=None):
+        self._send(status, json.dumps(value, indent=2).encode("utf-8"), etag)
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        endpoint = self._endpoint()
+        if endpoint is None:
+            return
+        etag, body = self.server.store.get(endpoint)
+        if etag in _etags(self.headers.get("If-None-Match")):
+            self._send(304, None, etag)
+        else:
+            self._send(200, body, etag)
+
+    def do_PATCH(self):
+        endpoint = self._endpoint()
+        if endpoint is None:
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, UnicodeDecodeError) as e:
+            self._send_json(400, {"error": f"Invalid JSON: {e}"})
+            return
+        changes = request.get("changes") if isinstance(request, dict) else request
+        if not isinstance(changes, list):
+            self._send_json(400, {"error": "Expected a JSON object with a 'changes' list"})
+            return
+
+        store = self.server.store
+        with store._lock:
+            if_match = self.headers.get("If-Match")
+            if if_match and if_match.strip() != "*":
+                etag, _ = store.get(endpoint)
+                if etag not in _etags(if_match):
+                    self._send_json(412, {"error": "The section was changed since it was read"}, etag)
+                    return
+            try:
+                applied, errors = store.patch(endpoint, changes)
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            except Exception as e:
+                self._send_json(400, {"error": f"Could not apply changes: {e}"})
+                return
+            etag, _ = store.get(endpoint)
+        self._send_json(200 if applied or not errors else 422,
+                        {"applied": applied, "errors": errors}, etag)
+
+def _etags(header):
+    """Split an If-None-Match/If-Match header into its entity tags."""
+    if not header:
+        return set()
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+def serve(journal_path, host="127.0.0.1", port=DEFAULT_PORT, flush_delay=FLUSH_DELAY):
+    """
+    Serve a journal until interrupted, saving pending changes on exit.
+
+    Args:
+        journal_path: Path to the journal file
+        host: Interface to listen on (localhost by default)
+        port: TCP port (0 picks a free one)
+        flush_delay: Seconds to batch changes before saving
+    """
+    store = JournalStore(journal_path, flush_delay)
+    server = ThreadingHTTPServer((host, port), JournalRequestHandler)
+    server.store = store
+    print(f"Serving {os.path.basename(journal_path)} on http://{host}:{server.server_address[1]}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        store.close()
+        print("Journal saved. Server stopped.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a journal over a local JSON API")
+    parser.add_argument("journal", help="journal file, or its name in logs/")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    parser.add_argument("--flush-delay", type=float, default=FLUSH_DELAY,
+                        help=f"seconds to batch changes before saving (default: {FLUSH_DELAY})")
+    args = parser.parse_args()
+
+    journal_path = args.journal
+    if not os.path.exists(journal_path):
+        journal_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", args.journal)
+    if not os.path.exists(journal_path):
+        print(f"Error: File {args.journal} not found.")
+        return 1
+    serve(journal_path, args.host, args.port, args.flush_delay)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
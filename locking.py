@@ -0,0 +1,253 @@
+# locking.py – Safe sharing of a journal between the GUI and the CLI
+# Each tool opens a journal through a JournalHandle:
+# - every load/save runs under an advisory fcntl lock on <journal>.lock, and
+#   saves are written to a temp file and renamed into place, so readers never
+#   see a half-written journal
+# - the handle remembers which version of the file it last read or wrote; a
+#   save finding a different version on disk raises JournalChangedError with
+#   the base, so the caller can three-way merge instead of overwriting
+# - open handles register a lease in <journal>.lease (pid, host, tool); leases
+#   of dead processes or past their expiry are treated as stale and ignored
+# On platforms without fcntl the version check and leases still apply.
+
+import os
+import json
+import time
+import socket
+import datetime
+from contextlib import contextmanager
+from metrics import measure, count_records
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Seconds to wait for another process to finish a save
+LOCK_TIMEOUT = 5.0
+
+# Leases not renewed within this many seconds are considered stale
+LEASE_SECONDS = 15 * 60
+
+_HOST = socket.gethostname()
+
+class JournalChangedError(Exception):
+    """A journal was modified on disk since this handle last read or wrote it."""
+
+    def __init__(self, path, base, disk_data, version):
+        super().__init__(f"{os.path.basename(path)} was changed by another program")
+        self.path = path
+        self.base = base
+        self.disk_data = disk_data
+        self.version = version
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT):
+    """
+    Hold an exclusive advisory lock for a journal.
+
+    Args:
+        path: Path to the journal file
+        timeout: Seconds to wait before raising TimeoutError
+    """
+    if fcntl is None:
+        yield
+        return
+    lock_file = open(path + ".lock", "a")
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"{os.path.basename(path)} is locked by another program")
+                time.sleep(0.02)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+    finally:
+        lock_file.close()
+
+def file_version(path):
+    """
+    Identify the current version of a file without reading it.
+    Saves replace the file, so the inode changes even within one mtime tick.
+
+    Returns:
+        tuple: (mtime_ns, size, inode), or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+def _is_stale(lease, now):
+    if now - lease.get("renewed", 0) > LEASE_SECONDS:
+        return True
+    return lease.get("host") == _HOST and not _pid_alive(lease.get("pid", 0))
+
+def _read_leases(path):
+    try:
+        with open(path + ".lease", "r") as file:
+            leases = json.load(file)
+        return leases if isinstance(leases, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _write_leases(path, leases):
+    lease_path = path + ".lease"
+    if not leases:
+        if os.path.exists(lease_path):
+            os.remove(lease_path)
+        return
+    with open(lease_path, "w") as file:
+        json.dump(leases, file, indent=2)
+
+def other_holders(path):
+    """
+    List the other live programs that have a journal open.
+
+    Args:
+        path: Path to the journal file
+
+    Returns:
+        list: Lease dicts with pid, host, tool and since
+    """
+    now = time.time()
+    pid = os.getpid()
+    return [lease for lease in _read_leases(path).values()
+            if not (lease.get("host") == _HOST and lease.get("pid") == pid) and not _is_stale(lease, now)]
+
+class JournalHandle:
+    """One program's open copy of a journal file."""
+
+    def __init__(self, path, tool):
+        """
+        Args:
+            path: Path to the journal file
+            tool: Name shown to other programs, e.g. "gui" or "cli"
+        """
+        self.path = os.path.abspath(path)
+        self.tool = tool
+        self.version = None
+        # Text of the version last read or written: the merge base after a conflict
+        self._base_text = None
+        self._holder = f"{_HOST}:{os.getpid()}:{tool}"
+        self._renewed = 0
+
+    def load(self):
+        """
+        Read the journal and register a lease on it.
+
+        Returns:
+            dict: Journal data
+        """
+        with file_lock(self.path), measure("load_journal") as metric:
+            with open(self.path, "r") as file:
+                text = file.read()
+            data = json.loads(text)
+            self.version = file_version(self.path)
+            self._base_text = text
+            self._update_lease(register=True)
+            metric["bytes"] = len(text)
+            metric["records"] = count_records(data)
+        return data
+
+    def save(self, data, expected=None):
+        """
+        Write the journal if nobody else changed it since it was loaded.
+
+        Args:
+            data: Journal data to write
+            expected: Version to check against instead of the one last seen,
+                      e.g. JournalChangedError.version after merging
+
+        Returns:
+            bool: True if saved
+
+        Raises:
+            JournalChangedError: If the file changed on disk in the meantime
+            TimeoutError: If another program holds the lock too long
+        """
+        expected = expected or self.version
+        with file_lock(self.path):
+            current = file_version(self.path)
+            if current is not None and expected is not None and current != expected:
+                with open(self.path, "r") as file:
+                    disk_data = json.load(file)
+                base = json.loads(self._base_text) if self._base_text else {}
+                raise JournalChangedError(self.path, base, disk_data, current)
+
+            with measure("save_journal") as metric:
+                temp_path = self.path + ".tmp"
+                try:
+                    # Serialize first, so data that is not JSON never leaves a half-written file
+                    text = json.dumps(data, indent=2)
+                    with open(temp_path, "w") as file:
+                        file.write(text)
+                    os.replace(temp_path, self.path)
+                except (OSError, TypeError, ValueError) as e:
+                    print(f"Error saving journal: {e}")
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+                    return False
+                metric["bytes"] = len(text)
+                metric["records"] = count_records(data)
+            self.version = file_version(self.path)
+            self._base_text = text
+            if time.time() - self._renewed > LEASE_SECONDS / 3:
+                self._update_lease(register=True)
+        return True
+
+    def renew(self):
+        """Renew this program's lease so it is not considered stale."""
+        with file_lock(self.path):
+            self._update_lease(register=True)
+
+    def close(self):
+        """Release the lease; the file can still be saved by other programs."""
+        try:
+            with file_lock(self.path):
+                self._update_lease(register=False)
+        except (OSError, TimeoutError) as e:
+            print(f"Warning: Could not release journal lease: {e}")
+
+    def _update_lease(self, register):
+        # Caller holds the file lock
+        now = time.time()
+        leases = {holder: lease for holder, lease in _read_leases(self.path).items()
+                  if not _is_stale(lease, now)}
+        if register:
+            lease = leases.get(self._holder) or {
+                "pid": os.getpid(), "host": _HOST, "tool": self.tool,
+                "since": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")}
+            lease["renewed"] = now
+            leases[self._holder] = lease
+            self._renewed = now
+        else:
+            leases.pop(self._holder, None)
+        try:
+            _write_leases(self.path, leases)
+        except OSError as e:
+            print(f"Warning: Could not update journal lease: {e}")
+
+def describe_holders(holders):
+    """Return a short description such as 'gui (pid 1234)' for display."""
+    return ", ".join(f"{lease.get('tool', '?')} (pid {lease.get('pid')}"
+                     f"{'' if lease.get('host') == _HOST else ' on ' + str(lease.get('host'))})"
+                     for lease in holders)
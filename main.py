@@ -14,9 +14,23 @@
 import os
 import sys
 import json
+import atexit
+import threading
 import argparse
 from pathlib import Path
-from utils import load_journal, save_journal, update_section, add_journal_entry, print_summary, list_json_files
+from utils import load_journal, save_journal, update_section, add_journal_entry, print_summary, list_json_files, save_sync_base, load_sync_base, load_sync_omitted, changed_sections, JournalHashTree
+from journal_diff import diff_journals, apply_changes, iter_hunks, count_changes, describe_hunk, merge_journals, describe_conflict, assign_record_ids
+from snapshots import record_milestone
+from inventory import Inventory
+from quests import QuestLog
+from migrations import migrate_journal, backup_before_migration
+from backups import create_backup
+from archive import archive_entries
+from dice import level_up_hp, describe as describe_dice
+from locking import JournalHandle, JournalChangedError, other_holders, describe_holders, LEASE_SECONDS
+from analytics import CampaignStats
+from ai_export import restore_omitted, strip_export_keys
+from profiling import SessionProfiler, DEFAULT_THRESHOLD_MS
 
 def get_logs_dir():
     """Get the absolute path to the logs directory."""
@@ -63,6 +77,7 @@ def create_new_journal():
         journal_data["character"]["class"] = input("Character class: ")
         journal_data["character"]["hp"] = int(input("Starting HP: "))
         journal_data["character"]["hit_dice"] = input("Hit dice (e.g., 1d10): ")
+        migrate_journal(journal_data)
         
         # Create a filename based on character name
         safe_name = journal_data["character"]["name"].lower().replace(" ", "_")
@@ -71,6 +86,8 @@ def create_new_journal():
         
         # Save the new journal
         os.makedirs(logs_dir, exist_ok=True)
+        if os.path.exists(filepath) and input(f"{filename} already exists. Replace it? (y/n): ").lower() != 'y':
+            return None
         if save_journal(journal_data, filepath):
             print(f"Created new journal at {filepath}")
             return filepath
@@ -109,55 +126,82 @@ def add_new_entry(journal_data):
 def update_inventory(journal_data):
     """Update the character's inventory."""
     print("\n=== Updating Inventory ===")
+    inventory = Inventory(journal_data)
     print("Current inventory items:")
-    for i, item in enumerate(journal_data.get("inventory", []), 1):
-        print(f"{i}. {item.get('name', 'Unknown item')}")
+    for i, item in enumerate(inventory, 1):
+        if isinstance(item, dict):
+            print(f"{i}. {item.get('name', 'Unknown item')} (x{item.get('quantity', 1)})")
+        else:
+            print(f"{i}. {item}")
     
-    action = input("Do you want to [a]dd an item, [r]emove an item, or [c]ancel? ").lower()
+    action = input("Do you want to [a]dd an item, [r]emove an item, apply [l]oot, or [c]ancel? ").lower()
     
     if action == 'a':
         name = input("Item name: ")
         quantity = input("Quantity (default 1): ")
         description = input("Description: ")
         
-        item = {
-            "name": name,
-            "quantity": int(quantity) if quantity.isdigit() else 1,
-            "description": description
-        }
-        
-        journal_data["inventory"] = journal_data.get("inventory", []) + [item]
-        print(f"Added {name} to inventory.")
+        item, stacked = inventory.add(name, int(quantity) if quantity.isdigit() else 1, description)
+        if stacked:
+            print(f"Stacked {name} onto existing item (now x{item['quantity']}).")
+        else:
+            print(f"Added {name} to inventory.")
     
     elif action == 'r':
         try:
             idx = int(input("Enter the number of the item to remove: ")) - 1
-            if 0 <= idx < len(journal_data.get("inventory", [])):
-                removed = journal_data["inventory"].pop(idx)
-                print(f"Removed {removed.get('name', 'item')} from inventory.")
+            if 0 <= idx < len(inventory.items):
+                key = inventory.key_at(idx)
+                amount = input("How many to remove (default all)? ")
+                if amount.isdigit():
+                    remaining = inventory.consume(None, int(amount), key=key)
+                    print(f"Removed {amount}; {remaining} left.")
+                else:
+                    removed = inventory.remove(None, key=key)
+                    print(f"Removed {removed.get('name', 'item') if isinstance(removed, dict) else removed} from inventory.")
             else:
                 print("Invalid item number.")
         except ValueError:
             print("Please enter a valid number.")
     
+    elif action == 'l':
+        print("Enter one item per line as 'name, quantity' (negative to use up). Blank line to finish.")
+        changes = []
+        while True:
+            line = input("> ").strip()
+            if not line:
+                break
+            name, _, quantity = line.rpartition(",")
+            if not name:
+                name, quantity = quantity, "1"
+            try:
+                changes.append({"name": name.strip(), "quantity": int(quantity.strip() or 1)})
+            except ValueError:
+                print(f"Skipping '{line}': quantity must be a number.")
+        report = inventory.apply_loot(changes)
+        print(f"Loot applied: {report['added']} new, {report['stacked']} stacked, {report['consumed']} used up.")
+        if report["missing"]:
+            print(f"Not in inventory: {', '.join(report['missing'])}")
+    
     return journal_data
 
-def update_quest_log(journal_data):
+def update_quest_log(journal_data, journal_path=None):
     """Update the character's quest log."""
     print("\n=== Updating Quest Log ===")
-    quests = journal_data.get("quests", {"completed": [], "active": [], "rumors": []})
+    quest_log = QuestLog(journal_data)
     
     print("1. View active quests")
     print("2. Add new quest")
     print("3. Complete a quest")
     print("4. Add rumor")
-    print("5. Cancel")
+    print("5. Follow up a rumor")
+    print("6. Cancel")
     
-    choice = input("Choose an option (1-5): ")
+    choice = input("Choose an option (1-6): ")
     
     if choice == '1':
         print("\nActive quests:")
-        for i, quest in enumerate(quests.get("active", []), 1):
+        for i, quest in enumerate(quest_log.view("active"), 1):
             print(f"{i}. {quest.get('title', 'Unnamed quest')}")
     
     elif choice == '2':
@@ -172,22 +216,24 @@ def update_quest_log(journal_data):
             "started": input("Start date (YYYY-MM-DD): ")
         }
         
-        quests["active"] = quests.get("active", []) + [new_quest]
-        journal_data["quests"] = quests
+        quest_log.add("active", new_quest)
         print(f"Added '{title}' to active quests.")
     
     elif choice == '3':
         try:
+            active = quest_log.view("active")
             print("\nActive quests:")
-            for i, quest in enumerate(quests.get("active", []), 1):
+            for i, quest in enumerate(active, 1):
                 print(f"{i}. {quest.get('title', 'Unnamed quest')}")
             
             idx = int(input("Enter the number of the quest to complete: ")) - 1
-            if 0 <= idx < len(quests.get("active", [])):
-                completed_quest = quests["active"].pop(idx)
-                completed_quest["completed_date"] = input("Completion date (YYYY-MM-DD): ")
-                quests["completed"] = quests.get("completed", []) + [completed_quest]
-                journal_data["quests"] = quests
+            if 0 <= idx < len(active) and isinstance(active[idx], dict):
+                date = input("Completion date (YYYY-MM-DD) [leave blank for today]: ")
+                completed_quest = quest_log.move(active[idx]["id"], "completed", date or None)
+                quest_log.commit()
+                record_milestone(journal_data, journal_path, "quest_completed",
+                                 quest=completed_quest.get("title", "Unnamed quest"),
+                                 completion_date=completed_quest["completed_date"])
                 print(f"Moved '{completed_quest.get('title', 'quest')}' to completed quests.")
             else:
                 print("Invalid quest number.")
@@ -206,13 +252,31 @@ def update_quest_log(journal_data):
             "heard_date": input("Date heard (YYYY-MM-DD): ")
         }
         
-        quests["rumors"] = quests.get("rumors", []) + [new_rumor]
-        journal_data["quests"] = quests
+        quest_log.add("rumors", new_rumor)
         print(f"Added '{title}' to rumors.")
     
+    elif choice == '5':
+        try:
+            rumors = quest_log.view("rumors")
+            print("\nRumors:")
+            for i, rumor in enumerate(rumors, 1):
+                print(f"{i}. {rumor.get('title', 'Unnamed rumor')}")
+            
+            idx = int(input("Enter the number of the rumor to follow up: ")) - 1
+            if 0 <= idx < len(rumors) and isinstance(rumors[idx], dict):
+                rumor = rumors[idx]
+                fields = {"giver": rumor["source"]} if rumor.get("source") and not rumor.get("giver") else {}
+                quest = quest_log.move(rumor["id"], "active", **fields)
+                quest_log.commit()
+                print(f"Started quest '{quest.get('title', 'quest')}'.")
+            else:
+                print("Invalid rumor number.")
+        except ValueError:
+            print("Please enter a valid number.")
+    
     return journal_data
 
-def update_character(journal_data):
+def update_character(journal_data, journal_path=None):
     """Update character stats."""
     print("\n=== Updating Character Stats ===")
     character = journal_data.get("character", {})
@@ -227,8 +291,17 @@ def update_character(journal_data):
     if field == 'level':
         try:
             new_level = int(input(f"New level (current: {character.get('level', 1)}): "))
+            previous_level = character.get("level", 1)
             character["level"] = new_level
+            journal_data["character"] = character
+            if isinstance(previous_level, int) and new_level > previous_level:
+                record_milestone(journal_data, journal_path, "level_up", level=new_level)
             print(f"Updated level to {new_level}.")
+            try:
+                gain, fixed = level_up_hp(character.get("hit_dice", ""))
+                print(f"HP gain per level ({character['hit_dice']}): {describe_dice(gain)}; fixed: {fixed}")
+            except ValueError:
+                pass
         except ValueError:
             print("Please enter a valid number.")
     
@@ -273,8 +346,118 @@ def update_character(journal_data):
     journal_data["character"] = character
     return journal_data
 
+def review_changes(current_data, incoming_data):
+    """
+    Show the changes between two journals and ask which ones to accept.
+    
+    Returns:
+        dict: Journal with the accepted changes applied, or None if cancelled
+    """
+    assign_record_ids(incoming_data, current_data)
+    changeset = diff_journals(current_data, incoming_data)
+    if not count_changes(changeset):
+        print("The AI journal is identical to the target. No changes needed.")
+        return None
+    
+    print(f"\nChanges: {len(changeset['added'])} added, "
+          f"{len(changeset['removed'])} removed, {len(changeset['modified'])} modified")
+    hunks = iter_hunks(changeset)
+    for hunk in hunks[:50]:
+        print(f"  {describe_hunk(hunk)}")
+    if len(hunks) > 50:
+        print(f"  ... and {len(hunks) - 50} more changes")
+    
+    action = input("\n[a]ccept all, [r]eview each change, or [c]ancel? ").lower()
+    if action == 'a':
+        return apply_changes(current_data, changeset)
+    if action != 'r':
+        return None
+    
+    accepted = set()
+    for hunk in hunks:
+        answer = input(f"Accept {describe_hunk(hunk)}? (y/n/q to stop and accept none of the rest): ").lower()
+        if answer == 'q':
+            break
+        if answer == 'y':
+            accepted.add(hunk["id"])
+    return apply_changes(current_data, changeset, accepted)
+
+def merge_with_base(base_data, local_data, incoming_data, remote="AI"):
+    """
+    Three-way merge an AI journal into local data, asking about conflicts.
+    
+    Args:
+        remote: Name shown for the incoming side ("AI", "other program")
+    
+    Returns:
+        dict: The merged journal, or None if cancelled
+    """
+    # Line up records whose ids the AI dropped (or that predate ids) with local ones
+    assign_record_ids(base_data, local_data)
+    assign_record_ids(incoming_data, local_data, base_data)
+    merged_data, conflicts = merge_journals(base_data, local_data, incoming_data)
+    if not conflicts:
+        return merged_data
+    
+    print(f"\n{len(conflicts)} change(s) were edited both locally and by the {remote}.")
+    take_remote = set()
+    for conflict in conflicts:
+        print(f"\nConflict in {describe_conflict(conflict)}")
+        print(f"  Mine: {json.dumps(conflict['local'])[:200]}")
+        print(f"  {remote.capitalize()}: {json.dumps(conflict['remote'])[:200]}")
+        answer = input(f"Keep [m]ine, take [t]he {remote}'s, or [c]ancel? ").lower()
+        if answer == 'c':
+            return None
+        if answer in ('t', 'a'):
+            take_remote.add(conflict["id"])
+    
+    merged_data, _ = merge_journals(base_data, local_data, incoming_data, take_remote)
+    return merged_data
+
+def save_checked(handle, journal_data):
+    """
+    Save the open journal. If another program (e.g. the GUI) saved it since
+    it was loaded, merge both sets of changes instead of overwriting theirs.
+    
+    Returns:
+        dict: The journal as saved (merged if needed), or None if not saved
+    """
+    try:
+        return journal_data if handle.save(journal_data) else None
+    except TimeoutError as e:
+        print(f"Error: {e}")
+        return None
+    except JournalChangedError as e:
+        changed = e
+    
+    print(f"\n{changed} since it was loaded. Merging your changes with theirs.")
+    merged_data = merge_with_base(changed.base, journal_data, changed.disk_data, "other program")
+    if merged_data is None:
+        return None
+    try:
+        return merged_data if handle.save(merged_data, expected=changed.version) else None
+    except (TimeoutError, JournalChangedError) as e:
+        print(f"Error: {e}")
+        return None
+
+def keep_lease(handle, stopped):
+    """
+    Renew the lease on the open journal every LEASE_SECONDS / 3 until stopped,
+    also while the menu waits for input (like the GUI's renew_lease).
+    """
+    while not stopped.wait(LEASE_SECONDS / 3):
+        try:
+            handle.renew()
+        except (OSError, TimeoutError) as e:
+            print(f"Warning: Could not renew journal lease: {e}")
+
 def import_ai_journal():
-    """Import an updated journal from AI and overwrite an existing journal."""
+    """
+    Import an updated journal from AI and overwrite an existing journal.
+    
+    Returns:
+        str: Path of the journal that was updated, or None
+    """
     print("\n=== Importing Updated Journal from AI ===")
     
     # Step 1: Show available JSON files in the logs directory
@@ -361,28 +544,83 @@ def import_ai_journal():
             input("Press Enter to continue...")
             return
         
-        # Add a confirmation step
-        confirm = input(f"Are you sure you want to overwrite '{target_journal}' with the contents of '{ai_filename}'? This cannot be undone. (y/n): ")
-        if confirm.lower() != 'y':
+        # Another program may have the target open with unsaved changes
+        if holders := other_holders(target_path):
+            print(f"{target_journal} is open in: {describe_holders(holders)}")
+            if input("Update it anyway? That program will merge when it saves. (y/n): ").lower() != 'y':
+                print("Import canceled.")
+                return
+        
+        # Step 4: Show what the AI changed and let the user pick
+        target_handle = JournalHandle(target_path, "cli import")
+        target_data = target_handle.load()
+        target_handle.close()
+        strip_export_keys(ai_journal_data)
+        base_data = load_sync_base(target_path)
+        if base_data is not None:
+            # Keep local edits made since the last export; records a budgeted
+            # export left out were not removed by the AI
+            restore_omitted(ai_journal_data, base_data, load_sync_omitted(target_path))
+            incoming_data = merge_with_base(base_data, target_data, ai_journal_data)
+            if incoming_data is None:
+                print("Import canceled.")
+                return
+        else:
+            incoming_data = ai_journal_data
+        merged_data = review_changes(target_data, incoming_data)
+        if merged_data is None:
             print("Import canceled.")
             return
         
-        # Step 4: Overwrite the selected log with the contents of the updated one
-        if save_journal(ai_journal_data, target_path):
-            # Step 5: Print confirmation message
+        # Step 5: Back up the selected log, then overwrite it with the
+        # accepted changes, unless it was changed while reviewing
+        try:
+            print(f"Backed up {target_journal} to {create_backup(target_path)}")
+        except OSError as e:
+            print(f"Warning: Could not back up {target_journal}: {e}")
+            if input("Import without a backup? (y/n): ").lower() != 'y':
+                print("Import canceled.")
+                return
+        saved = target_handle.save(merged_data)
+        target_handle.close()
+        if saved:
+            save_sync_base(ai_journal_data, target_path)
+            # Step 6: Print confirmation message
             print(f"Successfully imported {ai_filename} and overwrote {target_journal}.")
             input("Press Enter to continue...")
+            return target_path
         else:
             print(f"Failed to overwrite {target_journal}.")
             input("Press Enter to continue...")
+    except JournalChangedError as e:
+        print(f"{e} while you were reviewing. Nothing was written; please import again.")
+        input("Press Enter to continue...")
     except ValueError:
         print("Invalid input. Import canceled.")
     except Exception as e:
         print(f"Error during import: {e}")
         input("Press Enter to continue...")
 
-def main():
+def main(argv=None):
     """Main function to run the Solo D&D Journal application."""
+    parser = argparse.ArgumentParser(description="D&D Solo Journal")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile every menu action and save slow ones to logs/profiles/")
+    parser.add_argument("--profile-threshold", type=float, default=DEFAULT_THRESHOLD_MS,
+                        help="save profiles of actions taking more than this many ms of CPU time")
+    args = parser.parse_args(argv)
+    
+    profiler = None
+    if args.profile:
+        profiler = SessionProfiler(args.profile_threshold)
+        atexit.register(profiler.write_summary)
+    
+    def run_action(name, func, *func_args):
+        """Run a menu action, under the profiler when --profile is set."""
+        if profiler:
+            return profiler.call(name, func, *func_args)
+        return func(*func_args)
+    
     print("===== D&D Solo Journal =====")
     
     # Check if logs directory exists, create if needed
@@ -420,14 +658,41 @@ def main():
         return
     
     # Load the selected journal
+    handle = JournalHandle(journal_path, "cli")
     try:
-        journal_data = load_journal(journal_path)
-    except (FileNotFoundError, json.JSONDecodeError):
+        journal_data = run_action("load_journal", handle.load)
+    except (FileNotFoundError, json.JSONDecodeError, TimeoutError):
         print(f"Error loading journal from {journal_path}")
         return
+    atexit.register(handle.close)
+    # Renew the lease in the background too, so an idle session at the menu
+    # does not look stale to other programs
+    stop_renewing = threading.Event()
+    threading.Thread(target=keep_lease, args=(handle, stop_renewing), daemon=True).start()
+    atexit.register(stop_renewing.set)
+    if holders := other_holders(journal_path):
+        print(f"Note: this journal is also open in {describe_holders(holders)}; "
+              "changes saved there are merged when you save.")
+    
+    # Upgrade files written by older versions, once
+    if applied := migrate_journal(journal_data):
+        backup_path = backup_before_migration(journal_path)
+        journal_data = save_checked(handle, journal_data) or journal_data
+        print(f"Upgraded journal to version {journal_data['_meta']['version']} ({', '.join(applied)}); "
+              f"original saved to {backup_path}")
+    
+    # Keep the journal file small: old entries go to the archive
+    if moved := archive_entries(journal_path, journal_data):
+        journal_data = save_checked(handle, journal_data) or journal_data
+        print(f"Archived {moved} old journal entries (see archive.py)")
+    
+    # Campaign statistics are brought up to date on every save
+    stats = CampaignStats.load(journal_path)
+    # Section digests of the journal as loaded, to skip the save if nothing changed
+    saved_digests = JournalHashTree(journal_data).summary()
     
     # Show journal summary
-    print_summary(journal_data)
+    run_action("print_summary", print_summary, journal_data)
     
     # Main interaction loop
     while True:
@@ -443,29 +708,42 @@ def main():
         choice = input("\nChoose an option (1-7): ")
         
         if choice == '1':
-            journal_data = add_new_entry(journal_data)
+            journal_data = run_action("add_new_entry", add_new_entry, journal_data)
         elif choice == '2':
-            journal_data = update_inventory(journal_data)
+            journal_data = run_action("update_inventory", update_inventory, journal_data)
         elif choice == '3':
-            journal_data = update_quest_log(journal_data)
+            journal_data = run_action("update_quest_log", update_quest_log, journal_data, journal_path)
         elif choice == '4':
-            journal_data = update_character(journal_data)
+            journal_data = run_action("update_character", update_character, journal_data, journal_path)
         elif choice == '5':
-            print_summary(journal_data)
+            run_action("print_summary", print_summary, journal_data)
         elif choice == '6':
-            import_ai_journal()
-            # Reload the current journal in case it was the one overwritten
-            try:
-                journal_data = load_journal(journal_path)
-                print("Current journal reloaded.")
-            except:
-                print("Warning: Could not reload the current journal.")
+            updated_path = run_action("import_ai_journal", import_ai_journal)
+            # If the current journal was the one overwritten, merge the import
+            # with the changes made in this session
+            if updated_path and os.path.abspath(updated_path) == handle.path:
+                if (saved := save_checked(handle, journal_data)) is not None:
+                    journal_data = saved
+                    saved_digests = JournalHashTree(journal_data).summary()
+                    stats.sync_journal(journal_path, journal_data)
+                    stats.save()
+                    print("Current journal updated with the import and saved.")
+                else:
+                    print("Warning: The import was not merged into this session; it is merged when you save.")
         elif choice == '7':
-            if save_journal(journal_data, journal_path):
+            if not (changed := changed_sections(saved_digests, journal_data)):
+                print("No changes to save")
+                break
+            print(f"Changed: {', '.join(changed)}")
+            if (saved := run_action("save_journal", save_checked, handle, journal_data)) is not None:
+                journal_data = saved
+                stats.sync_journal(journal_path, journal_data)
+                stats.save()
                 print(f"Journal saved to {journal_path}")
-            else:
-                print("Error saving journal")
-            break
+                break
+            print("Error saving journal")
+            if input("Exit without saving? (y/n): ").lower() == 'y':
+                break
         else:
             print("Invalid option. Please try again.")
 
@@ -0,0 +1,181 @@
+# metrics.py – Lightweight timing instrumentation for journal operations
+# Off by default. Enable with the DND_JOURNAL_METRICS=1 environment variable
+# or metrics.enable(). When enabled, every measured operation appends one JSON
+# line (operation, wall and CPU time, bytes, record counts) to logs/metrics.jsonl,
+# which is rotated once it grows past MAX_LOG_BYTES.
+# - measure(operation): context manager yielding a dict for extra fields
+# - timed(operation): decorator form of measure()
+# - summarize_metrics(records): p50/p95 per operation for the GUI panel
+# GUI handlers that open dialogs spend most of their wall time waiting for the
+# user; their CPU time is the part worth looking at.
+
+import os
+import json
+import math
+import time
+import datetime
+import threading
+import functools
+from contextlib import contextmanager
+
+METRICS_ENV_VAR = "DND_JOURNAL_METRICS"
+
+MAX_LOG_BYTES = 1024 * 1024
+BACKUP_COUNT = 3
+
+_enabled = os.environ.get(METRICS_ENV_VAR, "").lower() in ("1", "true", "yes", "on")
+_write_lock = threading.Lock()
+
+def enable(flag=True):
+    """Turn metrics recording on or off for this process."""
+    global _enabled
+    _enabled = bool(flag)
+
+def is_enabled():
+    """Return True if metrics are being recorded."""
+    return _enabled
+
+def get_metrics_path():
+    """Get the absolute path to the metrics log."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, "logs", "metrics.jsonl")
+
+def count_records(data):
+    """
+    Count the records in a journal's main list sections.
+
+    Args:
+        data: Journal data as a dictionary
+
+    Returns:
+        int: Number of entries, items, quests, rumors and NPCs
+    """
+    if not isinstance(data, dict):
+        return 0
+    total = 0
+    for section in ("journal_log", "inventory", "npcs"):
+        if isinstance(data.get(section), list):
+            total += len(data[section])
+    quests = data.get("quests")
+    if isinstance(quests, dict):
+        total += sum(len(v) for v in quests.values() if isinstance(v, list))
+    return total
+
+def _rotate(path):
+    for i in range(BACKUP_COUNT - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+def _write(record):
+    path = get_metrics_path()
+    line = json.dumps(record, default=str) + "\n"
+    try:
+        with _write_lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if os.path.exists(path) and os.path.getsize(path) >= MAX_LOG_BYTES:
+                _rotate(path)
+            with open(path, "a") as file:
+                file.write(line)
+    except OSError as e:
+        print(f"Warning: Could not write metrics: {e}")
+
+@contextmanager
+def measure(operation):
+    """
+    Time a block of code and log it as one metrics record.
+    The yielded dict can be filled with extra fields such as "bytes" or
+    "records"; it is simply discarded when metrics are disabled.
+
+    Args:
+        operation: Name of the operation, e.g. "load_journal"
+    """
+    record = {}
+    if not _enabled:
+        yield record
+        return
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield record
+    finally:
+        record["op"] = operation
+        record["wall_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        record["cpu_ms"] = round((time.process_time() - cpu_start) * 1000, 3)
+        record["ts"] = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        _write(record)
+
+def timed(operation=None):
+    """
+    Decorator that measures every call of a function.
+
+    Args:
+        operation: Name to log under; defaults to the function's qualified name
+    """
+    def decorate(func):
+        name = operation or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with measure(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def load_metrics(path=None):
+    """
+    Read all metrics records, including rotated log files.
+
+    Returns:
+        list: Metrics records, oldest first
+    """
+    path = path or get_metrics_path()
+    records = []
+    for candidate in [f"{path}.{i}" for i in range(BACKUP_COUNT, 0, -1)] + [path]:
+        if not os.path.exists(candidate):
+            continue
+        with open(candidate, "r") as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # Partially written line
+    return records
+
+def _percentile(sorted_values, fraction):
+    # Nearest-rank percentile
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+def summarize_metrics(records):
+    """
+    Compute per-operation timing statistics.
+
+    Args:
+        records: Metrics records as returned by load_metrics()
+
+    Returns:
+        dict: operation -> {count, p50_ms, p95_ms, max_ms, p95_cpu_ms (None for
+              records written before CPU time was logged), last_bytes, last_records}
+    """
+    by_operation = {}
+    for record in records:
+        if "op" in record and "wall_ms" in record:
+            by_operation.setdefault(record["op"], []).append(record)
+
+    summary = {}
+    for operation, op_records in sorted(by_operation.items()):
+        timings = sorted(r["wall_ms"] for r in op_records)
+        cpu_timings = sorted(r["cpu_ms"] for r in op_records if "cpu_ms" in r)
+        last = op_records[-1]
+        summary[operation] = {
+            "count": len(timings),
+            "p50_ms": _percentile(timings, 0.50),
+            "p95_ms": _percentile(timings, 0.95),
+            "max_ms": timings[-1],
+            "p95_cpu_ms": _percentile(cpu_timings, 0.95) if cpu_timings else None,
+            "last_bytes": last.get("bytes"),
+            "last_records": last.get("records"),
+        }
+    return summary
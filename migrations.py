@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# migrations.py – Schema versioning for journal files
+# _meta.version records the schema a journal was written with. Migrations are
+# registered per version with @migration(from_version) and upgrade a journal one
+# version at a time, so a file from any past version reaches CURRENT_VERSION on
+# load. Each applied step is recorded in _meta.migrations. The upgraded journal
+# is written back (after a backup of the original in logs/backups/), so the
+# migration runs once per file rather than on every open.
+# Upgrade every journal in logs/ at once, in parallel:
+#   python3 migrations.py                  # migrate all journals in logs/
+#   python3 migrations.py --dry-run        # report what would be migrated
+
+import os
+import sys
+import json
+import argparse
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from journal_diff import assign_record_ids
+from utils import list_json_files
+from backups import create_backup
+from metrics import timed
+
+# from_version -> function upgrading a journal from that version to the next
+MIGRATIONS = {}
+
+def migration(from_version):
+    """Register a function that upgrades journal data from from_version to from_version + 1."""
+    def register(func):
+        MIGRATIONS[from_version] = func
+        return func
+    return register
+
+def get_version(data):
+    """
+    Get the schema version of journal data.
+
+    Returns:
+        int: _meta.version, 0 for files written before _meta existed
+    """
+    meta = data.get("_meta")
+    if not isinstance(meta, dict):
+        return 0
+    version = meta.get("version", 1)
+    return version if isinstance(version, int) else 1
+
+@migration(0)
+def add_meta(data):
+    """Add the _meta section used for AI sync tracking."""
+    data["_meta"] = {"version": 1, "last_ai_sync": None, "milestones": []}
+
+@migration(1)
+def normalize_sections(data):
+    """
+    Give every section its expected type and turn legacy plain-string records
+    into dicts, so readers no longer need to check each record.
+    """
+    for section, default in (("character", dict), ("inventory", list), ("npcs", list),
+                             ("journal_log", list), ("mental_state", dict)):
+        if not isinstance(data.get(section), default):
+            data[section] = default()
+    quests = data.get("quests")
+    if not isinstance(quests, dict):
+        quests = data["quests"] = {}
+    for status in ("active", "completed", "rumors"):
+        if not isinstance(quests.get(status), list):
+            quests[status] = []
+
+    data["inventory"] = [item if isinstance(item, dict) else {"name": str(item), "quantity": 1}
+                         for item in data["inventory"]]
+    data["npcs"] = [npc if isinstance(npc, dict) else {"name": str(npc)} for npc in data["npcs"]]
+    for status in ("active", "completed", "rumors"):
+        quests[status] = [quest if isinstance(quest, dict) else {"title": str(quest)}
+                          for quest in quests[status]]
+
+    entries = []
+    for entry in data["journal_log"]:
+        if not isinstance(entry, dict):
+            entry = {"content": str(entry)}
+        # Early journals used "day" and "entry" for the date and text
+        if "date" not in entry and "day" in entry:
+            entry["date"] = entry.pop("day")
+        if "content" not in entry and "entry" in entry:
+            entry["content"] = entry.pop("entry")
+        entries.append(entry)
+    data["journal_log"] = entries
+
+@migration(2)
+def add_record_ids(data):
+    """Give every record a stable id (see journal_diff.assign_record_ids)."""
+    assign_record_ids(data)
+
+CURRENT_VERSION = max(MIGRATIONS) + 1
+
+@timed("migrate_journal")
+def migrate_journal(data):
+    """
+    Upgrade journal data to CURRENT_VERSION in place.
+
+    Args:
+        data: Journal data as a dictionary
+
+    Returns:
+        list: Names of the migrations that were applied (empty if up to date)
+    """
+    version = get_version(data)
+    if version > CURRENT_VERSION:
+        print(f"Warning: Journal version {version} is newer than this app supports ({CURRENT_VERSION}).")
+        return []
+
+    applied = []
+    while version < CURRENT_VERSION:
+        step = MIGRATIONS[version]
+        step(data)
+        version += 1
+        meta = data["_meta"]
+        meta["version"] = version
+        meta.setdefault("migrations", []).append({
+            "name": step.__name__,
+            "to_version": version,
+            "timestamp": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+        applied.append(step.__name__)
+    return applied
+
+def backup_before_migration(filepath):
+    """
+    Copy a journal to logs/backups/ before it is rewritten by a migration.
+
+    Returns:
+        str: Path to the backup
+    """
+    # Pruned with the next backup rather than from migrate_all()'s worker processes
+    return create_backup(filepath, prune=False)
+
+def migrate_file(filepath, dry_run=False):
+    """
+    Migrate one journal file on disk.
+
+    Args:
+        filepath: Path to the journal file
+        dry_run: Only report what would be applied
+
+    Returns:
+        dict: {"file", "from_version", "to_version", "applied", "error"}
+    """
+    result = {"file": filepath, "from_version": None, "to_version": None, "applied": [], "error": None}
+    try:
+        with open(filepath, "r") as file:
+            data = json.load(file)
+        if not isinstance(data, dict):
+            raise ValueError("not a journal object")
+        result["from_version"] = get_version(data)
+        result["applied"] = migrate_journal(data)
+        result["to_version"] = get_version(data)
+        if result["applied"] and not dry_run:
+            backup_before_migration(filepath)
+            temp_path = filepath + ".tmp"
+            with open(temp_path, "w") as file:
+                json.dump(data, file, indent=2)
+            os.replace(temp_path, filepath)
+    except (OSError, ValueError) as e:
+        result["error"] = str(e)
+    return result
+
+def migrate_all(logs_dir, workers=None, dry_run=False):
+    """
+    Migrate every journal in a directory in parallel.
+
+    Args:
+        logs_dir: Directory containing the journal files
+        workers: Number of worker processes (default: one per CPU)
+        dry_run: Only report what would be applied
+
+    Returns:
+        list: migrate_file() results, in file name order
+    """
+    paths = [os.path.join(logs_dir, name) for name in sorted(list_json_files(logs_dir))]
+    if len(paths) < 2:
+        return [migrate_file(path, dry_run) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(migrate_file, paths, [dry_run] * len(paths)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade journal files to the current schema version")
+    parser.add_argument("--logs", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs"),
+                        help="directory containing the journals (default: logs/)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--dry-run", action="store_true", help="report without writing any files")
+    args = parser.parse_args()
+
+    results = migrate_all(args.logs, args.workers, args.dry_run)
+    failed = 0
+    for result in results:
+        name = os.path.basename(result["file"])
+        if result["error"]:
+            failed += 1
+            print(f"{name}: FAILED ({result['error']})")
+        elif result["applied"]:
+            action = "would migrate" if args.dry_run else "migrated"
+            print(f"{name}: {action} v{result['from_version']} -> v{result['to_version']} "
+                  f"({', '.join(result['applied'])})")
+        else:
+            print(f"{name}: up to date (v{result['from_version']})")
+    print(f"\n{len(results)} journal(s) checked, {failed} failed. Current version: {CURRENT_VERSION}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+# models.py – Compact typed in-memory model of a journal
+# Slotted record classes (Character, Item, Quest, DetailedLog, Rumor, NPC,
+# Entry) built once from the JSON dicts, so render code can read attributes
+# with known defaults instead of re-checking isinstance() and .get() per item.
+# Repeated strings (tags, givers, sources, locations, dates) are interned and
+# tag lists stored as tuples, which makes large journals noticeably smaller.
+# Conversion is lossless: to_dict() returns exactly what from_value() was given,
+# including unknown keys, key order and legacy non-dict records.
+
+import sys
+
+class _Missing:
+    """Marker for keys absent from the source dict. Falsy, like an empty value."""
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "MISSING"
+
+MISSING = _Missing()
+
+# Field kinds
+PLAIN = "plain"
+INTERN = "intern"
+TAGS = "tags"
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+class Record:
+    """
+    Base class for journal records. Subclasses list their fields as
+    (json key, attribute, display default, kind) tuples in FIELDS; kind is
+    PLAIN, INTERN, TAGS or a nested Record subclass.
+    """
+    __slots__ = ("extra", "key_order", "raw")
+    FIELDS = ()
+    # Attribute that shows the value of legacy non-dict records (e.g. plain strings)
+    RAW_ATTR = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._KEYS = frozenset(key for key, _, _, _ in cls.FIELDS)
+        cls._DEFAULTS = {attr: default for _, attr, default, _ in cls.FIELDS}
+
+    @classmethod
+    def from_value(cls, value):
+        """
+        Build a record from its JSON value.
+
+        Args:
+            value: A dict as stored in the journal, or a legacy non-dict value
+
+        Returns:
+            Record: The typed record
+        """
+        record = cls.__new__(cls)
+        record.extra = None
+        record.key_order = None
+
+        if not isinstance(value, dict):
+            record.raw = value
+            for _, attr, _, _ in cls.FIELDS:
+                setattr(record, attr, MISSING)
+            if cls.RAW_ATTR:
+                setattr(record, cls.RAW_ATTR, str(value))
+            return record
+
+        record.raw = MISSING
+        for key, attr, _, kind in cls.FIELDS:
+            field = value.get(key, MISSING)
+            if field is not MISSING and field is not None:
+                if kind is INTERN:
+                    field = _intern(field)
+                elif kind is TAGS:
+                    if type(field) is list:
+                        field = tuple(_intern(tag) for tag in field)
+                elif kind is not PLAIN:
+                    field = kind.from_value(field)
+            setattr(record, attr, field)
+
+        if len(value) != len(cls._KEYS) or any(key not in cls._KEYS for key in value):
+            extra = {key: field for key, field in value.items() if key not in cls._KEYS}
+            record.extra = extra or None
+        keys = list(value)
+        canonical = [key for key, _, _, _ in cls.FIELDS if key in value]
+        if record.extra:
+            canonical += list(record.extra)
+        if keys != canonical:
+            record.key_order = tuple(_intern(key) for key in keys)
+        return record
+
+    def to_dict(self):
+        """
+        Convert back to the JSON shape.
+
+        Returns:
+            dict: The record exactly as it was loaded (plus any edits)
+        """
+        if self.raw is not MISSING:
+            return self.raw
+        result = {}
+        for key, attr, _, kind in self.FIELDS:
+            field = getattr(self, attr)
+            if field is MISSING:
+                continue
+            if kind is TAGS and type(field) is tuple:
+                field = list(field)
+            elif isinstance(field, Record):
+                field = field.to_dict()
+            result[key] = field
+        if self.extra:
+            result.update(self.extra)
+        if self.key_order:
+            result = {key: result[key] for key in self.key_order if key in result}
+        return result
+
+    def get(self, attr):
+        """Return an attribute, or its display default when the key was absent."""
+        value = getattr(self, attr)
+        return self._DEFAULTS[attr] if value is MISSING else value
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class Character(Record):
+    __slots__ = ("name", "level", "char_class", "hp", "max_hp", "hit_dice", "fighting_style",
+                 "features", "skills", "saving_throws", "currency")
+    FIELDS = (
+        ("name", "name", "Unknown", PLAIN),
+        ("level", "level", "?", PLAIN),
+        ("class", "char_class", "Unknown", INTERN),
+        ("hp", "hp", "?", PLAIN),
+        ("max_hp", "max_hp", "?", PLAIN),
+        ("hit_dice", "hit_dice", "?", INTERN),
+        ("fighting_style", "fighting_style", "None", INTERN),
+        ("features", "features", (), PLAIN),
+        ("skills", "skills", (), TAGS),
+        ("saving_throws", "saving_throws", (), TAGS),
+        ("currency", "currency", {}, PLAIN),
+    )
+
+class Item(Record):
+    __slots__ = ("id", "name", "quantity", "description", "tags")
+    RAW_ATTR = "name"
+    FIELDS = (
+        ("id", "id", None, PLAIN),
+        ("name", "name", "Unknown item", INTERN),
+        ("quantity", "quantity", 1, PLAIN),
+        ("description", "description", "", PLAIN),
+        ("tags", "tags", (), TAGS),
+    )
+
+class DetailedLog(Record):
+    __slots__ = ("setting", "trigger", "player_choices", "enemy", "combat_notes", "aftermath",
+                 "character_notes", "why_it_matters", "tags")
+    FIELDS = (
+        ("setting", "setting", None, PLAIN),
+        ("trigger", "trigger", None, PLAIN),
+        ("player_choices", "player_choices", None, PLAIN),
+        ("enemy", "enemy", None, INTERN),
+        ("combat_notes", "combat_notes", None, PLAIN),
+        ("aftermath", "aftermath", None, PLAIN),
+        ("character_notes", "character_notes", None, PLAIN),
+        ("why_it_matters", "why_it_matters", None, PLAIN),
+        ("tags", "tags", (), TAGS),
+    )
+
+class Quest(Record):
+    __slots__ = ("id", "title", "description", "giver", "started", "completed_date", "milestones",
+                 "detailed_log")
+    RAW_ATTR = "title"
+    FIELDS = (
+        ("id", "id", None, PLAIN),
+        ("title", "title", "Unnamed quest", PLAIN),
+        ("description", "description", "No description", PLAIN),
+        ("giver", "giver", "Unknown", INTERN),
+        ("started", "started", "Unknown", INTERN),
+        ("completed_date", "completed_date", "Unknown", INTERN),
+        ("milestones", "milestones", (), PLAIN),
+        ("detailed_log", "detailed_log", None, DetailedLog),
+    )
+
+class Rumor(Record):
+    __slots__ = ("id", "title", "description", "source", "heard_date", "credibility", "tags")
+    RAW_ATTR = "title"
+    FIELDS = (
+        ("id", "id", None, PLAIN),
+        ("title", "title", "Unnamed rumor", PLAIN),
+        ("description", "description", "", PLAIN),
+        ("source", "source", "Unknown", INTERN),
+        ("heard_date", "heard_date", "Unknown", INTERN),
+        ("credibility", "credibility", 0, PLAIN),
+        ("tags", "tags", (), TAGS),
+    )
+
+class NPC(Record):
+    __slots__ = ("id", "name", "role", "location", "relationship", "notes", "quests_involved")
+    RAW_ATTR = "name"
+    FIELDS = (
+        ("id", "id", None, PLAIN),
+        ("name", "name", "Unknown", INTERN),
+        ("role", "role", "", INTERN),
+        ("location", "location", "", INTERN),
+        ("relationship", "relationship", 0, PLAIN),
+        ("notes", "notes", (), PLAIN),
+        ("quests_involved", "quests_involved", (), TAGS),
+    )
+
+class Entry(Record):
+    __slots__ = ("id", "date", "title", "content", "tags")
+    RAW_ATTR = "content"
+    FIELDS = (
+        ("id", "id", None, PLAIN),
+        ("date", "date", "Unknown date", INTERN),
+        ("title", "title", "Untitled entry", PLAIN),
+        ("content", "content", "", PLAIN),
+        ("tags", "tags", (), TAGS),
+    )
+
+# Record class for each keyed list section, addressed like update_section()
+SECTION_TYPES = {
+    "inventory": Item,
+    "quests.active": Quest,
+    "quests.completed": Quest,
+    "quests.rumors": Rumor,
+    "npcs": NPC,
+    "journal_log": Entry,
+}
+
+class JournalModel:
+    """
+    Typed view of a whole journal. List sections hold Record objects; any
+    other section (_meta, mental_state, unknown keys) is kept as-is.
+    """
+    __slots__ = ("character", "sections", "other", "sources")
+
+    @classmethod
+    def from_dict(cls, data, live=False):
+        """
+        Build the model from journal data. Unless live is set, the model keeps
+        no references to the source records, so the dicts can be released.
+
+        Args:
+            data: Journal data as a dictionary
+            live: Track the source lists so refresh() only converts appended records
+
+        Returns:
+            JournalModel: The typed model
+        """
+        model = cls()
+        model.character = None
+        model.sections = {}
+        model.sources = {}
+        # Same keys and order as data; converted sections are MISSING placeholders
+        model.other = {}
+        for key, value in data.items():
+            if key == "character" and isinstance(value, dict):
+                model.character = Character.from_value(value)
+                value = MISSING
+            elif key == "quests" and isinstance(value, dict):
+                value = {child: MISSING if f"quests.{child}" in SECTION_TYPES and isinstance(records, list)
+                         else records for child, records in value.items()}
+            elif key in SECTION_TYPES and isinstance(value, list):
+                value = MISSING
+            model.other[key] = value
+        for section, record_type in SECTION_TYPES.items():
+            records = _section_list(data, section)
+            if records is not None:
+                model.sections[section] = [record_type.from_value(r) for r in records]
+                if live:
+                    model.sources[section] = records
+        return model
+
+    def refresh(self, data, section):
+        """
+        Re-convert one list section of the live journal data after it changed.
+        If the section is the same list object as last time and only grew,
+        only the new records are converted.
+
+        Args:
+            data: Journal data the model was built from
+            section: Section path, e.g. "inventory" or "quests.active"
+        """
+        records = _section_list(data, section)
+        if records is None:
+            self.sections.pop(section, None)
+            self.sources.pop(section, None)
+            return
+        record_type = SECTION_TYPES[section]
+        converted = self.sections.get(section)
+        if converted is not None and self.sources.get(section) is records and len(converted) <= len(records):
+            converted.extend(record_type.from_value(r) for r in records[len(converted):])
+        else:
+            converted = [record_type.from_value(r) for r in records]
+            self.sections[section] = converted
+        # Keep a reference to the live list so in-place growth can be detected
+        self.sources[section] = records
+
+    def invalidate(self, section=None):
+        """Force the next refresh() of a section (default: all) to re-convert it, e.g. after records were edited in place."""
+        if section is None:
+            self.sources.clear()
+        else:
+            self.sources.pop(section, None)
+
+    def records(self, section):
+        """Return the typed records of a list section (empty if absent)."""
+        return self.sections.get(section, [])
+
+    def to_dict(self):
+        """
+        Convert the model back to journal data.
+
+        Returns:
+            dict: Journal data equal to the data the model was built from
+        """
+        data = {}
+        for key, value in self.other.items():
+            if key == "character" and value is MISSING:
+                value = self.character.to_dict()
+            elif key == "quests" and isinstance(value, dict):
+                value = {child: [r.to_dict() for r in self.records(f"quests.{child}")] if records is MISSING
+                         else records for child, records in value.items()}
+            elif value is MISSING:
+                value = [r.to_dict() for r in self.records(key)]
+            data[key] = value
+        return data
+
+def _section_list(data, section):
+    parent, _, child = section.partition(".")
+    value = data.get(parent)
+    if child:
+        value = value.get(child) if isinstance(value, dict) else None
+    return value if isinstance(value, list) else None
@@ -0,0 +1,162 @@
+# profiling.py – Per-handler cProfile capture for the GUI and CLI
+# Started with --profile on gui.py or main.py. Every Tk command callback or
+# CLI menu action runs under cProfile; calls slower than the threshold are
+# dumped as .pstats files under logs/profiles/<session>/ for inspection with
+# `python -m pstats` or snakeviz, and a summary of the slowest handlers and
+# functions across the whole session is written when the app exits.
+# Handlers are timed in CPU time, not wall time: CLI actions wait for input()
+# and GUI callbacks for modal dialogs, and that waiting is not slowness.
+
+import os
+import re
+import json
+import time
+import cProfile
+import pstats
+import datetime
+import functools
+
+DEFAULT_THRESHOLD_MS = 250
+
+# Number of functions/handlers listed in the session summary
+TOP_N = 20
+
+def get_profiles_dir():
+    """Get the absolute path to the profiles directory."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, "logs", "profiles")
+
+class SessionProfiler:
+    """Profiles handler calls and keeps session-wide statistics."""
+
+    def __init__(self, threshold_ms=DEFAULT_THRESHOLD_MS, output_dir=None):
+        session = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.output_dir = output_dir or os.path.join(get_profiles_dir(), session)
+        self.threshold_ms = threshold_ms
+        self.handlers = {}
+        self.session_stats = None
+        self._depth = 0
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def call(self, name, func, *args, **kwargs):
+        """
+        Run func under the profiler and record its CPU time under the handler name.
+        Nested handler calls (e.g. callbacks fired while a modal dialog waits)
+        are timed but not profiled separately, since cProfile cannot nest.
+        """
+        stats = self.handlers.setdefault(name, {"calls": 0, "slow_calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+        if self._depth:
+            start = time.process_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._record(name, stats, (time.process_time() - start) * 1000, None)
+
+        profile = cProfile.Profile()
+        self._depth += 1
+        # CPU time, so time spent waiting for the user does not count
+        start = time.process_time()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            elapsed_ms = (time.process_time() - start) * 1000
+            self._depth -= 1
+            self._record(name, stats, elapsed_ms, profile)
+
+    def wrap(self, name, func):
+        """Return a wrapper that profiles every call of func under name."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(name, func, *args, **kwargs)
+        return wrapper
+
+    def _record(self, name, stats, elapsed_ms, profile):
+        stats["calls"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if profile is None:
+            return
+        try:
+            profile.create_stats()
+            if self.session_stats is None:
+                self.session_stats = pstats.Stats(profile)
+            else:
+                self.session_stats.add(profile)
+            if elapsed_ms >= self.threshold_ms:
+                stats["slow_calls"] += 1
+                safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)[:80]
+                path = os.path.join(self.output_dir, f"{safe_name}_{stats['calls']}_{int(elapsed_ms)}ms.pstats")
+                profile.dump_stats(path)
+        except Exception as e:
+            print(f"Warning: Could not save profile for {name}: {e}")
+
+    def summary(self):
+        """
+        Build the session summary.
+
+        Returns:
+            dict: Slowest handlers by total time and slowest functions by
+                  cumulative time across all profiled calls
+        """
+        handlers = sorted(self.handlers.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        functions = []
+        if self.session_stats is not None:
+            entries = self.session_stats.stats.items()
+            ranked = sorted(entries, key=lambda item: item[1][3], reverse=True)[:TOP_N]
+            for (filename, line, function), (_, calls, total, cumulative, _) in ranked:
+                functions.append({
+                    "function": f"{os.path.basename(filename)}:{line}({function})",
+                    "calls": calls,
+                    "total_ms": round(total * 1000, 3),
+                    "cumulative_ms": round(cumulative * 1000, 3),
+                })
+        return {
+            "threshold_ms": self.threshold_ms,
+            "handlers": [{"handler": name, **{k: round(v, 3) if isinstance(v, float) else v
+                                               for k, v in stats.items()}}
+                         for name, stats in handlers[:TOP_N]],
+            "functions": functions,
+        }
+
+    def write_summary(self):
+        """
+        Write summary.json (and session.pstats) to the session directory and
+        print the top offenders.
+
+        Returns:
+            str: Path to the summary file
+        """
+        summary = self.summary()
+        path = os.path.join(self.output_dir, "summary.json")
+        with open(path, "w") as file:
+            json.dump(summary, file, indent=2)
+        if self.session_stats is not None:
+            self.session_stats.dump_stats(os.path.join(self.output_dir, "session.pstats"))
+
+        print("\n===== PROFILE SUMMARY =====")
+        for handler in summary["handlers"][:10]:
+            print(f"{handler['handler']}: {handler['calls']} calls, {handler['total_ms']:.0f} ms total, "
+                  f"{handler['max_ms']:.0f} ms max, {handler['slow_calls']} slow")
+        print(f"Profiles saved to {self.output_dir}")
+        return path
+
+def _callback_name(func):
+    name = getattr(func, "__qualname__", None) or getattr(func, "__name__", None) or repr(func)
+    return f"tk:{name}"
+
+def install_tk_profiler(profiler):
+    """
+    Profile every Tk callback (button commands, bindings, after() calls)
+    registered from now on. Must be called before the widgets are created.
+
+    Args:
+        profiler: SessionProfiler collecting the results
+    """
+    import tkinter
+    base = tkinter.CallWrapper
+
+    class ProfiledCallWrapper(base):
+        def __init__(self, func, subst, widget):
+            super().__init__(profiler.wrap(_callback_name(func), func), subst, widget)
+
+    tkinter.CallWrapper = ProfiledCallWrapper
@@ -0,0 +1,155 @@
+# quests.py – ID-keyed quest log with status transitions
+# Quests are stored in the journal as quests.active / quests.completed /
+# quests.rumors lists, which is what the AI reads and writes. QuestLog indexes
+# them by their stable id, so a quest is looked up and moved between statuses
+# in O(1) no matter where it sits in a list, and the GUI addresses quests by id
+# instead of listbox position. commit() writes the changed status lists back.
+
+import datetime
+from journal_diff import new_record_id
+
+# Status -> journal section under "quests", in display order
+STATUSES = ("active", "completed", "rumors")
+
+# Allowed status changes
+TRANSITIONS = {
+    "rumors": ("active",),
+    "active": ("completed",),
+    "completed": ("active",),
+}
+
+# Fields stamped on a quest when it enters a status
+_DATE_FIELDS = {"active": "started", "completed": "completed_date"}
+
+class QuestLog:
+    """Index of a journal's quests by id, with ordered per-status views."""
+
+    def __init__(self, journal_data):
+        """
+        Index the quests of a journal. Records should already have ids
+        (see journal_diff.assign_record_ids); any that do not are given one.
+
+        Args:
+            journal_data: Journal data as a dictionary
+        """
+        quests = journal_data.get("quests")
+        if not isinstance(quests, dict):
+            quests = {}
+            journal_data["quests"] = quests
+        self.quests = quests
+        # status -> {id: quest}, in list order; dicts keep order and allow O(1) moves
+        self._views = {}
+        self._status = {}
+        self._dirty = set()
+        for status in STATUSES:
+            records = quests.get(status)
+            if not isinstance(records, list):
+                records = []
+                quests[status] = records
+            view = {}
+            for record in records:
+                if not isinstance(record, dict):
+                    continue  # Legacy plain-string quests cannot be addressed by id
+                if not record.get("id") or record["id"] in self._status:
+                    record["id"] = new_record_id(f"quests.{status}")
+                view[record["id"]] = record
+                self._status[record["id"]] = status
+            self._views[status] = view
+            if len(view) != len(records):
+                # Keep legacy records in place: the list stays the source for this status
+                self._views[status] = None
+
+    def status(self, quest_id):
+        """Return the status of a quest, or None if it does not exist."""
+        return self._status.get(quest_id)
+
+    def get(self, quest_id):
+        """Return the quest with this id, or None."""
+        status = self._status.get(quest_id)
+        if status is None:
+            return None
+        view = self._views[status]
+        if view is not None:
+            return view[quest_id]
+        return next(q for q in self.quests[status] if isinstance(q, dict) and q.get("id") == quest_id)
+
+    def view(self, status):
+        """
+        Get the quests with a status in display order.
+
+        Returns:
+            list: Quest records (the journal's own list for that status)
+        """
+        self.commit()
+        return self.quests[status]
+
+    def add(self, status, quest):
+        """
+        Add a new quest or rumor.
+
+        Args:
+            status: "active" or "rumors"
+            quest: Quest dict; an id is assigned if it has none
+
+        Returns:
+            str: The quest id
+        """
+        if not quest.get("id") or quest["id"] in self._status:
+            quest = {"id": new_record_id(f"quests.{status}"), **{k: v for k, v in quest.items() if k != "id"}}
+        self.quests[status].append(quest)
+        if self._views[status] is not None:
+            self._views[status][quest["id"]] = quest
+        self._status[quest["id"]] = status
+        return quest["id"]
+
+    def move(self, quest_id, new_status, date=None, **fields):
+        """
+        Move a quest to another status, e.g. complete it or accept a rumor.
+
+        Args:
+            quest_id: Id of the quest
+            new_status: Target status
+            date: Date stamped as started/completed_date; if omitted, today's
+                  date is used unless the quest already has one
+            **fields: Other fields to set on the quest
+
+        Returns:
+            dict: The moved quest
+
+        Raises:
+            KeyError: If there is no quest with this id
+            ValueError: If the transition is not allowed
+        """
+        status = self._status.get(quest_id)
+        if status is None:
+            raise KeyError(f"No quest with id {quest_id}")
+        if new_status not in TRANSITIONS[status]:
+            raise ValueError(f"Cannot move a quest from {status} to {new_status}")
+
+        quest = self.get(quest_id)
+        if self._views[status] is not None:
+            del self._views[status][quest_id]
+        else:
+            self.quests[status].remove(quest)
+        self._dirty.add(status)
+
+        if status == "completed":
+            quest.pop("completed_date", None)  # Reopened
+        date_field = _DATE_FIELDS.get(new_status)
+        if date_field and (date or not quest.get(date_field)):
+            quest[date_field] = date or datetime.datetime.now().strftime("%Y-%m-%d")
+        quest.update(fields)
+
+        if self._views[new_status] is not None:
+            self._views[new_status][quest_id] = quest
+        self.quests[new_status].append(quest)
+        self._status[quest_id] = new_status
+        return quest
+
+    def commit(self):
+        """Write the status lists that lost quests back to the journal."""
+        for status in self._dirty:
+            view = self._views[status]
+            if view is not None:
+                self.quests[status] = list(view.values())
+        self._dirty.clear()
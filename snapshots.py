@@ -0,0 +1,198 @@
+# snapshots.py – Milestone snapshot store for viewing past campaign states
+# Each milestone (quest completion, level up, AI sync) captures the journal as
+# a tree of content-addressed blobs under logs/snapshots/<journal>/:
+# - dict sections (character, mental_state, _meta, ...) are one blob each
+# - keyed record lists (journal_log, inventory, quests, npcs) are split into
+#   fixed-size chunks, so appending an entry only adds one new chunk
+# Unchanged sections and chunks are shared between milestones, so a snapshot
+# costs only what changed since the previous one. Blobs are cached in memory,
+# which keeps repeated checkouts and comparisons cheap.
+
+import os
+import json
+import copy
+import hashlib
+import datetime
+from functools import lru_cache
+from journal_diff import RECORD_SECTIONS, get_path, diff_journals, assign_record_ids
+from metrics import timed
+
+# Records per chunk for keyed list sections
+CHUNK_SIZE = 128
+
+def get_snapshot_dir(journal_path):
+    """
+    Get the snapshot store directory for a journal.
+
+    Args:
+        journal_path: Path to the journal file
+
+    Returns:
+        str: Path to logs/snapshots/<journal name>
+    """
+    name = os.path.splitext(os.path.basename(journal_path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(journal_path)), "snapshots", name)
+
+def _serialize(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+def _write_blob(store_dir, value):
+    """Store a value under its content hash and return the hash."""
+    payload = _serialize(value)
+    digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    path = os.path.join(store_dir, "objects", digest[:2], digest + ".json")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(payload)
+    return digest
+
+@lru_cache(maxsize=4096)
+def _read_blob(store_dir, digest):
+    # Blobs are immutable, so caching by path and hash is always safe
+    with open(os.path.join(store_dir, "objects", digest[:2], digest + ".json"), "r") as file:
+        return json.load(file)
+
+def _load_index(store_dir):
+    index_path = os.path.join(store_dir, "index.json")
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, "r") as file:
+        return json.load(file)
+
+def _save_index(store_dir, index):
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, "index.json"), "w") as file:
+        json.dump(index, file, indent=2)
+
+@timed("take_snapshot")
+def take_snapshot(data, journal_path):
+    """
+    Capture the current journal state in the snapshot store.
+
+    Args:
+        data: Journal data as a dictionary
+        journal_path: Path to the journal file the data belongs to
+
+    Returns:
+        str: Snapshot id (the hash of the snapshot tree)
+    """
+    store_dir = get_snapshot_dir(journal_path)
+    tree = {"sections": {}, "lists": {}}
+
+    # Keyed record lists are chunked so unchanged chunks are shared
+    for section in RECORD_SECTIONS:
+        records = get_path(data, section)
+        if isinstance(records, list):
+            tree["lists"][section] = [_write_blob(store_dir, records[i:i + CHUNK_SIZE])
+                                      for i in range(0, len(records), CHUNK_SIZE)]
+
+    # Everything else is stored one blob per top-level section
+    for section, value in data.items():
+        if section in tree["lists"]:
+            continue
+        if isinstance(value, dict):
+            value = {k: v for k, v in value.items() if f"{section}.{k}" not in tree["lists"]}
+        tree["sections"][section] = _write_blob(store_dir, value)
+
+    snapshot_id = hashlib.sha1(_serialize(tree).encode("utf-8")).hexdigest()[:16]
+    index = _load_index(store_dir)
+    if snapshot_id not in index:
+        index[snapshot_id] = tree
+        _save_index(store_dir, index)
+    return snapshot_id
+
+def record_milestone(data, journal_path, milestone_type, **details):
+    """
+    Snapshot the journal and append a milestone referencing the snapshot
+    to _meta.milestones.
+
+    Args:
+        data: Journal data as a dictionary
+        journal_path: Path to the journal file, or None to skip the snapshot
+        milestone_type: e.g. "quest_completed", "level_up" or "ai_sync"
+        **details: Extra milestone fields (quest title, new level, ...)
+
+    Returns:
+        dict: The recorded milestone
+    """
+    meta = data.setdefault("_meta", {"version": 1, "last_ai_sync": None, "milestones": []})
+    meta.setdefault("milestones", [])
+
+    milestone = {"type": milestone_type, **details,
+                 "timestamp": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")}
+    if journal_path:
+        try:
+            milestone["snapshot"] = take_snapshot(data, journal_path)
+        except OSError as e:
+            print(f"Warning: Could not store milestone snapshot: {e}")
+    meta["milestones"].append(milestone)
+    return milestone
+
+def _load_tree(journal_path, snapshot_id):
+    store_dir = get_snapshot_dir(journal_path)
+    tree = _load_index(store_dir).get(snapshot_id)
+    if tree is None:
+        raise KeyError(f"Snapshot {snapshot_id} not found")
+    return store_dir, tree
+
+@timed("load_snapshot")
+def load_snapshot(journal_path, snapshot_id, sections=None):
+    """
+    Check out the journal as it was at a snapshot. The result must be
+    treated as read-only, as it may share cached objects with other checkouts.
+
+    Args:
+        journal_path: Path to the journal file
+        snapshot_id: Id returned by take_snapshot()
+        sections: Optional set of section names/paths to load; None loads all
+
+    Returns:
+        dict: Journal data at the snapshot
+    """
+    store_dir, tree = _load_tree(journal_path, snapshot_id)
+    data = {}
+    for section, digest in tree["sections"].items():
+        if sections is None or section in sections:
+            value = _read_blob(store_dir, digest)
+            data[section] = dict(value) if isinstance(value, dict) else value
+    for section, chunks in tree["lists"].items():
+        if sections is None or section in sections or section.partition(".")[0] in sections:
+            records = []
+            for digest in chunks:
+                records.extend(_read_blob(store_dir, digest))
+            parent, _, child = section.partition(".")
+            if child:
+                data.setdefault(parent, {})[child] = records
+            else:
+                data[parent] = records
+    return data
+
+@timed("compare_snapshots")
+def compare_snapshots(journal_path, old_id, new_id):
+    """
+    Compare two snapshots, loading only the sections whose hashes differ.
+
+    Args:
+        journal_path: Path to the journal file
+        old_id: Snapshot id of the earlier milestone
+        new_id: Snapshot id of the later milestone
+
+    Returns:
+        dict: Changeset as produced by journal_diff.diff_journals()
+    """
+    _, old_tree = _load_tree(journal_path, old_id)
+    _, new_tree = _load_tree(journal_path, new_id)
+
+    changed = set()
+    for kind in ("sections", "lists"):
+        for section in {**old_tree[kind], **new_tree[kind]}:
+            if old_tree[kind].get(section) != new_tree[kind].get(section):
+                changed.add(section)
+
+    # Snapshots from before stable record ids are matched to the newer ones by
+    # natural key; copy first, since checkouts share cached blobs
+    old = copy.deepcopy(load_snapshot(journal_path, old_id, changed))
+    new = load_snapshot(journal_path, new_id, changed)
+    assign_record_ids(old, new, create=False)
+    return diff_journals(old, new)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# test_journal_server.py – Round trips against journal_server on localhost
+# Starts the server on a free port with a copy of journal_template.json and
+# checks GET/304, PATCH, If-Match (412), malformed changes and the batched flush.
+#   python3 -m pytest tests/
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+import http.client
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from journal_server import JournalStore, JournalRequestHandler
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "journal_template.json")
+
+class JournalServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.journal_path = os.path.join(self.directory, "hero.json")
+        shutil.copy(TEMPLATE, self.journal_path)
+        self.store = JournalStore(self.journal_path, flush_delay=0.1)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), JournalRequestHandler)
+        self.server.store = self.store
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.store.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def request(self, method, path, body=None, headers=None):
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+        try:
+            payload = None if body is None else json.dumps(body).encode("utf-8")
+            connection.request(method, path, payload, headers or {})
+            response = connection.getresponse()
+            text = response.read()
+            return response.status, response.getheader("ETag"), json.loads(text) if text else None
+        finally:
+            connection.close()
+
+    def test_get_and_not_modified(self):
+        status, etag, body = self.request("GET", "/api/character")
+        self.assertEqual(status, 200)
+        self.assertIn("name", body)
+        status, same_etag, body = self.request("GET", "/api/character", headers={"If-None-Match": etag})
+        self.assertEqual((status, same_etag, body), (304, etag, None))
+        self.assertEqual(self.request("GET", "/api/nothing")[0], 404)
+
+    def test_patch_and_flush(self):
+        _, etag, _ = self.request("GET", "/api/inventory")
+        status, new_etag, body = self.request(
+            "PATCH", "/api/inventory", {"changes": [{"op": "add", "value": {"name": "Rope", "quantity": 1}}]},
+            {"If-Match": etag})
+        self.assertEqual((status, body["applied"]), (200, 1))
+        self.assertNotEqual(new_etag, etag)
+
+        # The old ETag no longer matches
+        status, _, _ = self.request(
+            "PATCH", "/api/inventory", {"changes": [{"op": "add", "value": {"name": "Torch"}}]},
+            {"If-Match": etag})
+        self.assertEqual(status, 412)
+
+        deadline = time.time() + 5
+        while self.store.dirty and time.time() < deadline:
+            time.sleep(0.05)
+        with open(self.journal_path) as file:
+            names = [item.get("name") for item in json.load(file)["inventory"]]
+        self.assertIn("Rope", names)
+        self.assertNotIn("Torch", names)
+
+    def test_quests_default_to_active(self):
+        status, _, body = self.request(
+            "PATCH", "/api/quests", {"changes": [{"op": "add", "value": {"title": "Find the key"}}]})
+        self.assertEqual((status, body["applied"]), (200, 1))
+        _, _, quests = self.request("GET", "/api/quests")
+        self.assertIn("Find the key", [quest["title"] for quest in quests["active"]])
+
+        # Whole-section changes would drop every quest list
+        status, _, body = self.request(
+            "PATCH", "/api/quests", {"changes": [{"op": "remove", "section": "quests"}]})
+        self.assertEqual((status, body["applied"]), (422, 0))
+        self.assertIn("completed", self.request("GET", "/api/quests")[2])
+
+    def test_malformed_changes(self):
+        self.assertEqual(self.request("PATCH", "/api/journal", {"changes": [{"op": "remove"}]})[0], 400)
+        for change in ({"op": "remove", "id": ["a"]},
+                       {"op": "update", "id": "x", "fields": {}, "remove_fields": 5}):
+            status, _, body = self.request("PATCH", "/api/inventory", {"changes": [change]})
+            self.assertEqual((status, body["applied"]), (422, 0))
+        status, _, body = self.request("PATCH", "/api/character", {"changes": [{"op": "remove"}]})
+        self.assertEqual((status, body["applied"]), (422, 0))
+        self.assertIn("name", self.request("GET", "/api/character")[2])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,12 +4,17 @@
 # - save_journal(data, filepath): saves the updated data as JSON
 # - update_section(data, section_name, updates): safely update a journal section
 # - print_summary(data): optional, outputs a human-readable summary of key info
+#   (build_summary(data) returns the same summary as data and text)
 # All functions should handle exceptions gracefully (e.g., file not found, bad data)
 
 import json
 import os
+import hashlib
 import datetime
+from collections import OrderedDict
 from pathlib import Path
+from metrics import measure, timed, count_records
+from journal_diff import new_record_id, RECORD_SECTIONS, get_path
 
 def load_journal(filepath):
     """
@@ -23,16 +28,19 @@ def load_journal(filepath):
         dict: Journal data as a dictionary
     """
     try:
-        with open(filepath, 'r') as file:
-            return json.load(file)
+        with measure("load_journal") as metric, open(filepath, 'r') as file:
+            data = json.load(file)
+            metric["bytes"] = os.fstat(file.fileno()).st_size
+            metric["records"] = count_records(data)
+            return data
     except FileNotFoundError:
         print(f"Error: File {filepath} not found.")
         raise
-    except json.JSONDecodeError:
-        print(f"Error: File {filepath} contains invalid JSON.")
+    except json.JSONDecodeError as e:
+        print(f"Error: File {filepath} contains invalid JSON ({e.msg} at line {e.lineno} column {e.colno}).")
         raise
 
-def save_journal(data, filepath):
+def save_journal(data, filepath, compact=False):
     """
     Save journal data to the specified path.
     Creates parent directories if they don't exist.
@@ -40,6 +48,7 @@ def save_journal(data, filepath):
     Args:
         data: Journal data as a dictionary
         filepath: Path where the journal should be saved
+        compact: Write minified JSON instead of indented JSON
     
     Returns:
         bool: True if saved successfully, False otherwise
@@ -48,8 +57,13 @@ def save_journal(data, filepath):
         # Ensure the directory exists
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         
-        with open(filepath, 'w') as file:
-            json.dump(data, file, indent=2)
+        with measure("save_journal") as metric, open(filepath, 'w') as file:
+            if compact:
+                json.dump(data, file, separators=(",", ":"))
+            else:
+                json.dump(data, file, indent=2)
+            metric["bytes"] = file.tell()
+            metric["records"] = count_records(data)
         return True
     except Exception as e:
         print(f"Error saving journal: {e}")
@@ -97,6 +111,8 @@ def add_journal_entry(data, entry):
         dict: Updated journal data
     """
     if "journal_log" in data:
+        if not entry.get("id"):
+            entry = {"id": new_record_id("journal_log"), **entry}
         if not entry.get("date"):
             entry["date"] = datetime.datetime.now().strftime("%Y-%m-%d")
         data["journal_log"].append(entry)
@@ -107,71 +123,204 @@ def get_quest_titles(quests, section):
     return [q.get('title', 'Unnamed Quest') if isinstance(q, dict) else str(q)
             for q in quests.get(section, [])]
 
-def print_summary(data):
+# Sections of build_summary() in display order
+SUMMARY_SECTIONS = ("character", "quests", "inventory", "entries", "mental_state")
+
+# Default limits: items listed, recent entries and notes shown, characters kept
+SUMMARY_LIMITS = {
+    "inventory": 10,
+    "entries": 3,
+    "notes": 3,
+    "description": 60,
+    "content": 200,
+}
+
+# (section, content key) -> (structured data, text), most recently used last
+_SUMMARY_CACHE = OrderedDict()
+SUMMARY_CACHE_SIZE = 64
+
+def _summary_key(data, section, limits):
     """
-    Print a comprehensive human-readable summary of the journal data.
-    
-    Args:
-        data: Journal data as a dictionary
+    Key of the content a summary section shows: the raw values it reads,
+    as a tuple, which is much cheaper to build and hash than the section.
     """
+    def fields(records, *names):
+        return tuple([tuple(map(record.get, names)) if isinstance(record, dict) else str(record)
+                      for record in records])
+
+    if section == "character":
+        character = data.get("character", {})
+        key = fields([character], "name", "level", "class", "hp", "max_hp", "hit_dice", "fighting_style") + \
+            fields([character.get("currency", {})], "gp", "sp", "cp") + (tuple(character.get("features", [])),)
+    elif section == "quests":
+        quests = data.get("quests", {})
+        key = (fields(quests.get("active", []), "title", "description"),
+               fields(quests.get("completed", []), "title", "completed_date"),
+               fields(quests.get("rumors", []), "title", "source"))
+    elif section == "inventory":
+        inventory = data.get("inventory", [])
+        key = (len(inventory), fields(inventory[:limits["inventory"]], "name", "quantity"))
+    elif section == "entries":
+        entries = data.get("journal_log", [])
+        recent = entries[-limits["entries"]:] if limits["entries"] else []
+        key = (len(entries), fields(recent, "date", "day", "title", "content", "entry"))
+    elif section == "mental_state":
+        notes = data.get("mental_state", {}).get("notes", [])
+        key = tuple(notes[-limits["notes"]:]) if limits["notes"] else ()
+    else:
+        raise ValueError(f"Unknown summary section '{section}'")
+    key = (section, key, tuple(sorted(limits.items())))
     try:
+        hash(key)
+    except TypeError:
+        # Lists or dicts where text was expected; fall back to a hash of their JSON
+        key = (section, hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest())
+    return key
+
+def _summary_data(data, section, limits):
+    """Pick the fields a summary section shows; this is what its text is rendered from."""
+    if section == "character":
         character = data.get("character", {})
-        print("\n===== CHARACTER SUMMARY =====")
-        print(f"Name: {character.get('name', 'Unknown')}")
-        print(f"Level {character.get('level', '?')} {character.get('class', 'Unknown')}")
-        print(f"HP: {character.get('hp', '?')}/{character.get('max_hp', '?')}")
-        print(f"Hit Dice: {character.get('hit_dice', '?')}")
-        print(f"Fighting Style: {character.get('fighting_style', 'None')}")
-        
         currency = character.get("currency", {})
-        print(f"\nCurrency: {currency.get('gp', 0)} GP, {currency.get('sp', 0)} SP, {currency.get('cp', 0)} CP")
-        
-        if features := character.get("features", []):
-            print("\nFeatures:")
-            for feature in features:
-                print(f"- {feature}")
-        
+        return {
+            "name": character.get("name", "Unknown"),
+            "level": character.get("level", "?"),
+            "class": character.get("class", "Unknown"),
+            "hp": character.get("hp", "?"),
+            "max_hp": character.get("max_hp", "?"),
+            "hit_dice": character.get("hit_dice", "?"),
+            "fighting_style": character.get("fighting_style", "None"),
+            "currency": {coin: currency.get(coin, 0) for coin in ("gp", "sp", "cp")},
+            "features": list(character.get("features", [])),
+        }
+    if section == "quests":
         quests = data.get("quests", {})
-        
-        print("\n===== QUESTS =====")
-        print("Active Quests:")
-        for i, quest in enumerate(quests.get("active", []), 1):
-            print(f"{i}. {quest.get('title', 'Untitled')} - {quest.get('description', 'No description')[:60]}...")
-        
-        print("\nCompleted Quests:")
-        for i, quest in enumerate(quests.get("completed", []), 1):
-            print(f"{i}. {quest.get('title', 'Untitled')} - Completed: {quest.get('completed_date', 'Unknown')}")
-            
-        print("\nRumors:")
-        for i, rumor in enumerate(quests.get("rumors", []), 1):
-            print(f"{i}. {rumor.get('title', 'Untitled')} - Source: {rumor.get('source', 'Unknown')}")
-        
-        print("\n===== INVENTORY =====")
-        for item in data.get("inventory", [])[:10]:  # Show first 10 items
-            name = item.get("name", "Unnamed item")
-            qty = item.get("quantity", 1)
-            print(f"- {name} (x{qty})")
-        if len(data.get("inventory", [])) > 10:
-            print(f"... and {len(data.get('inventory', [])) - 10} more items")
-        
-        print("\n===== RECENT JOURNAL ENTRIES =====")
+        fields = {"active": "description", "completed": "completed_date", "rumors": "source"}
+        defaults = {"description": "No description", "completed_date": "Unknown", "source": "Unknown"}
+        return {
+            status: [{"title": quest.get("title", "Untitled"),
+                      field: str(quest.get(field, defaults[field]))[:limits["description"]]
+                      if field == "description" else quest.get(field, defaults[field])}
+                     if isinstance(quest, dict) else {"title": str(quest), field: defaults[field]}
+                     for quest in quests.get(status, [])]
+            for status, field in fields.items()
+        }
+    if section == "inventory":
+        inventory = data.get("inventory", [])
+        return {
+            "items": [{"name": item.get("name", "Unnamed item"), "quantity": item.get("quantity", 1)}
+                      if isinstance(item, dict) else {"name": str(item), "quantity": 1}
+                      for item in inventory[:limits["inventory"]]],
+            "total": len(inventory),
+        }
+    if section == "entries":
         entries = data.get("journal_log", [])
-        for entry in entries[-3:]:  # Show the last 3 entries
+        recent = []
+        for entry in entries[-limits["entries"]:] if limits["entries"] else []:
             if isinstance(entry, dict):
-                date = entry.get("date", entry.get("day", "Unknown date"))
-                title = entry.get("title", "Untitled entry")
                 content = entry.get("content", entry.get("entry", ""))
-                print(f"\n[{date}] {title}")
-                if content:
-                    print(content if len(content) < 200 else f"{content[:200]}...")
+                recent.append({"date": entry.get("date", entry.get("day", "Unknown date")),
+                               "title": entry.get("title", "Untitled entry"),
+                               "content": content if len(content) < limits["content"]
+                                          else f"{content[:limits['content']]}..."})
             else:
-                print(f"\n{str(entry)[:200]}{'...' if len(str(entry)) > 200 else ''}")
-            
-        if mental_notes := data.get("mental_state", {}).get("notes", []):
-            print("\n===== MENTAL STATE NOTES =====")
-            for note in mental_notes[-3:]:  # Show last 3 notes
-                print(f"- {note}")
-                
+                text = str(entry)
+                recent.append({"text": f"{text[:limits['content']]}{'...' if len(text) > limits['content'] else ''}"})
+        return {"entries": recent, "total": len(entries)}
+    if section == "mental_state":
+        notes = data.get("mental_state", {}).get("notes", [])
+        return {"notes": list(notes[-limits["notes"]:]) if limits["notes"] else []}
+    raise ValueError(f"Unknown summary section '{section}'")
+
+def _summary_text(section, summary):
+    """Render one section of a summary as the lines print_summary() shows."""
+    lines = []
+    if section == "character":
+        lines += ["\n===== CHARACTER SUMMARY =====",
+                  f"Name: {summary['name']}",
+                  f"Level {summary['level']} {summary['class']}",
+                  f"HP: {summary['hp']}/{summary['max_hp']}",
+                  f"Hit Dice: {summary['hit_dice']}",
+                  f"Fighting Style: {summary['fighting_style']}",
+                  f"\nCurrency: {summary['currency']['gp']} GP, {summary['currency']['sp']} SP, "
+                  f"{summary['currency']['cp']} CP"]
+        if summary["features"]:
+            lines.append("\nFeatures:")
+            lines += [f"- {feature}" for feature in summary["features"]]
+    elif section == "quests":
+        lines += ["\n===== QUESTS =====", "Active Quests:"]
+        lines += [f"{i}. {q['title']} - {q['description']}..." for i, q in enumerate(summary["active"], 1)]
+        lines.append("\nCompleted Quests:")
+        lines += [f"{i}. {q['title']} - Completed: {q['completed_date']}" for i, q in enumerate(summary["completed"], 1)]
+        lines.append("\nRumors:")
+        lines += [f"{i}. {q['title']} - Source: {q['source']}" for i, q in enumerate(summary["rumors"], 1)]
+    elif section == "inventory":
+        lines.append("\n===== INVENTORY =====")
+        lines += [f"- {item['name']} (x{item['quantity']})" for item in summary["items"]]
+        if summary["total"] > len(summary["items"]):
+            lines.append(f"... and {summary['total'] - len(summary['items'])} more items")
+    elif section == "entries":
+        lines.append("\n===== RECENT JOURNAL ENTRIES =====")
+        for entry in summary["entries"]:
+            if "text" in entry:
+                lines.append(f"\n{entry['text']}")
+                continue
+            lines.append(f"\n[{entry['date']}] {entry['title']}")
+            if entry["content"]:
+                lines.append(entry["content"])
+    elif section == "mental_state" and summary["notes"]:
+        lines.append("\n===== MENTAL STATE NOTES =====")
+        lines += [f"- {note}" for note in summary["notes"]]
+    return "\n".join(lines)
+
+@timed("build_summary")
+def build_summary(data, sections=SUMMARY_SECTIONS, limits=None):
+    """
+    Build a human-readable summary of the journal data. Each section is
+    cached by the values it shows, so summarizing an unchanged journal again
+    only re-reads those values.
+    
+    Args:
+        data: Journal data as a dictionary
+        sections: Sections to include, in order (see SUMMARY_SECTIONS)
+        limits: Overrides for SUMMARY_LIMITS, e.g. {"entries": 10}
+    
+    Returns:
+        dict: {"sections": {section: structured data}, "text": rendered summary};
+              the section data is shared with the cache and must not be modified
+    
+    Raises:
+        ValueError: If a section is unknown
+    """
+    limits = {**SUMMARY_LIMITS, **(limits or {})}
+    structured = {}
+    texts = []
+    for section in sections:
+        key = _summary_key(data, section, limits)
+        cached = _SUMMARY_CACHE.get(key)
+        if cached is None:
+            summary = _summary_data(data, section, limits)
+            cached = (summary, _summary_text(section, summary))
+            _SUMMARY_CACHE[key] = cached
+            if len(_SUMMARY_CACHE) > SUMMARY_CACHE_SIZE:
+                _SUMMARY_CACHE.popitem(last=False)
+        else:
+            _SUMMARY_CACHE.move_to_end(key)
+        structured[section], text = cached
+        if text:
+            texts.append(text)
+    return {"sections": structured, "text": "\n".join(texts) + "\n" if texts else ""}
+
+@timed("print_summary")
+def print_summary(data):
+    """
+    Print a comprehensive human-readable summary of the journal data.
+    
+    Args:
+        data: Journal data as a dictionary
+    """
+    try:
+        print(build_summary(data)["text"], end="")
     except Exception as e:
         print(f"Error printing summary: {e}")
         print("Partial summary:")
@@ -201,7 +350,9 @@ def clean_journal_data(data):
         "_meta": {"version", "last_ai_sync", "milestones"}
     }
     
-    cleaned = clean_dict(data)
+    with measure("clean_journal_data") as metric:
+        cleaned = clean_dict(data)
+        metric["records"] = count_records(cleaned)
     
     # Ensure required structure remains
     for section, fields in required_fields.items():
@@ -216,6 +367,128 @@ def clean_journal_data(data):
     
     return cleaned
 
+def get_sync_base_path(journal_path):
+    """
+    Get the path of the base snapshot stored for a journal at export time.
+    Snapshots live in a sync/ folder next to the journal so they never show
+    up in list_json_files().
+    
+    Args:
+        journal_path: Path to the journal file
+    
+    Returns:
+        str: Path to the journal's sync base snapshot
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(journal_path)), "sync",
+                        os.path.basename(journal_path))
+
+def get_sync_digests_path(journal_path):
+    """
+    Get the path of the section digests stored next to a journal's sync base.
+    
+    Args:
+        journal_path: Path to the journal file
+    
+    Returns:
+        str: Path to sync/<journal name>.digests.json
+    """
+    return os.path.splitext(get_sync_base_path(journal_path))[0] + ".digests.json"
+
+def get_sync_omitted_path(journal_path):
+    """
+    Get the path of the list of records a budgeted export left out.
+    
+    Args:
+        journal_path: Path to the journal file
+    
+    Returns:
+        str: Path to sync/<journal name>.omitted.json
+    """
+    return os.path.splitext(get_sync_base_path(journal_path))[0] + ".omitted.json"
+
+def save_sync_base(data, journal_path, digests=None, omitted=None):
+    """
+    Store the journal state that was handed to the AI, for three-way merging
+    on the next import.
+    
+    Args:
+        data: Journal data exactly as exported
+        journal_path: Path to the journal the export came from
+        digests: JournalHashTree.summary() of the journal at export time, so the
+                 next delta export only diffs the sections that changed since;
+                 None drops any stored digests
+        omitted: {section: [record keys]} of records in data the AI was not
+                 sent (budgeted exports); None drops any stored list
+    
+    Returns:
+        bool: True if saved successfully, False otherwise
+    """
+    if not save_journal(data, get_sync_base_path(journal_path)):
+        return False
+    for path, value, what in ((get_sync_digests_path(journal_path), digests, "sync digests"),
+                              (get_sync_omitted_path(journal_path), omitted, "omitted records")):
+        try:
+            if value is not None:
+                with open(path, "w") as file:
+                    json.dump(value, file)
+            elif os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            print(f"Warning: Could not store {what}: {e}")
+    return True
+
+def load_sync_base(journal_path):
+    """
+    Load the base snapshot stored for a journal, if there is one.
+    
+    Args:
+        journal_path: Path to the journal file
+    
+    Returns:
+        dict: The base snapshot, or None if no usable snapshot exists
+    """
+    base_path = get_sync_base_path(journal_path)
+    if not os.path.exists(base_path):
+        return None
+    try:
+        return load_journal(base_path)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def load_sync_digests(journal_path):
+    """
+    Load the section digests stored with a journal's sync base.
+    
+    Args:
+        journal_path: Path to the journal file
+    
+    Returns:
+        dict: JournalHashTree.summary() from the last export, or None
+    """
+    try:
+        with open(get_sync_digests_path(journal_path)) as file:
+            digests = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return digests if isinstance(digests, dict) and "sections" in digests else None
+
+def load_sync_omitted(journal_path):
+    """
+    Load the records the last (budgeted) export left out.
+    
+    Args:
+        journal_path: Path to the journal file
+    
+    Returns:
+        dict: {section: [record keys]}, empty if the export sent everything
+    """
+    try:
+        with open(get_sync_omitted_path(journal_path)) as file:
+            omitted = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return omitted if isinstance(omitted, dict) else {}
+
 def list_json_files(folder):
     """
     Returns a list of .json filenames in the given folder.
@@ -231,8 +504,194 @@ def list_json_files(folder):
             print(f"Folder {folder} does not exist.")
             return []
             
-        json_files = [f for f in os.listdir(folder) if f.endswith('.json')]
+        with measure("list_json_files") as metric:
+            json_files = [f for f in os.listdir(folder) if f.endswith('.json')]
+            metric["records"] = len(json_files)
         return json_files
     except Exception as e:
         print(f"Error listing JSON files: {e}")
         return []
+
+# --- Journal hash tree ---
+
+def _hash(value):
+    """128-bit digest of a JSON value."""
+    text = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+def _combine(pairs):
+    """Digest of (name, digest) pairs, in the given order."""
+    text = b"".join(str(name).encode("utf-8") + b"\0" + digest for name, digest in pairs)
+    return hashlib.blake2b(text, digest_size=16).digest()
+
+def _record_roots():
+    roots = {}
+    for path in RECORD_SECTIONS:
+        root, _, child = path.partition(".")
+        roots.setdefault(root, set())
+        if child:
+            roots[root].add(child)
+    return roots
+
+class JournalHashTree:
+    """
+    Merkle tree over a journal: root -> sections -> records (list sections)
+    or fields (dict sections such as character, mental_state and _meta).
+    Sections are the record section paths of journal_diff (e.g. "inventory",
+    "quests.active") plus the top-level names of everything else, so they
+    can be passed to diff_journals(sections=...).
+
+    Like models.JournalModel, refresh() only hashes records appended to a
+    list section it has seen before; records edited in place must be marked
+    with invalidate(). Lists that were replaced or shrank are hashed again,
+    and dict sections are always re-hashed (they are small).
+    """
+
+    def __init__(self, data=None):
+        # Section -> digest
+        self.sections = {}
+        # Record section -> [(record key, digest)] in list order, and key -> position
+        self.records = {}
+        self._positions = {}
+        # Record section -> list object last hashed; invalidated keys or True for the whole section
+        self._sources = {}
+        self._stale = {}
+        self.root = None
+        if data is not None:
+            self.refresh(data)
+
+    def invalidate(self, section=None, key=None):
+        """
+        Mark records as changed in place so the next refresh() re-hashes them.
+
+        Args:
+            section: Record section path; None marks every section
+            key: Record id (or natural key); None marks the whole section
+        """
+        if section is None:
+            self._sources.clear()
+        elif key is None or self._stale.get(section) is True:
+            self._stale[section] = True
+        else:
+            self._stale.setdefault(section, set()).add(key)
+
+    def _refresh_records(self, section, records):
+        key_func = RECORD_SECTIONS[section]
+        stale = self._stale.pop(section, None)
+        entries = self.records.get(section)
+        if entries is None or stale is True or self._sources.get(section) is not records \
+                or len(records) < len(entries):
+            entries = [(key_func(record), _hash(record)) for record in records]
+            self._positions[section] = {key: i for i, (key, _) in enumerate(entries)}
+        elif not stale and len(records) == len(entries) and section in self.sections:
+            return self.sections[section]  # Same list, nothing appended or marked
+        else:
+            positions = self._positions[section]
+            for key in stale or ():
+                i = positions.get(key)
+                if i is not None and i < len(records):
+                    entries[i] = (key, _hash(records[i]))
+            for i in range(len(entries), len(records)):
+                entry = (key_func(records[i]), _hash(records[i]))
+                entries.append(entry)
+                positions[entry[0]] = i
+        self.records[section] = entries
+        self._sources[section] = records
+        return _combine(entries)
+
+    @timed("hash_tree.refresh")
+    def refresh(self, data):
+        """
+        Bring the tree up to date with the journal.
+
+        Args:
+            data: Journal data as a dictionary
+
+        Returns:
+            set: Sections whose digest changed
+        """
+        previous = self.sections
+        sections = {}
+        roots = _record_roots()
+        for section in RECORD_SECTIONS:
+            records = get_path(data, section)
+            if isinstance(records, list):
+                sections[section] = self._refresh_records(section, records)
+            else:
+                self.records.pop(section, None)
+                self._sources.pop(section, None)
+                if records is not None:
+                    sections[section] = _hash(records)
+        for section, value in data.items():
+            children = roots.get(section)
+            if children is not None and not children:
+                continue  # Whole section is a record list
+            if isinstance(value, dict):
+                fields = sorted((k, _hash(v)) for k, v in value.items() if not children or k not in children)
+                sections[section] = _combine(fields)
+            else:
+                sections[section] = _hash(value)
+        self.sections = sections
+        self.root = _combine(sorted(sections.items()))
+        return {s for s in {**previous, **sections} if previous.get(s) != sections.get(s)}
+
+    def summary(self):
+        """
+        Get the root and section digests in a JSON-friendly form, to compare
+        against later (e.g. the journal as saved, exported or backed up).
+
+        Returns:
+            dict: {"root": hex digest, "sections": {section: hex digest}}
+        """
+        return {"root": self.root.hex() if self.root else None,
+                "sections": {section: digest.hex() for section, digest in self.sections.items()}}
+
+    def changed_sections(self, other):
+        """
+        List the sections that differ from another tree or summary().
+
+        Returns:
+            list: Section names, sorted; empty if the journals are identical
+        """
+        mine = self.summary()
+        theirs = other.summary() if isinstance(other, JournalHashTree) else other
+        if theirs and mine["root"] == theirs.get("root"):
+            return []
+        theirs_sections = (theirs or {}).get("sections", {})
+        return sorted(s for s in {**mine["sections"], **theirs_sections}
+                      if mine["sections"].get(s) != theirs_sections.get(s))
+
+    def changed_records(self, other, section):
+        """
+        Compare the records of one list section with another tree.
+
+        Returns:
+            dict: {"added", "removed", "modified"} lists of record keys
+        """
+        mine = dict(self.records.get(section, []))
+        theirs = dict(other.records.get(section, []))
+        return {"added": [k for k in mine if k not in theirs],
+                "removed": [k for k in theirs if k not in mine],
+                "modified": [k for k in mine if k in theirs and mine[k] != theirs[k]]}
+
+def changed_sections(old, new):
+    """
+    List the sections that differ between two journals.
+
+    Args:
+        old: Journal data, a JournalHashTree or a JournalHashTree.summary()
+        new: Journal data or a JournalHashTree
+
+    Returns:
+        list: Changed section names (see JournalHashTree)
+    """
+    if not isinstance(new, JournalHashTree):
+        new = JournalHashTree(new)
+    if isinstance(old, dict) and "sections" not in old:
+        old = JournalHashTree(old)
+    return new.changed_sections(old)
+
+def journals_identical(a, b):
+    """Check whether two journals (data or JournalHashTree) have the same content."""
+    trees = [x if isinstance(x, JournalHashTree) else JournalHashTree(x) for x in (a, b)]
+    return trees[0].root == trees[1].root